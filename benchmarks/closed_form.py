@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import argparse
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.option import OptionBatch
+from core.pricers.binomial import price_american_binomial_batch
+from core.pricers.baw import price_american_baw_batch
+from core.pricers.bjerksund_stensland import price_american_bjerksund_stensland_batch
+from core.pricers.alo import price_american_alo_batch
+
+def random_contracts(n, seed=0):
+    """
+    Random American puts spanning deep in- to out-of-the-money, short to
+    long dated, low to high volatility.
+
+    Parameters:
+        n (int): Number of contracts.
+        seed (int): Random seed.
+
+    Returns:
+        OptionBatch: The contracts
+    """
+    rng = np.random.default_rng(seed)
+    return OptionBatch(
+        S=np.full(n, 100.0),
+        K=rng.uniform(70, 130, n),
+        T=rng.uniform(0.05, 3.0, n),
+        r=rng.uniform(0.0, 0.1, n),
+        sigma=rng.uniform(0.1, 0.6, n),
+        option_type=np.full(n, 'put'),
+        style=np.full(n, 'american'),
+    )
+
+def time_pricer(batch_pricer, batch, repeats=5):
+    """Best wall time over `repeats` calls, and the prices."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        prices = batch_pricer(batch)
+        best = min(best, time.perf_counter() - start)
+    return best, prices
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and speed of the closed-form American pricers against a high-step binomial reference.")
+    parser.add_argument("--contracts", type=int, default=500, help="Number of random contracts")
+    parser.add_argument("--reference-steps", type=int, default=5000, help="Binomial steps of the reference prices")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the contract grid")
+    args = parser.parse_args()
+
+    batch = random_contracts(args.contracts, args.seed)
+    start = time.perf_counter()
+    reference = price_american_binomial_batch(batch, args.reference_steps)
+    reference_time = time.perf_counter() - start
+    print(f"{args.contracts} American puts, reference: binomial({args.reference_steps}) "
+          f"in {reference_time / args.contracts * 1e3:.2f} ms per contract")
+    print(f"{'pricer':<25}{'max abs err':>12}{'mean abs err':>14}{'max rel err':>13}{'us/contract':>13}")
+
+    pricers = {
+        'Barone-Adesi-Whaley': price_american_baw_batch,
+        'Bjerksund-Stensland': price_american_bjerksund_stensland_batch,
+        'Andersen-Lake-Offengeld': price_american_alo_batch,
+        'binomial(100)': lambda b: price_american_binomial_batch(b, 100),
+    }
+    for name, batch_pricer in pricers.items():
+        elapsed, prices = time_pricer(batch_pricer, batch)
+        error = np.abs(prices - reference)
+        relative = error / np.maximum(reference, 1e-2)
+        print(f"{name:<25}{error.max():>12.4f}{error.mean():>14.4f}{relative.max():>13.4f}"
+              f"{elapsed / args.contracts * 1e6:>13.2f}")
+
+if __name__ == "__main__":
+    main()
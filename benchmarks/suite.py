@@ -0,0 +1,325 @@
+import sys
+import os
+import csv
+import json
+import time
+import platform
+import argparse
+import warnings
+import tracemalloc
+from datetime import datetime, timezone
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.option import OptionBatch
+from core.pricers.alo import price_american_alo_batch
+from core.pricers.baw import price_american_baw_batch
+from core.pricers.binomial import price_american_binomial_batch
+from core.pricers.bjerksund_stensland import price_american_bjerksund_stensland_batch
+from core.pricers.fd_cn import price_american_fd_cn_batch
+from core.pricers.fd_explicit import StabilityWarning, price_american_fd_explicit
+from core.pricers.fd_implicit import price_american_fd_implicit_batch
+from core.pricers.lsm_engine import price_american_mc_lsm_engine_batch
+from core.pricers.monte_carlo_lsm import price_american_mc_lsm_batch
+from core.pricers.plans import PlanCache, price_american_fd_cn_chain
+from utils.validators import black_scholes_price_batch
+
+# Fixed benchmark grid: spot 100, rate 5%, every combination below
+STRIKES = (80.0, 100.0, 120.0)
+MATURITIES = (0.1, 2.0)
+VOLATILITIES = (0.15, 0.45)
+OPTION_TYPES = ('put', 'call')
+RATE = 0.05
+
+RESULT_FIELDS = ('pricer', 'resolution', 'time_s', 'time_per_contract_us', 'peak_memory_mb',
+                 'max_abs_error', 'rms_error', 'max_rel_error')
+
+def contract_grid():
+    """
+    American contracts covering ITM/ATM/OTM strikes, short and long
+    maturities, low and high volatility, puts and calls.
+
+    Returns:
+        tuple: (OptionBatch, list of labels such as 'put ITM T=0.1 vol=0.15')
+    """
+    rows = [(K, T, sigma, option_type) for option_type in OPTION_TYPES for K in STRIKES
+            for T in MATURITIES for sigma in VOLATILITIES]
+    K, T, sigma, option_type = (np.array(column) for column in zip(*rows))
+    batch = OptionBatch(np.full(len(rows), 100.0), K.astype(float), T.astype(float), np.full(len(rows), RATE),
+                        sigma.astype(float), option_type, 'american')
+    labels = []
+    for K, T, sigma, option_type in rows:
+        intrinsic = (100.0 - K) if option_type == 'call' else (K - 100.0)
+        moneyness = 'ATM' if intrinsic == 0 else ('ITM' if intrinsic > 0 else 'OTM')
+        labels.append(f"{option_type} {moneyness} T={T:g} vol={sigma:g}")
+    return batch, labels
+
+def reference_prices(batch):
+    """
+    High-resolution reference: Andersen-Lake-Offengeld with a fine boundary
+    and quadrature for American puts (within about 1e-5 of 40000-step
+    trees); American calls on a non-dividend stock are worth the
+    Black-Scholes price.
+    """
+    reference = black_scholes_price_batch(batch)
+    puts = ~batch.is_call
+    reference[puts] = price_american_alo_batch(batch[np.flatnonzero(puts)], n_nodes=48, n_quadrature=96,
+                                               n_iterations=24, n_pricing=128)
+    return reference
+
+def _explicit_batch(batch, M):
+    """The explicit scheme has no batch entry point; N is raised to the stability limit."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', StabilityWarning)
+        return np.array([price_american_fd_explicit(option, M, M) for option in batch])
+
+# name -> (batch pricer called as pricer(batch, resolution), resolution sweep, resolution meaning)
+PRICERS = {
+    'binomial': (lambda batch, n: price_american_binomial_batch(batch, n),
+                 (25, 50, 100, 200, 400, 800, 1600), 'steps'),
+    'binomial_lr': (lambda batch, n: price_american_binomial_batch(batch, n, tree='leisen_reimer'),
+                    (25, 50, 100, 200, 400, 800, 1600), 'steps (rounded up to odd)'),
+    'binomial_lr_richardson': (lambda batch, n: price_american_binomial_batch(batch, n, tree='leisen_reimer',
+                                                                              richardson=True),
+                               (25, 50, 100, 200, 400, 800), 'steps, extrapolated with steps / 2'),
+    'binomial_bbs_richardson': (lambda batch, n: price_american_binomial_batch(batch, n, tree='bbs',
+                                                                               richardson=True),
+                                (25, 50, 100, 200, 400, 800), 'steps, extrapolated with steps / 2 (BBSR)'),
+    'fd_explicit': (_explicit_batch, (25, 50, 100, 200), 'M (N at the stability limit)'),
+    'fd_implicit': (lambda batch, n: price_american_fd_implicit_batch(batch, n, n),
+                    (25, 50, 100, 200, 400, 800), 'M = N'),
+    'fd_cn': (lambda batch, n: price_american_fd_cn_batch(batch, n, n),
+              (25, 50, 100, 200, 400, 800), 'M = N'),
+    'fd_cn_sinh': (lambda batch, n: price_american_fd_cn_batch(batch, n, n, grid='sinh', rannacher_steps=2),
+                   (25, 50, 100, 200, 400, 800), 'M = N, sinh grid, Rannacher'),
+    'fd_cn_chain': (lambda batch, n: price_american_fd_cn_chain(batch, 4 * n, n, plans=PlanCache()),
+                    (25, 50, 100, 200, 400), 'N (M = 4N), one moneyness plan per group'),
+    'mc_lsm': (lambda batch, n: price_american_mc_lsm_batch(batch, n, 50, control_variate=True),
+               (1000, 4000, 16000, 64000), 'paths'),
+    'mc_lsm_engine': (lambda batch, n: price_american_mc_lsm_engine_batch(batch, n, 50, control_variate=True),
+                      (1000, 4000, 16000, 64000), 'paths'),
+    'baw': (price_american_baw_batch, (0,), 'closed form'),
+    'bjerksund_stensland': (price_american_bjerksund_stensland_batch, (0,), 'closed form'),
+    'alo': (lambda batch, n: price_american_alo_batch(batch, n_nodes=n), (4, 8, 16, 32), 'boundary nodes'),
+}
+
+def measure(batch_pricer, batch, resolution, reference, repeats=3):
+    """
+    Time, peak memory and error of one pricer at one resolution.
+
+    Wall time is the best of `repeats` calls. Peak memory is measured with
+    tracemalloc (which tracks numpy buffers) on a separate call, so its
+    overhead does not pollute the timings.
+
+    Returns:
+        dict: One row with the RESULT_FIELDS besides pricer and resolution
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        prices = np.asarray(batch_pricer(batch, resolution), dtype=float)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        batch_pricer(batch, resolution)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    error = np.abs(prices - reference)
+    return {
+        'time_s': best,
+        'time_per_contract_us': best / len(batch) * 1e6,
+        'peak_memory_mb': peak / 2**20,
+        'max_abs_error': float(error.max()),
+        'rms_error': float(np.sqrt(np.mean(error**2))),
+        'max_rel_error': float((error / np.maximum(reference, 1e-2)).max()),
+    }
+
+def run_suite(pricers=None, max_resolution=None, repeats=3, verbose=True):
+    """
+    Run every selected pricer over the contract grid and its resolution sweep.
+
+    Parameters:
+        pricers (list): Names from PRICERS (default: all).
+        max_resolution (int): Skip resolutions above this value.
+        repeats (int): Timed calls per measurement.
+        verbose (bool): Print one line per measurement.
+
+    Returns:
+        dict: {'metadata': ..., 'contracts': labels, 'results': list of rows}
+    """
+    batch, labels = contract_grid()
+    reference = reference_prices(batch)
+    names = list(PRICERS) if not pricers else pricers
+    unknown = set(names) - set(PRICERS)
+    if unknown:
+        raise ValueError(f"Unknown pricers {sorted(unknown)}; choose from {list(PRICERS)}")
+
+    results = []
+    for name in names:
+        batch_pricer, resolutions, _ = PRICERS[name]
+        for resolution in resolutions:
+            if max_resolution is not None and resolution > max_resolution:
+                continue
+            row = {'pricer': name, 'resolution': resolution}
+            row.update(measure(batch_pricer, batch, resolution, reference, repeats))
+            results.append(row)
+            if verbose:
+                print(f"{name:<20}{resolution:>7}{row['time_s'] * 1e3:>11.2f} ms{row['peak_memory_mb']:>9.2f} MB"
+                      f"{row['max_abs_error']:>12.2e}{row['rms_error']:>12.2e}")
+
+    metadata = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeats': repeats,
+        'reference': 'ALO (48 nodes) for puts, Black-Scholes for calls',
+        'resolutions': {name: PRICERS[name][2] for name in names},
+    }
+    return {'metadata': metadata, 'contracts': labels, 'results': results}
+
+def write_results(report, output_dir):
+    """Write the report as results.json and results.csv into output_dir; return the JSON path."""
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, 'results.json')
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    with open(os.path.join(output_dir, 'results.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report['results'])
+    return json_path
+
+def plot_convergence(report, output_dir):
+    """Save error vs. time and error vs. resolution plots as convergence.png in output_dir."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (ax_time, ax_resolution) = plt.subplots(1, 2, figsize=(13, 5))
+    for name in dict.fromkeys(row['pricer'] for row in report['results']):
+        rows = [row for row in report['results'] if row['pricer'] == name]
+        times = [row['time_s'] for row in rows]
+        errors = [max(row['max_abs_error'], 1e-12) for row in rows]
+        ax_time.plot(times, errors, marker='o', label=name)
+        if len(rows) > 1:
+            ax_resolution.plot([row['resolution'] for row in rows], errors, marker='o', label=name)
+    ax_time.set(xscale='log', yscale='log', xlabel='Wall time for the grid (s)', ylabel='Max abs error',
+                title='Accuracy vs. time')
+    ax_resolution.set(xscale='log', yscale='log', xlabel='Resolution (steps / nodes / paths)',
+                      ylabel='Max abs error', title='Convergence')
+    for ax in (ax_time, ax_resolution):
+        ax.grid(True, which='both', alpha=0.3)
+        ax.legend(fontsize='small')
+    fig.tight_layout()
+    path = os.path.join(output_dir, 'convergence.png')
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+def compare(report, baseline, tolerance=0.25, min_time=1e-3):
+    """
+    Compare a report to a saved baseline.
+
+    A measurement is flagged as a slowdown when its wall time exceeds the
+    baseline by more than `tolerance` (relative) and by more than
+    `min_time` seconds, so timer noise on tiny runs is not reported. An
+    error that grows by more than `tolerance` (relative, above 1e-10) is
+    flagged as an accuracy regression.
+
+    Parameters:
+        report (dict): Current results, as returned by run_suite.
+        baseline (dict): Saved results in the same format.
+        tolerance (float): Allowed relative increase.
+        min_time (float): Allowed absolute increase in seconds.
+
+    Returns:
+        list: One dict per matched measurement with time_ratio, error_ratio and flags
+    """
+    saved = {(row['pricer'], row['resolution']): row for row in baseline['results']}
+    rows = []
+    for row in report['results']:
+        old = saved.get((row['pricer'], row['resolution']))
+        if old is None:
+            continue
+        flags = []
+        if row['time_s'] > old['time_s'] * (1 + tolerance) and row['time_s'] - old['time_s'] > min_time:
+            flags.append('SLOWER')
+        if (row['max_abs_error'] > old['max_abs_error'] * (1 + tolerance)
+                and row['max_abs_error'] - old['max_abs_error'] > 1e-10):
+            flags.append('LESS ACCURATE')
+        rows.append({
+            'pricer': row['pricer'],
+            'resolution': row['resolution'],
+            'time_ratio': row['time_s'] / old['time_s'],
+            'error_ratio': row['max_abs_error'] / max(old['max_abs_error'], 1e-300),
+            'flags': flags,
+        })
+    return rows
+
+def print_comparison(rows):
+    """Print a comparison table; return the number of flagged measurements."""
+    print(f"{'pricer':<20}{'resolution':>11}{'time ratio':>12}{'error ratio':>13}  flags")
+    for row in rows:
+        print(f"{row['pricer']:<20}{row['resolution']:>11}{row['time_ratio']:>12.2f}{row['error_ratio']:>13.2f}"
+              f"  {', '.join(row['flags'])}")
+    flagged = sum(1 for row in rows if row['flags'])
+    print(f"{flagged} of {len(rows)} measurements flagged")
+    return flagged
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy-vs-time benchmarks of every pricer over a fixed "
+                                                 "contract grid and a sweep of resolutions.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run the suite and write results.json, results.csv and convergence.png")
+    run.add_argument("--pricers", nargs='+', choices=list(PRICERS), help="Pricers to run (default: all)")
+    run.add_argument("--max-resolution", type=int, help="Skip resolutions above this value")
+    run.add_argument("--repeats", type=int, default=3, help="Timed calls per measurement (best is kept)")
+    run.add_argument("--output", default='benchmark_results', help="Output directory")
+    run.add_argument("--no-plot", action='store_true', help="Skip the convergence plot")
+    run.add_argument("--baseline", help="Baseline results.json to compare against after the run")
+    run.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+
+    check = commands.add_parser('compare', help="Compare two saved results.json files")
+    check.add_argument("results", help="Current results.json")
+    check.add_argument("baseline", help="Baseline results.json")
+    check.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+
+    commands.add_parser('list', help="List the pricers and their resolution sweeps")
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, (_, resolutions, meaning) in PRICERS.items():
+            print(f"{name:<20}{meaning:<45}{', '.join(map(str, resolutions))}")
+        return 0
+
+    if args.command == 'compare':
+        with open(args.results) as f:
+            report = json.load(f)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return 1 if print_comparison(compare(report, baseline, args.tolerance)) else 0
+
+    batch, _ = contract_grid()
+    print(f"{len(batch)} contracts")
+    print(f"{'pricer':<20}{'res.':>7}{'time':>14}{'memory':>12}{'max err':>12}{'rms err':>12}")
+    report = run_suite(args.pricers, args.max_resolution, args.repeats)
+    path = write_results(report, args.output)
+    print(f"Results written to {path}")
+    if not args.no_plot:
+        print(f"Plot written to {plot_convergence(report, args.output)}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return 1 if print_comparison(compare(report, baseline, args.tolerance)) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Thread-safe bounded mapping with least-recently-used eviction and
+    hit/miss statistics; the storage behind PricingCache and PlanCache.
+
+    Attributes:
+        maxsize (int): Maximum number of entries
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to build their entry
+        evictions (int): Entries dropped to respect maxsize
+    """
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """
+        Return the entry for key, calling build() to create it on a miss.
+
+        build runs outside the lock, so concurrent misses on one key may
+        both build; the last one stored wins.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = build()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store (or replace) the entry for key as the most recently used one."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove the entry for key and return it (default if absent)."""
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def stats(self):
+        """Return the hit/miss statistics as a dictionary."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / requests if requests else 0.0,
+            }
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        stats = self.stats()
+        return (f"{type(self).__name__}(size={stats['size']}/{stats['maxsize']}, hits={stats['hits']}, "
+                f"misses={stats['misses']}, hit_rate={stats['hit_rate']:.1%})")
+
+class PricingCache(LRUCache):
+    """
+    Bounded LRU cache of pricing results keyed on (pricer, method config, option).
+
+    Options are hashable values, so a repeated request (the same contract,
+    pricer and settings) is served from memory instead of re-solved. When
+    the cache is full the least recently used result is evicted.
+
+    With quantize, e.g. {'S': 0.01, 'sigma': 1e-4}, option terms are rounded
+    to those steps before lookup and the rounded option is what gets priced,
+    so requests that differ by less than a step share one result.
+
+    Attributes:
+        maxsize (int): Maximum number of cached results
+        quantize (dict): Rounding step per option term (empty for exact keys)
+        hits, misses, evictions (int): Statistics, see LRUCache
+    """
+
+    def __init__(self, maxsize=4096, quantize=None):
+        super().__init__(maxsize)
+        self.quantize = dict(quantize or {})
+
+    def price(self, pricer, option, *args, key=None, **kwargs):
+        """
+        Return pricer(option, *args, **kwargs), from the cache when possible.
+
+        Parameters:
+            pricer (callable): Pricer called as pricer(option, *args, **kwargs).
+            option (Option): Contract to price.
+            *args, **kwargs: Method configuration passed to the pricer (steps, grid, ...);
+                part of the cache key, so they must be hashable.
+            key (hashable): Identifies the pricer in the cache key instead of the
+                function object, for lambdas and partials rebuilt on every call.
+
+        Returns:
+            The pricer's result (a float, PricingResult, PriceSurface, ...)
+        """
+        option = self._quantized(option)
+        cache_key = (pricer if key is None else key, args, tuple(sorted(kwargs.items())), option)
+        return _private_copy(self.get(cache_key, lambda: pricer(option, *args, **kwargs)))
+
+    def cached(self, pricer, key=None):
+        """
+        Wrap a pricer so every call goes through the cache.
+
+        The wrapper keeps the pricer's signature, so capability checks such
+        as supports_native_greeks and supports_surface still see it.
+
+        Parameters:
+            pricer (callable): Pricer called as pricer(option, *args, **kwargs).
+            key (hashable): See price(); pass one for lambdas that close over settings.
+
+        Returns:
+            callable: Cached pricer
+        """
+        @functools.wraps(pricer)
+        def cached_pricer(option, *args, **kwargs):
+            return self.price(pricer, option, *args, key=key, **kwargs)
+        return cached_pricer
+
+    def _quantized(self, option):
+        if not self.quantize:
+            return option
+        return option.replace(**{name: round(getattr(option, name) / step) * step
+                                 for name, step in self.quantize.items()})
+
+def _private_copy(result):
+    """Floats are shared; mutable results (PricingResult, ...) are copied so callers cannot corrupt the cache."""
+    return result if isinstance(result, (float, int)) else copy.copy(result)
@@ -1,73 +1,178 @@
-import copy
+import inspect
+import numpy as np
+from core.option import OptionBatch
+from core.profiling import count, instrumented
 
 def perturb_option(option, attr, epsilon):
     """
     Return two copies of the option object with the specified attribute
     perturbed up and down by epsilon.
     """
-    opt_up = copy.deepcopy(option)
-    opt_down = copy.deepcopy(option)
-    setattr(opt_up, attr, getattr(opt_up, attr) + epsilon)
-    setattr(opt_down, attr, getattr(opt_down, attr) - epsilon)
-    return opt_up, opt_down
+    value = getattr(option, attr)
+    return option.replace(**{attr: value + epsilon}), option.replace(**{attr: value - epsilon})
 
+@instrumented
 def compute_delta(pricer, option, steps=100, epsilon=1e-2):
     """
     Compute Delta: ∂V/∂S using central difference.
     """
+    count('greeks.delta.pricer_calls', 2)
     opt_up, opt_down = perturb_option(option, 'S', epsilon)
     price_up = pricer(opt_up, steps)
     price_down = pricer(opt_down, steps)
     return (price_up - price_down) / (2 * epsilon)
 
+@instrumented
 def compute_gamma(pricer, option, steps=100, epsilon=1e-2):
     """
     Compute Gamma: ∂²V/∂S² using central difference.
     """
+    count('greeks.gamma.pricer_calls', 3)
     opt_up, opt_down = perturb_option(option, 'S', epsilon)
     price_up = pricer(opt_up, steps)
     price_down = pricer(opt_down, steps)
     price_mid = pricer(option, steps)
     return (price_up - 2 * price_mid + price_down) / (epsilon ** 2)
 
+@instrumented
 def compute_theta(pricer, option, steps=100, epsilon=1e-4):
     """
-    Compute Theta: ∂V/∂T using forward difference.
+    Compute Theta: ∂V/∂t = -∂V/∂T using a one-sided difference in maturity.
     Returns negative value as per standard convention.
     """
     if option.T <= epsilon:
         return float('nan')  # Avoid zero or negative maturity
-    opt_t = copy.deepcopy(option)
-    opt_t.T -= epsilon
+    count('greeks.theta.pricer_calls', 2)
+    opt_t = option.replace(T=option.T - epsilon)
     price_now = pricer(option, steps)
     price_later = pricer(opt_t, steps)
-    return -(price_later - price_now) / epsilon
+    return (price_later - price_now) / epsilon
 
+@instrumented
 def compute_vega(pricer, option, steps=100, epsilon=1e-3):
     """
     Compute Vega: ∂V/∂σ using central difference.
     """
+    count('greeks.vega.pricer_calls', 2)
     opt_up, opt_down = perturb_option(option, 'sigma', epsilon)
     price_up = pricer(opt_up, steps)
     price_down = pricer(opt_down, steps)
     return (price_up - price_down) / (2 * epsilon)
 
+@instrumented
 def compute_rho(pricer, option, steps=100, epsilon=1e-4):
     """
     Compute Rho: ∂V/∂r using central difference.
     """
+    count('greeks.rho.pricer_calls', 2)
     opt_up, opt_down = perturb_option(option, 'r', epsilon)
     price_up = pricer(opt_up, steps)
     price_down = pricer(opt_down, steps)
     return (price_up - price_down) / (2 * epsilon)
 
+def supports_native_greeks(pricer):
+    """
+    Return True if the pricer accepts greeks=True and then returns a
+    PricingResult with delta, gamma and theta read off its lattice or grid.
+    """
+    try:
+        return 'greeks' in inspect.signature(pricer).parameters
+    except (TypeError, ValueError):
+        return False
+
+@instrumented
 def compute_all_greeks(pricer, option, steps=100):
     """
     Convenience function to compute all Greeks at once.
+
+    Pricers that support native Greeks give delta, gamma and theta from a
+    single solve, so at most vega and rho are bumped (5 pricer calls instead
+    of 11). Any Greek the pricer leaves as None is bumped instead.
     """
+    if supports_native_greeks(pricer):
+        result = pricer(option, steps, greeks=True)
+        count('greeks.native.pricer_calls')
+        bumped = {'delta': compute_delta, 'gamma': compute_gamma, 'theta': compute_theta,
+                  'vega': compute_vega, 'rho': compute_rho}
+        return tuple(getattr(result, name) if getattr(result, name) is not None else greek(pricer, option, steps)
+                     for name, greek in bumped.items())
+
     delta = compute_delta(pricer, option, steps)
     gamma = compute_gamma(pricer, option, steps)
     theta = compute_theta(pricer, option, steps)
     vega  = compute_vega(pricer, option, steps)
     rho   = compute_rho(pricer, option, steps)
-    return delta, gamma, theta, vega, rho
\ No newline at end of file
+    return delta, gamma, theta, vega, rho
+
+@instrumented
+def compute_all_greeks_batch(batch_pricer, batch, steps=100, vega_epsilon=1e-3, rho_epsilon=1e-4, theta_epsilon=1e-4):
+    """
+    Compute price and all Greeks for a batch in one stacked pricer call.
+
+    The contracts and their sigma and r bumps are priced together as one
+    batch of 5n contracts, so the bumps share the vectorized solve. Delta,
+    gamma and theta are read off the lattice or grid of the base contracts.
+    A pricer that leaves theta as None (mc_lsm) gets it from one more call
+    with the maturities shortened by theta_epsilon (see compute_theta_batch).
+
+    Parameters:
+        batch_pricer (callable): Batch pricer accepting greeks=True, e.g. price_american_fd_cn_batch.
+        batch (OptionBatch): Contracts to price.
+        steps (int): Steps passed to the pricer.
+        vega_epsilon (float): Central-difference bump for sigma.
+        rho_epsilon (float): Central-difference bump for r.
+        theta_epsilon (float): One-sided bump for T, used when the pricer gives no theta.
+
+    Returns:
+        PricingResult: Price and the five Greeks as arrays
+    """
+    n = len(batch)
+    zero = np.zeros(n)
+    sigma_bumps = np.concatenate([zero, zero + vega_epsilon, zero - vega_epsilon, zero, zero])
+    r_bumps = np.concatenate([zero, zero, zero, zero + rho_epsilon, zero - rho_epsilon])
+    stacked = OptionBatch(
+        S=np.tile(batch.S, 5),
+        K=np.tile(batch.K, 5),
+        T=np.tile(batch.T, 5),
+        r=np.tile(batch.r, 5) + r_bumps,
+        sigma=np.tile(batch.sigma, 5) + sigma_bumps,
+        option_type=np.tile(np.where(batch.is_call, 'call', 'put'), 5),
+        style=np.tile(np.where(batch.is_american, 'american', 'european'), 5),
+    )
+
+    result = batch_pricer(stacked, steps, greeks=True)
+    count('greeks.batch.pricer_calls')
+    base = result[:n]
+    prices = result.price.reshape(5, n)
+    base.vega = (prices[1] - prices[2]) / (2 * vega_epsilon)
+    base.rho = (prices[3] - prices[4]) / (2 * rho_epsilon)
+    if base.theta is None:
+        base.theta = compute_theta_batch(batch_pricer, batch, steps, theta_epsilon, base.price)
+    return base
+
+@instrumented
+def compute_theta_batch(batch_pricer, batch, steps=100, epsilon=1e-4, prices=None):
+    """
+    Compute Theta for a batch with the one-sided maturity difference of
+    compute_theta, for pricers that do not give it natively.
+
+    Parameters:
+        batch_pricer (callable): Batch pricer called as batch_pricer(batch, steps).
+        batch (OptionBatch): Contracts to price.
+        steps (int): Steps passed to the pricer.
+        epsilon (float or np.ndarray): Bump for T, scalar or per contract; contracts with T <= epsilon get NaN.
+        prices (np.ndarray): Prices of the batch, if already known.
+
+    Returns:
+        np.ndarray: Theta, one per contract
+    """
+    if prices is None:
+        count('greeks.batch.pricer_calls')
+        prices = np.asarray(batch_pricer(batch, steps), dtype=float)
+    count('greeks.batch.pricer_calls')
+    # Avoid zero or negative maturity
+    shortened = np.where(batch.T > epsilon, batch.T - epsilon, batch.T)
+    later = OptionBatch(batch.S, batch.K, shortened, batch.r, batch.sigma,
+                        np.where(batch.is_call, 'call', 'put'), np.where(batch.is_american, 'american', 'european'))
+    prices_later = np.asarray(batch_pricer(later, steps), dtype=float)
+    return np.where(batch.T > epsilon, (prices_later - prices) / epsilon, np.nan)
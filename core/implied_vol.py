@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+import numpy as np
+from core.option import OptionBatch
+from core.pricers.binomial import price_american_binomial_batch
+from core.profiling import instrumented
+from utils.validators import black_scholes_price_batch, black_scholes_vega_batch
+
+# Per-contract status codes of ImpliedVolResult
+CONVERGED = 'converged'
+BELOW_INTRINSIC = 'below_intrinsic'
+NO_TIME_VALUE = 'no_time_value'
+BELOW_MIN_VOL = 'below_min_vol'
+ABOVE_MAX_VOL = 'above_max_vol'
+MAX_ITERATIONS = 'max_iterations'
+
+@dataclass
+class ImpliedVolResult:
+    """
+    Implied volatilities of a batch of quotes.
+
+    Attributes:
+        sigma: Implied volatility per contract, NaN where no solution exists
+        status: Status code per contract (CONVERGED, BELOW_INTRINSIC, NO_TIME_VALUE,
+            BELOW_MIN_VOL, ABOVE_MAX_VOL or MAX_ITERATIONS)
+        iterations: Number of root-finding iterations per contract
+        residual: Model price minus market price at sigma
+    """
+    sigma: np.ndarray
+    status: np.ndarray
+    iterations: np.ndarray
+    residual: np.ndarray
+
+    def __getitem__(self, index):
+        """Return the result of contract `index` (or a sub-result)."""
+        return ImpliedVolResult(self.sigma[index], self.status[index], self.iterations[index], self.residual[index])
+
+@instrumented
+def implied_vol(market_prices, batch: OptionBatch, batch_pricer=price_american_binomial_batch, steps=100,
+                sigma_bounds=(0.01, 5.0), price_tol=1e-6, sigma_tol=1e-6, max_iter=50, vega_epsilon=1e-4):
+    """
+    Solve for the volatilities that reproduce a batch of market prices.
+
+    Every iteration prices all unconverged contracts, and the same contracts
+    with sigma bumped by vega_epsilon, in one stacked call of the batch
+    pricer, so vega comes from the pricer's own lattice or grid. Each
+    contract keeps a bracket [lo, hi] on which model minus market changes
+    sign and takes a Newton step when it lands inside the bracket,
+    otherwise a bisection step (a safeguarded Newton / bracketing hybrid).
+
+    The iteration is warm-started from the European Black-Scholes implied
+    volatility, inverted for all contracts at once.
+
+    Quotes without a solution are flagged instead of iterated, with sigma
+    left as NaN:
+    - BELOW_INTRINSIC: an American quote below its exercise value,
+    - NO_TIME_VALUE: a quote at its zero-volatility value (for American
+      contracts deep in the exercise region), where sigma is undetermined,
+    - BELOW_MIN_VOL / ABOVE_MAX_VOL: quotes outside the no-arbitrage bounds,
+      or outside the prices reachable within sigma_bounds.
+
+    Parameters:
+        market_prices (array-like): Quoted option prices, one per contract.
+        batch (OptionBatch): Contract terms; its sigma values are ignored.
+        batch_pricer (callable): Batch pricer called as batch_pricer(batch, steps),
+            e.g. price_american_binomial_batch or price_american_fd_cn_batch.
+        steps (int): Steps passed to the pricer.
+        sigma_bounds (tuple): Search interval for sigma.
+        price_tol (float): Converged when |model - market| <= price_tol.
+        sigma_tol (float): Converged when the bracket is narrower than sigma_tol.
+        max_iter (int): Maximum number of iterations.
+        vega_epsilon (float): Forward-difference bump for vega.
+
+    Returns:
+        ImpliedVolResult: Implied volatilities with per-contract status
+    """
+    n = len(batch)
+    market = np.broadcast_to(np.asarray(market_prices, dtype=float), (n,)).copy()
+    sigma_min, sigma_max = sigma_bounds
+
+    sigma = np.full(n, np.nan)
+    status = np.full(n, MAX_ITERATIONS, dtype=object)
+    iterations = np.zeros(n, dtype=int)
+    residual = np.full(n, np.nan)
+
+    # Classify the quotes against the zero-volatility and infinite-volatility prices
+    S, K, discounted_K = batch.S, batch.K, batch.K * np.exp(-batch.r * batch.T)
+    american = batch.is_american
+    intrinsic = np.where(batch.is_call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+    zero_vol = np.where(batch.is_call, np.maximum(S - discounted_K, 0),
+                        np.where(american, intrinsic, np.maximum(discounted_K - S, 0)))
+    upper = np.where(batch.is_call, S, np.where(american, K, discounted_K))
+    status[market < zero_vol - price_tol] = BELOW_MIN_VOL
+    status[american & (market < intrinsic - price_tol)] = BELOW_INTRINSIC
+    status[np.abs(market - zero_vol) <= price_tol] = NO_TIME_VALUE
+    status[market >= upper] = ABOVE_MAX_VOL
+
+    active = np.flatnonzero(status == MAX_ITERATIONS)
+    lo = np.full(len(active), float(sigma_min))
+    hi = np.full(len(active), float(sigma_max))
+    x = _european_implied_vol(market[active], batch[active])
+    x = np.clip(np.where(np.isfinite(x), x, 0.3), sigma_min, sigma_max)
+
+    for iteration in range(1, max_iter + 1):
+        if len(active) == 0:
+            break
+        k = len(active)
+        prices = batch_pricer(_with_sigma(_tile(batch[active], 2), np.concatenate([x, x + vega_epsilon])), steps)
+        f = prices[:k] - market[active]
+        vega = (prices[k:] - prices[:k]) / vega_epsilon
+        iterations[active] = iteration
+        sigma[active], residual[active] = x, f
+
+        # Shrink the bracket around the root
+        lo = np.where(f < 0, x, lo)
+        hi = np.where(f > 0, x, hi)
+
+        done = (np.abs(f) <= price_tol) | (hi - lo <= sigma_tol)
+        status[active[done]] = CONVERGED
+        # A bracket that collapsed onto an end of sigma_bounds holds no root
+        stuck_low = done & (f > price_tol) & (hi <= sigma_min + sigma_tol)
+        stuck_high = done & (f < -price_tol) & (lo >= sigma_max - sigma_tol)
+        status[active[stuck_low]] = BELOW_MIN_VOL
+        status[active[stuck_high]] = ABOVE_MAX_VOL
+        sigma[active[stuck_low | stuck_high]] = np.nan
+
+        # Newton where it stays strictly inside the bracket, bisection otherwise
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = x - f / vega
+        inside = (vega > 0) & (newton > lo) & (newton < hi)
+        x = np.where(inside, newton, 0.5 * (lo + hi))
+
+        keep = ~done
+        active, x, lo, hi = active[keep], x[keep], lo[keep], hi[keep]
+
+    return ImpliedVolResult(sigma=sigma, status=status, iterations=iterations, residual=residual)
+
+def _european_implied_vol(market_prices, batch, iterations=10):
+    """
+    Vectorized Black-Scholes implied volatility by Newton's method from the
+    Manaster-Koehler start, which converges monotonically for European
+    prices. NaN where the quote is outside the European no-arbitrage bounds.
+    """
+    S, K, T, r = batch.S, batch.K, batch.T, batch.r
+    # Start at the inflection point of the price in sigma, floored away from zero
+    sigma = np.maximum(np.sqrt(2 * np.abs(np.log(S / K) + r * T) / T), 0.05)
+    european = batch
+    for _ in range(iterations):
+        european = _with_sigma(european, sigma)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (black_scholes_price_batch(european) - market_prices) / black_scholes_vega_batch(european)
+        sigma = np.clip(np.where(np.isfinite(step), sigma - step, sigma), 1e-3, 10.0)
+    # Quotes outside the European bounds have no European implied volatility
+    european = _with_sigma(european, sigma)
+    mispriced = np.abs(black_scholes_price_batch(european) - market_prices) > 1e-4 * np.maximum(market_prices, 1)
+    return np.where(mispriced, np.nan, sigma)
+
+def _tile(batch, reps):
+    return batch[np.tile(np.arange(len(batch)), reps)]
+
+def _with_sigma(batch, sigma):
+    """Copy of a batch with its volatilities replaced."""
+    copy = batch[np.arange(len(batch))]
+    copy.sigma = np.broadcast_to(np.asarray(sigma, dtype=float), copy.S.shape).copy()
+    return copy
@@ -1,7 +1,15 @@
+from dataclasses import dataclass, replace
+import numpy as np
+
+@dataclass(frozen=True, slots=True, repr=False)
 class Option:
     """
     A class representing a financial option contract.
 
+    Options are immutable, hashable values: two options with the same terms
+    compare equal and can key dictionaries and caches. Use replace() to get
+    a bumped copy, e.g. option.replace(S=option.S + 1).
+
     Attributes:
         S (float): Spot price of the underlying asset
         K (float): Strike price
@@ -11,16 +19,21 @@ class Option:
         option_type (str): 'call' or 'put'
         style (str): 'american' or 'european'
     """
+    S: float
+    K: float
+    T: float
+    r: float
+    sigma: float
+    option_type: str = 'put'
+    style: str = 'american'
+
+    def __post_init__(self):
+        # Frozen: normalize through object.__setattr__ once, at construction
+        for name in ('S', 'K', 'T', 'r', 'sigma'):
+            object.__setattr__(self, name, float(getattr(self, name)))
+        object.__setattr__(self, 'option_type', self.option_type.lower())
+        object.__setattr__(self, 'style', self.style.lower())
 
-    def __init__(self, S, K, T, r, sigma, option_type='put', style='american'):
-        self.S = S
-        self.K = K
-        self.T = T
-        self.r = r
-        self.sigma = sigma
-        self.option_type = option_type.lower()
-        self.style = style.lower()
-        
         self._validate()
 
     def _validate(self):
@@ -33,6 +46,10 @@ class Option:
         if self.T == 0:
             raise ValueError("Time to maturity must be greater than 0")
 
+    def replace(self, **changes):
+        """Return a copy of the option with the given terms changed (validated like a new option)."""
+        return replace(self, **changes)
+
     def describe(self):
         """Return a dictionary summary of the option."""
         return {
@@ -48,3 +65,83 @@ class Option:
     def __repr__(self):
         return (f"Option({self.option_type.capitalize()} {self.style.capitalize()} | "
                 f"S={self.S}, K={self.K}, T={self.T}, r={self.r}, sigma={self.sigma})")
+
+class OptionBatch:
+    """
+    A columnar (struct-of-arrays) collection of option contracts.
+
+    Scalar inputs are broadcast against array inputs, so a whole chain that
+    shares T, r and sigma can be built from a vector of strikes.
+
+    Attributes:
+        S (np.ndarray): Spot prices of the underlying assets
+        K (np.ndarray): Strike prices
+        T (np.ndarray): Times to maturity (in years)
+        r (np.ndarray): Risk-free interest rates (annualized)
+        sigma (np.ndarray): Volatilities of the underlying assets (annualized)
+        is_call (np.ndarray): Boolean mask, True for calls and False for puts
+        is_american (np.ndarray): Boolean mask, True for American style
+    """
+
+    def __init__(self, S, K, T, r, sigma, option_type='put', style='american'):
+        S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma)))
+        n = S.shape
+
+        option_type = np.char.lower(np.asarray(option_type, dtype=str))
+        style = np.char.lower(np.asarray(style, dtype=str))
+        if not np.isin(option_type, ['call', 'put']).all():
+            raise ValueError("option_type must be either 'call' or 'put'")
+        if not np.isin(style, ['american', 'european']).all():
+            raise ValueError("style must be either 'american' or 'european'")
+
+        self.S = S.ravel().copy()
+        self.K = K.ravel().copy()
+        self.T = T.ravel().copy()
+        self.r = r.ravel().copy()
+        self.sigma = sigma.ravel().copy()
+        self.is_call = np.broadcast_to(option_type == 'call', n).ravel().copy()
+        self.is_american = np.broadcast_to(style == 'american', n).ravel().copy()
+
+        self._validate()
+
+    @classmethod
+    def from_options(cls, options):
+        """Build a batch from an iterable of Option instances."""
+        options = list(options)
+        return cls(
+            S=[o.S for o in options],
+            K=[o.K for o in options],
+            T=[o.T for o in options],
+            r=[o.r for o in options],
+            sigma=[o.sigma for o in options],
+            option_type=[o.option_type for o in options],
+            style=[o.style for o in options],
+        )
+
+    def _validate(self):
+        if any((x < 0).any() for x in [self.S, self.K, self.T, self.sigma]):
+            raise ValueError("S, K, T, and sigma must be non-negative")
+        if (self.T == 0).any():
+            raise ValueError("Time to maturity must be greater than 0")
+
+    def __len__(self):
+        return self.S.size
+
+    def __getitem__(self, index):
+        """Return a single Option for an integer index, or a sub-batch otherwise."""
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return Option(S=float(self.S[index]), K=float(self.K[index]), T=float(self.T[index]),
+                          r=float(self.r[index]), sigma=float(self.sigma[index]),
+                          option_type='call' if self.is_call[index] else 'put',
+                          style='american' if self.is_american[index] else 'european')
+        return OptionBatch(S=self.S[index], K=self.K[index], T=self.T[index], r=self.r[index],
+                           sigma=self.sigma[index],
+                           option_type=np.where(self.is_call[index], 'call', 'put'),
+                           style=np.where(self.is_american[index], 'american', 'european'))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self):
+        return (f"OptionBatch(n={len(self)}, calls={int(self.is_call.sum())}, "
+                f"american={int(self.is_american.sum())})")
@@ -0,0 +1,332 @@
+import json
+import os
+import struct
+import numpy as np
+from core.greeks import compute_all_greeks_batch
+from core.option import OptionBatch
+from core.result import PricingResult
+from core.profiling import count, instrumented
+
+# Dimensions of a price grid, in storage order (S / K, T, sigma, r)
+GRID_AXES = ('moneyness', 'T', 'sigma', 'r')
+GRID_FIELDS = ('price', 'delta', 'gamma', 'theta', 'vega', 'rho')
+INTERPOLATIONS = ('linear', 'cubic')
+
+# File layout: magic, data offset and header length, the JSON header, then
+# the C-order array of shape (*axis lengths, fields) at a page-aligned offset
+_MAGIC = b'AOPGRID1'
+_PREFIX = struct.Struct('<8sQQ')
+_ALIGN = 4096
+
+class PriceGrid:
+    """
+    Precomputed option values on a (moneyness, T, sigma, r) grid, read
+    from a memory-mapped file and interpolated on lookup.
+
+    Prices are homogeneous in (S, K): V(S, K) = K v(S / K). The grid holds
+    v and its Greeks for one option type and style, so a single grid serves
+    every strike. Lookups scale back: price, theta, vega and rho by K,
+    gamma by 1 / K; delta is unchanged.
+
+    The file is mapped read-only and only on first access, so opening a
+    grid is cheap and processes that open the same file share its pages
+    through the OS page cache, without copies. A lookup reads the 2^4
+    (linear) or 4^4 (cubic) surrounding nodes of every query.
+
+    Attributes:
+        path (str): Grid file
+        axes (dict): Axis name (GRID_AXES) -> node coordinates
+        fields (tuple): Stored fields, 'price' first
+        option_type, style (str): The contracts the grid was built for
+        interpolation (str): 'linear' (multilinear) or 'cubic' (4-point Lagrange per axis)
+        meta (dict): The full header (axes, fields, dtype, pricer, steps, error estimates)
+        error_estimates (dict): Errors of this interpolation against direct pricing,
+            sampled at build time, see validate (None if not measured)
+    """
+
+    def __init__(self, path, interpolation='linear'):
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {INTERPOLATIONS}")
+        self.path = str(path)
+        self.interpolation = interpolation
+        self.meta, self._offset = _read_header(self.path)
+        self.axes = {name: np.asarray(self.meta['axes'][name], dtype=float) for name in GRID_AXES}
+        self.fields = tuple(self.meta['fields'])
+        self.option_type = self.meta['option_type']
+        self.style = self.meta['style']
+        self.error_estimates = (self.meta.get('error_estimates') or {}).get(interpolation)
+        self._values = None
+
+    @property
+    def shape(self):
+        return tuple(len(self.axes[name]) for name in GRID_AXES) + (len(self.fields),)
+
+    @property
+    def values(self):
+        """The stored array, memory-mapped on first access."""
+        if self._values is None:
+            self._values = np.memmap(self.path, dtype=self.meta['dtype'], mode='r', offset=self._offset,
+                                     shape=self.shape)
+        return self._values
+
+    def covers(self, batch: OptionBatch):
+        """Return a mask of the contracts inside the grid (in all four axes)."""
+        inside = np.ones(len(batch), dtype=bool)
+        for name, q in zip(GRID_AXES, _coordinates(batch)):
+            axis = self.axes[name]
+            inside &= (q >= axis[0]) & (q <= axis[-1])
+        return inside
+
+    @instrumented(name='grid.lookup')
+    def price_batch(self, batch: OptionBatch, steps=None, greeks: bool = False, chunk_size: int = 8192):
+        """
+        Interpolate prices (and Greeks) for a batch of contracts.
+
+        Has the batch pricer signature, so a grid can stand in for a pricer;
+        steps is ignored. Contracts outside the grid get NaN.
+
+        Parameters:
+            batch (OptionBatch): Contracts to quote; all of the grid's option type and style.
+            steps: Ignored.
+            greeks (bool): If True, return a PricingResult with the stored Greeks.
+            chunk_size (int): Queries interpolated at once (bounds the scratch memory).
+
+        Returns:
+            np.ndarray: Prices, one per contract, or a PricingResult of arrays
+        """
+        if greeks and len(self.fields) == 1:
+            raise ValueError("This grid stores prices only; build it with greeks=True")
+        if (batch.is_call != (self.option_type == 'call')).any() or \
+                (batch.is_american != (self.style == 'american')).any():
+            raise ValueError(f"This grid prices {self.style} {self.option_type}s only")
+        count('grid.queries', len(batch))
+
+        columns = list(range(len(self.fields))) if greeks else [0]
+        out = np.full((len(batch), len(columns)), np.nan)
+        coordinates = _coordinates(batch)
+        inside = np.flatnonzero(self.covers(batch))
+        for start in range(0, len(inside), chunk_size):
+            rows = inside[start:start + chunk_size]
+            out[rows] = self._interpolate([q[rows] for q in coordinates], columns)
+
+        K = batch.K
+        if not greeks:
+            return out[:, 0] * K
+        scale = {'price': K, 'delta': 1.0, 'gamma': 1 / K, 'theta': K, 'vega': K, 'rho': K}
+        return PricingResult(**{name: out[:, i] * scale[name] for i, name in enumerate(self.fields)})
+
+    def _interpolate(self, coordinates, columns):
+        """Tensor-product interpolation of the given field columns at unit-strike coordinates."""
+        values = self.values
+        n = len(coordinates[0])
+        flat = np.zeros((n,), dtype=np.intp)
+        weights = np.ones((n,))
+        # Build the stencil one axis at a time: flat node indices and weights of shape (n, k0, k1, ...)
+        for axis_number, (name, q) in enumerate(zip(GRID_AXES, coordinates)):
+            nodes, w = _stencil(self.axes[name], q, self.interpolation)
+            expand = (slice(None),) + (None,) * axis_number + (slice(None),)
+            flat = flat[..., None] * len(self.axes[name]) + nodes[expand]
+            weights = weights[..., None] * w[expand]
+        table = values.reshape(-1, values.shape[-1])
+        result = np.empty((n, len(columns)))
+        for i, column in enumerate(columns):
+            result[:, i] = (table[flat, column] * weights).reshape(n, -1).sum(axis=1)
+        return result
+
+    @instrumented(name='grid.validate')
+    def validate(self, batch_pricer, steps=100, n_samples: int = 2048, seed: int = 0):
+        """
+        Estimate the interpolation error against direct pricing.
+
+        Draws n_samples contracts uniformly inside the grid (off the nodes),
+        prices them with batch_pricer at K = 1 and compares with the
+        lookups. Errors are per unit of strike: multiply by K for currency
+        amounts (gamma: divide). These are sampled estimates, not bounds:
+        the worst error over all quotes can exceed the sampled maximum,
+        mostly near short maturities and the strike, so the p99 and RMS
+        errors are the more stable figures.
+
+        Parameters:
+            batch_pricer (callable): Batch pricer, see build_price_grid.
+            steps (int): Steps passed to the pricer.
+            n_samples (int): Number of random test contracts.
+            seed (int): Seed of the sample.
+
+        Returns:
+            dict: Field -> {'max_abs_error', 'rms_error', 'p99_abs_error'}, and
+            'price' also has 'max_rel_error' (over prices above 1e-3)
+        """
+        batch = self._sample(n_samples, seed)
+        return self._error_estimates(batch, _price_fields(batch_pricer, batch, steps, len(self.fields) > 1))
+
+    def _sample(self, n_samples, seed):
+        """Random unit-strike contracts inside the grid."""
+        rng = np.random.default_rng(seed)
+        samples = {name: rng.uniform(axis[0], axis[-1], n_samples) for name, axis in self.axes.items()}
+        return OptionBatch(samples['moneyness'], 1.0, samples['T'], samples['r'], samples['sigma'],
+                           self.option_type, self.style)
+
+    def _error_estimates(self, batch, direct):
+        greeks = len(self.fields) > 1
+        quoted = self.price_batch(batch, greeks=greeks)
+        if not greeks:
+            quoted = PricingResult(price=quoted)
+        estimates = {}
+        for i, name in enumerate(self.fields):
+            error = np.abs(getattr(quoted, name) - direct[:, i])
+            estimates[name] = {'max_abs_error': float(error.max()), 'rms_error': float(np.sqrt(np.mean(error ** 2))),
+                            'p99_abs_error': float(np.quantile(error, 0.99))}
+        priced = direct[:, 0] > 1e-3
+        relative = np.abs(quoted.price - direct[:, 0])[priced] / direct[priced, 0]
+        estimates['price']['max_rel_error'] = float(relative.max()) if len(relative) else 0.0
+        return estimates
+
+    def __repr__(self):
+        axes = ", ".join(f"{name}: {len(c)} in [{c[0]:g}, {c[-1]:g}]" for name, c in self.axes.items())
+        return f"PriceGrid({self.style} {self.option_type}; {axes}; {self.interpolation})"
+
+@instrumented(name='grid.build')
+def build_price_grid(path, batch_pricer, moneyness, T, sigma, r, steps=100, option_type='put', style='american',
+                     greeks=False, chunk_size=4096, validate=2048, dtype='float64'):
+    """
+    Precompute option values over a (moneyness, T, sigma, r) grid and write
+    them to a memory-mappable file.
+
+    Every node is priced at K = 1 and S = moneyness, in chunks that are
+    written straight into the mapped file, so memory stays bounded for
+    any grid size. Any batch pricer called as pricer(batch, steps, greeks=False)
+    works, e.g. price_american_fd_cn_batch, price_american_alo_batch or a
+    lambda fixing its settings. With greeks=True the pricer's native
+    Greeks are stored, and vega and rho are bumped (see
+    compute_all_greeks_batch) when the pricer does not return them.
+
+    Parameters:
+        path (str): Output file.
+        batch_pricer (callable): Pricer called as batch_pricer(batch, steps[, greeks=True]).
+        moneyness, T, sigma, r (sequence): Increasing node coordinates of each axis
+            (a single value fixes that axis, e.g. r=[0.05]).
+        steps (int): Steps passed to the pricer.
+        option_type (str): 'call' or 'put'.
+        style (str): 'american' or 'european'.
+        greeks (bool): Also store delta, gamma, theta, vega and rho.
+        chunk_size (int): Nodes priced per pricer call.
+        validate (int): Random contracts priced directly to estimate the
+            linear and cubic interpolation errors, stored in the header (0: skip).
+        dtype (str): Storage type, 'float64' or 'float32' (half the size).
+
+    Returns:
+        PriceGrid: The new grid, opened with linear interpolation
+    """
+    axes = {}
+    for name, nodes in zip(GRID_AXES, (moneyness, T, sigma, r)):
+        nodes = np.atleast_1d(np.asarray(nodes, dtype=float))
+        if len(nodes) > 1 and (np.diff(nodes) <= 0).any():
+            raise ValueError(f"The {name} nodes must be increasing")
+        axes[name] = nodes
+    fields = GRID_FIELDS if greeks else GRID_FIELDS[:1]
+    shape = tuple(len(nodes) for nodes in axes.values()) + (len(fields),)
+    meta = {
+        'axes': {name: nodes.tolist() for name, nodes in axes.items()},
+        'fields': list(fields),
+        'option_type': option_type,
+        'style': style,
+        'dtype': np.dtype(dtype).name,
+        'pricer': getattr(batch_pricer, '__name__', repr(batch_pricer)),
+        'steps': steps,
+    }
+    offset = _write_header(path, meta)
+    values = np.memmap(path, dtype=dtype, mode='r+', offset=offset, shape=shape)
+
+    table = values.reshape(-1, len(fields))
+    coordinates = np.meshgrid(*axes.values(), indexing='ij')
+    x, t, vol, rate = (c.ravel() for c in coordinates)
+    for start in range(0, len(x), chunk_size):
+        rows = slice(start, start + chunk_size)
+        batch = OptionBatch(x[rows], 1.0, t[rows], rate[rows], vol[rows], option_type, style)
+        table[rows] = _price_fields(batch_pricer, batch, steps, greeks)
+    values.flush()
+    del values, table
+
+    if validate:
+        # One direct pricing of the sample checks both interpolations
+        grid = PriceGrid(path)
+        batch = grid._sample(validate, 0)
+        direct = _price_fields(batch_pricer, batch, steps, greeks)
+        meta['error_estimates'] = {interpolation: PriceGrid(path, interpolation)._error_estimates(batch, direct)
+                                   for interpolation in INTERPOLATIONS}
+        _write_header(path, meta, offset)
+    return PriceGrid(path)
+
+def open_price_grid(path, interpolation='linear'):
+    """Open a grid written by build_price_grid; the data is mapped lazily on the first lookup."""
+    return PriceGrid(path, interpolation)
+
+def _price_fields(batch_pricer, batch, steps, greeks):
+    """Price a unit-strike batch; returns an array of shape (contracts, fields)."""
+    if not greeks:
+        result = batch_pricer(batch, steps)
+        prices = result.price if isinstance(result, PricingResult) else result
+        return np.asarray(prices, dtype=float)[:, None]
+    result = batch_pricer(batch, steps, greeks=True)
+    if result.vega is None or result.rho is None:
+        result = compute_all_greeks_batch(batch_pricer, batch, steps)
+    return np.column_stack([np.asarray(getattr(result, name), dtype=float) for name in GRID_FIELDS])
+
+def _coordinates(batch):
+    """Grid coordinates of every contract, in GRID_AXES order."""
+    return batch.S / batch.K, batch.T, batch.sigma, batch.r
+
+def _stencil(axis, q, interpolation):
+    """
+    Node indices and interpolation weights along one axis, shape (n, 2)
+    for linear and (n, 4) for cubic interpolation.
+
+    Cubic weights are those of the Lagrange polynomial through the four
+    nearest nodes (shifted inwards at the edges), which also handles
+    non-uniform nodes. Axes with fewer than 4 nodes fall back to linear
+    weights, and a single-node axis is constant.
+    """
+    n = len(axis)
+    if n == 1:
+        return np.zeros((len(q), 1), dtype=np.intp), np.ones((len(q), 1))
+    left = np.clip(np.searchsorted(axis, q, side='right') - 1, 0, n - 2)
+    if interpolation == 'linear' or n < 4:
+        t = (q - axis[left]) / (axis[left + 1] - axis[left])
+        return np.stack([left, left + 1], axis=1), np.stack([1 - t, t], axis=1)
+
+    nodes = np.clip(left - 1, 0, n - 4)[:, None] + np.arange(4)
+    x = axis[nodes]
+    weights = np.ones((len(q), 4))
+    for a in range(4):
+        for b in range(4):
+            if a != b:
+                weights[:, a] *= (q - x[:, b]) / (x[:, a] - x[:, b])
+    return nodes, weights
+
+def _write_header(path, meta, offset=None):
+    """
+    Write the prefix and JSON header; returns the data offset. With offset
+    given the header is rewritten in place (it must still fit).
+    """
+    header = json.dumps(meta).encode()
+    if offset is None:
+        # Leave room for the error estimates added after the build
+        offset = -(-(_PREFIX.size + len(header) + 2048) // _ALIGN) * _ALIGN
+        mode = 'wb'
+    elif _PREFIX.size + len(header) > offset:
+        raise ValueError("Header does not fit the space reserved for it")
+    else:
+        mode = 'r+b'
+    with open(path, mode) as f:
+        f.write(_PREFIX.pack(_MAGIC, offset, len(header)))
+        f.write(header.ljust(offset - _PREFIX.size, b' '))
+        f.flush()
+        os.fsync(f.fileno())
+    return offset
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        magic, offset, length = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a price grid file")
+        return json.loads(f.read(length)), offset
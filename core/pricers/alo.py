@@ -0,0 +1,321 @@
+from functools import lru_cache
+import numpy as np
+from scipy.special import ndtr
+from core.option import Option, OptionBatch
+from core.pricers.closed_form import finite_difference_greeks, normal_pdf
+from core.result import PricingResult
+from core.profiling import count, instrumented
+from utils.validators import black_scholes_price_batch
+
+# Largest relative boundary change in the last fixed-point iteration accepted as settled
+UNSETTLED_CHANGE = 1e-6
+
+class ExerciseBoundary:
+    """
+    Early-exercise boundary of American puts with maturity T, rate r and
+    volatility sigma, from the Andersen-Lake-Offengeld integral equation.
+
+    The boundary scales with the strike, B(tau; K) = K * b(tau), so one solve
+    prices every strike and spot sharing (T, r, sigma). b is stored as the
+    Chebyshev interpolant of H = ln(b)² in sqrt(tau), which is smooth even
+    where b itself has the square-root behaviour near expiry.
+
+    Attributes:
+        T (float): Maturity the boundary was solved to
+        r (float): Risk-free rate
+        sigma (float): Volatility
+        coefficients (np.ndarray): Chebyshev coefficients of H on sqrt(tau) in [0, sqrt(T)]
+        n_pricing (int): Gauss-Legendre nodes of the early-exercise premium integral
+    """
+
+    def __init__(self, T, r, sigma, coefficients, n_pricing=32):
+        self.T, self.r, self.sigma = float(T), float(r), float(sigma)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.n_pricing = n_pricing
+
+    def __call__(self, tau, K=1.0):
+        """Exercise price at time to maturity tau (0 <= tau <= T) for strike K."""
+        tau = np.asarray(tau, dtype=float)
+        return K * _boundary(self.coefficients, np.sqrt(self.T), tau)
+
+    def _values(self, S, K):
+        S, K = np.broadcast_arrays(np.asarray(S, dtype=float), np.asarray(K, dtype=float))
+        n = S.size
+        values = _put_values(S.ravel(), K.ravel(), np.full(n, self.T), np.full(n, self.r), np.full(n, self.sigma),
+                             np.broadcast_to(self.coefficients, (n, len(self.coefficients))), self.n_pricing)
+        return [v.reshape(S.shape) for v in values]
+
+    def price(self, S, K):
+        """American put value at spot(s) S and strike(s) K."""
+        return self._values(S, K)[0]
+
+    def delta(self, S, K):
+        """∂V/∂S at spot(s) S and strike(s) K."""
+        return self._values(S, K)[1]
+
+    def gamma(self, S, K):
+        """∂²V/∂S² at spot(s) S and strike(s) K."""
+        return self._values(S, K)[2]
+
+    def theta(self, S, K):
+        """∂V/∂t at spot(s) S and strike(s) K."""
+        return self._values(S, K)[3]
+
+    def __repr__(self):
+        return (f"ExerciseBoundary(T={self.T:g}, r={self.r:g}, sigma={self.sigma:g}, "
+                f"{len(self.coefficients)} Chebyshev nodes, B(T)/K={float(self(self.T)):.6f})")
+
+def exercise_boundary(T, r, sigma, n_nodes=16, n_quadrature=24, n_iterations=10, n_pricing=32):
+    """
+    Solve the early-exercise boundary of American puts with maturity T.
+
+    Parameters:
+        T (float): Time to maturity.
+        r (float): Risk-free rate, > 0 (otherwise early exercise is never optimal).
+        sigma (float): Volatility.
+        n_nodes (int): Chebyshev collocation intervals.
+        n_quadrature (int): Gauss-Legendre nodes of the boundary integrals.
+        n_iterations (int): Fixed-point iterations.
+        n_pricing (int): Gauss-Legendre nodes of the premium integral used for pricing.
+
+    Returns:
+        ExerciseBoundary: Boundary reusable for any strike and spot
+    """
+    if r <= 0:
+        raise ValueError("American puts with r <= 0 are never exercised early; there is no boundary to solve.")
+    coefficients = _boundary_coefficients(np.array([T], dtype=float), np.array([r], dtype=float),
+                                          np.array([sigma], dtype=float), n_nodes, n_quadrature, n_iterations)
+    return ExerciseBoundary(T, r, sigma, coefficients[0], n_pricing)
+
+def price_american_alo(option: Option, steps=None, greeks: bool = False, n_nodes=16, n_quadrature=24, n_iterations=10,
+                       n_pricing=32):
+    """
+    Price an American option with the Andersen-Lake-Offengeld integral-equation method.
+
+    Thin wrapper around price_american_alo_batch for a single contract.
+
+    Parameters:
+        option (Option): Option instance.
+        steps: Ignored; the accuracy is set by n_nodes, n_quadrature, n_iterations and n_pricing.
+        greeks (bool): If True, also return the Greeks.
+        n_nodes, n_quadrature, n_iterations, n_pricing: See exercise_boundary.
+
+    Returns:
+        float: American option price, or a PricingResult if greeks is True
+    """
+    batch = OptionBatch.from_options([option])
+    return price_american_alo_batch(batch, greeks=greeks, n_nodes=n_nodes, n_quadrature=n_quadrature,
+                                    n_iterations=n_iterations, n_pricing=n_pricing)[0]
+
+@instrumented
+def price_american_alo_batch(batch: OptionBatch, steps=None, greeks: bool = False, n_nodes=16, n_quadrature=24,
+                             n_iterations=10, n_pricing=32):
+    """
+    Price a batch of options with the Andersen-Lake-Offengeld method.
+
+    The put exercise boundary B solves the fixed-point equation
+    B(tau) = K exp(-r tau) N(tau, B) / D(tau, B), obtained from the
+    smooth-pasting condition of the early-exercise premium representation
+    (or from value matching where r is tiny, where that form is better
+    conditioned). B is collocated at Chebyshev nodes in sqrt(tau), the
+    integrals over the boundary history are Gauss-Legendre sums, and the
+    price is black_scholes_price plus the integrated early-exercise premium.
+    Contracts sharing (T, r, sigma) share one boundary, and the boundaries
+    of all groups are solved together.
+
+    The underlying pays no dividends, so American calls get the
+    Black-Scholes price, as do European contracts and puts with r <= 0.
+
+    With greeks=True delta and gamma are differentiated analytically under
+    the premium integral and theta follows from the Black-Scholes PDE; vega
+    and rho are central differences.
+
+    steps is accepted and ignored so the pricer has the (batch, steps,
+    greeks) call of the tree and FD pricers and plugs into
+    compute_all_greeks_batch, sweep and implied_vol unchanged.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        steps: Ignored; the accuracy is set by n_nodes, n_quadrature, n_iterations and n_pricing.
+        greeks (bool): If True, return a PricingResult with all five Greeks.
+        n_nodes, n_quadrature, n_iterations, n_pricing: See exercise_boundary.
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    price = black_scholes_price_batch(batch)
+    delta = gamma = theta = None
+    if greeks:
+        S, K, T, r, sigma = batch.S, batch.K, batch.T, batch.r, batch.sigma
+        vol = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / vol
+        delta = np.where(batch.is_call, ndtr(d1), ndtr(d1) - 1)
+        gamma = normal_pdf(d1) / (S * vol)
+        theta = r * price - r * S * delta - 0.5 * sigma**2 * S**2 * gamma
+
+    puts = np.flatnonzero(batch.is_american & ~batch.is_call & (batch.r > 0))
+    if len(puts):
+        # One boundary per distinct (T, r, sigma)
+        keys = np.stack([batch.T[puts], batch.r[puts], batch.sigma[puts]], axis=1)
+        unique, group = np.unique(keys, axis=0, return_inverse=True)
+        coefficients = _boundary_coefficients(unique[:, 0], unique[:, 1], unique[:, 2],
+                                              n_nodes, n_quadrature, n_iterations)
+        values = _put_values(batch.S[puts], batch.K[puts], batch.T[puts], batch.r[puts], batch.sigma[puts],
+                             coefficients[group.ravel()], n_pricing, european=price[puts])
+        price[puts] = values[0]
+        if greeks:
+            delta[puts], gamma[puts], theta[puts] = values[1:]
+
+    if not greeks:
+        return price
+    result = PricingResult(price=price, delta=delta, gamma=gamma, theta=theta)
+    pricer = lambda b: price_american_alo_batch(b, n_nodes=n_nodes, n_quadrature=n_quadrature,
+                                                n_iterations=n_iterations, n_pricing=n_pricing)
+    return finite_difference_greeks(pricer, batch, result)
+
+@lru_cache(maxsize=None)
+def _gauss_legendre(n):
+    """Gauss-Legendre nodes and weights on [-1, 1] (cached: leggauss costs about a millisecond)."""
+    return np.polynomial.legendre.leggauss(n)
+
+@lru_cache(maxsize=None)
+def _chebyshev_nodes(n_nodes):
+    """Chebyshev extrema z_i = cos(i pi / n) and the matrix mapping values there to coefficients."""
+    i = np.arange(n_nodes + 1)
+    z = np.cos(np.pi * i / n_nodes)
+    weights = np.where((i == 0) | (i == n_nodes), 0.5, 1.0)
+    to_coefficients = 2.0 / n_nodes * weights * np.cos(np.pi * np.outer(i, i) / n_nodes)
+    to_coefficients[[0, n_nodes]] *= 0.5
+    return z, to_coefficients
+
+def _boundary(coefficients, sqrt_T, tau):
+    """
+    Normalized boundary b(tau) = B(tau) / K from Chebyshev coefficients; the
+    coefficients (..., n_nodes + 1) broadcast against tau.shape + (n_nodes + 1,).
+    """
+    z = 2 * np.sqrt(np.maximum(tau, 0.0)) / sqrt_T - 1
+    H = (_chebyshev_basis(z, coefficients.shape[-1]) * coefficients).sum(axis=-1)
+    return _from_H(H)
+
+def _chebyshev_basis(z, n_coefficients):
+    """Chebyshev polynomials T_0..T_{n-1} at z, shape z.shape + (n,)."""
+    return np.cos(np.arange(n_coefficients) * np.arccos(np.clip(z, -1.0, 1.0))[..., None])
+
+def _from_H(H):
+    """Normalized boundary b = exp(-sqrt(H)) (the put boundary lies below the strike)."""
+    return np.exp(-np.sqrt(np.maximum(H, 0.0)))
+
+@instrumented(name='alo.boundary')
+def _boundary_coefficients(T, r, sigma, n_nodes, n_quadrature, n_iterations):
+    """
+    Normalized put boundaries of g groups, as the Chebyshev coefficients of
+    H = ln(b)², shape (g, n_nodes + 1).
+
+    The smooth-pasting equation (B) converges fastest, but oscillates for
+    long maturities with large r / sigma²; groups where it has not settled
+    after n_iterations are re-solved with the value-matching equation (A),
+    which is also used throughout for tiny r.
+    """
+    count('alo.boundaries', len(T))
+    value_matching = r < 1e-3
+    b, change = _iterate_boundary(T, r, sigma, value_matching, n_nodes, n_quadrature, n_iterations)
+    unstable = ~value_matching & (change > UNSETTLED_CHANGE)
+    if unstable.any():
+        count('alo.fallback_boundaries', int(unstable.sum()))
+        b[unstable], _ = _iterate_boundary(T[unstable], r[unstable], sigma[unstable], np.ones(unstable.sum(), dtype=bool),
+                                           n_nodes, n_quadrature, n_iterations)
+    _, to_coefficients = _chebyshev_nodes(n_nodes)
+    return _nodal_H(b) @ to_coefficients.T
+
+def _nodal_H(b):
+    """H = ln(b)² at the collocation nodes, with H = 0 appended for the node at tau = 0."""
+    return np.concatenate([np.log(b)**2, np.zeros((len(b), 1))], axis=1)
+
+def _iterate_boundary(T, r, sigma, value_matching, n_nodes, n_quadrature, n_iterations):
+    """
+    Fixed-point iteration b = exp(-r tau) N / D at the collocation nodes of g groups.
+
+    Returns the normalized boundary at the nodes, shape (g, n_nodes), and the
+    largest relative change of the last iteration per group.
+    """
+    z, to_coefficients = _chebyshev_nodes(n_nodes)
+    y, w = _gauss_legendre(n_quadrature)
+    sqrt_T = np.sqrt(T)[:, None]
+    r_, sigma_ = r[:, None], sigma[:, None]
+    # Collocation times (the last node, tau = 0, has b = 1 and H = 0)
+    tau = (sqrt_T * (1 + z[:-1]) / 2)**2
+    # u = tau sin²(angle): the boundary is smooth in sqrt(u) = sqrt(tau) sin(angle), and
+    # du = tau sin(2 angle) d(angle) cancels the 1 / sqrt(tau - u) of the integrands
+    angle = np.pi / 4 * (1 + y)
+    u = tau[..., None] * np.sin(angle)**2
+    elapsed = tau[..., None] * np.cos(angle)**2
+    du = np.pi / 4 * w * tau[..., None] * np.sin(2 * angle)
+    # In the Chebyshev variable z = 2 sqrt(u / T) - 1 the quadrature points do not depend on T
+    basis = _chebyshev_basis((1 + z[:-1, None]) * np.sin(angle) - 1, n_nodes + 1).reshape(-1, n_nodes + 1)
+    r3, sigma3 = r_[..., None], sigma_[..., None]
+    s = sigma_ * np.sqrt(tau)
+    s_elapsed = sigma3 * np.sqrt(elapsed)
+    growth = r3 * np.exp(r3 * u) * du
+    value_matching = value_matching[:, None]
+
+    # Initial guess: the Barone-Adesi-Whaley seed of the critical price
+    M = 2 * r_ / sigma_**2
+    q_inf = (-(M - 1) - np.sqrt((M - 1)**2 + 4 * M)) / 2
+    b_inf = 1 / (1 - 1 / q_inf)
+    b = b_inf + (1 - b_inf) * np.exp((r_ * tau - 2 * s) / (1 - b_inf))
+
+    change = np.zeros(len(T))
+    for _ in range(n_iterations):
+        coefficients = _nodal_H(b) @ to_coefficients.T
+        b_u = _from_H(coefficients @ basis.T).reshape(u.shape)
+        log_b = np.log(b)
+        d_minus = (log_b + (r_ - 0.5 * sigma_**2) * tau) / s
+        d_plus = d_minus + s
+        d_minus_u = (log_b[..., None] - np.log(b_u) + (r3 - 0.5 * sigma3**2) * elapsed) / s_elapsed
+        if value_matching.all():
+            ratio = (ndtr(d_minus) + (growth * ndtr(d_minus_u)).sum(axis=-1)) / ndtr(d_plus)
+        else:
+            N = normal_pdf(d_minus) / s + (growth * normal_pdf(d_minus_u) / s_elapsed).sum(axis=-1)
+            ratio = N / (normal_pdf(d_plus) / s + ndtr(d_plus))
+            if value_matching.any():
+                N = ndtr(d_minus) + (growth * ndtr(d_minus_u)).sum(axis=-1)
+                ratio = np.where(value_matching, N / ndtr(d_plus), ratio)
+        updated = np.clip(np.exp(-r_ * tau) * ratio, 1e-12, 1.0)
+        change = np.abs(updated / b - 1).max(axis=1)
+        b = updated
+    return b, change
+
+def _put_values(S, K, T, r, sigma, coefficients, n_pricing, european=None):
+    """
+    American put price, delta, gamma and theta of n contracts, each with its
+    own boundary coefficients (n, n_nodes + 1): the European put plus the
+    early-exercise premium integral of r K exp(-r (T - u)) N(-d_minus) over the boundary.
+    """
+    if european is None:
+        european = black_scholes_price_batch(OptionBatch(S, K, T, r, sigma, 'put', 'european'))
+    vol = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / vol
+    delta = ndtr(d1) - 1
+    gamma = normal_pdf(d1) / (S * vol)
+
+    # Same substitution as the boundary integrals, u = T sin²(angle)
+    y, w = _gauss_legendre(n_pricing)
+    angle = np.pi / 4 * (1 + y)
+    remaining = T[:, None] * np.cos(angle)**2
+    b_u = _from_H(coefficients @ _chebyshev_basis(2 * np.sin(angle) - 1, coefficients.shape[1]).T)
+    s = sigma[:, None] * np.sqrt(remaining)
+    d_minus = (np.log(S[:, None] / (K[:, None] * b_u)) + (r[:, None] - 0.5 * sigma[:, None]**2) * remaining) / s
+    weight = r[:, None] * K[:, None] * np.exp(-r[:, None] * remaining) * np.pi / 4 * w * T[:, None] * np.sin(2 * angle)
+    density = normal_pdf(d_minus)
+    price = european + (weight * ndtr(-d_minus)).sum(axis=1)
+    delta = delta - (weight * density / (S[:, None] * s)).sum(axis=1)
+    gamma = gamma + (weight * density * (d_minus + s) / (S[:, None] * s)**2).sum(axis=1)
+    theta = r * price - r * S * delta - 0.5 * sigma**2 * S**2 * gamma
+
+    # At or below the boundary the put is exercised
+    exercised = S <= K * _from_H(coefficients.sum(axis=1))
+    price = np.where(exercised, K - S, price)
+    delta = np.where(exercised, -1.0, delta)
+    gamma = np.where(exercised, 0.0, gamma)
+    theta = np.where(exercised, 0.0, theta)
+    return price, delta, gamma, theta
@@ -0,0 +1,108 @@
+import numpy as np
+from scipy.special import ndtr
+from core.option import Option, OptionBatch
+from core.pricers.closed_form import finite_difference_greeks, normal_pdf
+from core.result import PricingResult
+from core.profiling import instrumented
+from utils.validators import black_scholes_price_batch
+
+def price_american_baw(option: Option, steps=None, greeks: bool = False):
+    """
+    Price an American option with the Barone-Adesi-Whaley (1987) quadratic approximation.
+
+    Thin wrapper around price_american_baw_batch for a single contract.
+
+    Parameters:
+        option (Option): Option instance.
+        steps: Ignored; the formula has no discretization.
+        greeks (bool): If True, also return the Greeks.
+
+    Returns:
+        float: Approximate American option price, or a PricingResult if greeks is True
+    """
+    return price_american_baw_batch(OptionBatch.from_options([option]), greeks=greeks)[0]
+
+@instrumented
+def price_american_baw_batch(batch: OptionBatch, steps=None, greeks: bool = False):
+    """
+    Price a batch of options with the Barone-Adesi-Whaley quadratic approximation.
+
+    The early exercise premium is approximated by a solution of the
+    quadratic version of the Black-Scholes PDE. The critical price S* where
+    exercise becomes optimal is found by a vectorized Newton iteration, after
+    which every price is closed form, so whole chains are priced in
+    microseconds per contract. The underlying pays no dividends, so American
+    calls are never exercised early and get the Black-Scholes price;
+    European contracts get the Black-Scholes price too.
+
+    With greeks=True, delta and gamma are analytic (S* does not depend on
+    the spot); theta, vega and rho are central differences of the formula.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        steps: Ignored; the formula has no discretization.
+        greeks (bool): If True, return a PricingResult with all five Greeks.
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    price, delta, gamma = _baw(batch, with_derivatives=greeks)
+    if not greeks:
+        return price
+    result = PricingResult(price=price, delta=delta, gamma=gamma)
+    return finite_difference_greeks(price_american_baw_batch, batch, result)
+
+def _baw(batch, with_derivatives=False, tol=1e-8, max_iter=100):
+    """BAW prices and, if requested, analytic spot delta and gamma."""
+    S, K, T, r, sigma = batch.S, batch.K, batch.T, batch.r, batch.sigma
+    price = black_scholes_price_batch(batch)
+    delta = gamma = None
+    if with_derivatives:
+        vol = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / vol
+        delta = np.where(batch.is_call, ndtr(d1), ndtr(d1) - 1)
+        gamma = normal_pdf(d1) / (S * vol)
+
+    # Only American puts carry an early exercise premium (no dividends)
+    puts = np.flatnonzero(batch.is_american & ~batch.is_call & (r > 0))
+    if len(puts) == 0:
+        return price, delta, gamma
+
+    S, K, T, r, sigma = S[puts], K[puts], T[puts], r[puts], sigma[puts]
+    vol = sigma * np.sqrt(T)
+    M = 2 * r / sigma**2
+    # With cost of carry b = r, the BAW exponent N - 1 = 2b / sigma² - 1 equals M - 1
+    k = 1 - np.exp(-r * T)
+    q1 = (-(M - 1) - np.sqrt((M - 1)**2 + 4 * M / k)) / 2
+
+    def european_put(spot):
+        d1 = (np.log(spot / K) + (r + 0.5 * sigma**2) * T) / vol
+        return K * np.exp(-r * T) * ndtr(-(d1 - vol)) - spot * ndtr(-d1), d1
+
+    # Seed of the critical price (Barone-Adesi and Whaley, 1987)
+    q1_inf = (-(M - 1) - np.sqrt((M - 1)**2 + 4 * M)) / 2
+    S_inf = K / (1 - 1 / q1_inf)
+    h = (r * T - 2 * vol) * K / (K - S_inf)
+    critical = S_inf + (K - S_inf) * np.exp(h)
+
+    # Newton iteration on K - S* = p(S*) - (1 - N(-d1(S*))) S* / q1
+    active = np.ones(len(puts), dtype=bool)
+    for _ in range(max_iter):
+        p, d1 = european_put(critical)
+        rhs = p - (1 - ndtr(-d1)) * critical / q1
+        active = np.abs(K - critical - rhs) / K > tol
+        if not active.any():
+            break
+        slope = -ndtr(-d1) * (1 - 1 / q1) - (1 + normal_pdf(d1) / vol) / q1
+        critical = np.where(active, (K - rhs + slope * critical) / (1 + slope), critical)
+
+    _, d1_critical = european_put(critical)
+    A = -(critical / q1) * (1 - ndtr(-d1_critical))
+    european, _ = european_put(S)
+    ratio = (S / critical)**q1
+    exercised = S <= critical
+    price[puts] = np.where(exercised, K - S, european + A * ratio)
+    if with_derivatives:
+        delta[puts] = np.where(exercised, -1.0, delta[puts] + A * q1 * ratio / S)
+        gamma[puts] = np.where(exercised, 0.0, gamma[puts] + A * q1 * (q1 - 1) * ratio / S**2)
+    return price, delta, gamma
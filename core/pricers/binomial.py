@@ -1,35 +1,235 @@
+from dataclasses import fields
 import numpy as np
-from core.option import Option
+from scipy.stats import norm
+from core.option import Option, OptionBatch
+from core.result import PricingResult
+from core.profiling import count, instrumented
 
-def price_american_binomial(option: Option, steps: int = 100) -> float:
-    # Extracting parameters from the option
-    S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
-    is_call = option.option_type == 'call'
+# Lattice variants: Cox-Ross-Rubinstein, Leisen-Reimer, binomial Black-Scholes
+TREES = ('crr', 'leisen_reimer', 'bbs')
+
+def price_american_binomial(option: Option, steps: int = 100, greeks: bool = False, tree: str = 'crr',
+                            richardson: bool = False):
+    """
+    Price an American option on a binomial tree.
+
+    Thin wrapper around price_american_binomial_batch for a single contract.
+
+    Parameters:
+        option (Option): Option instance.
+        steps (int): Number of time steps in the tree.
+        greeks (bool): If True, also read delta, gamma and theta off the tree.
+        tree (str): 'crr', 'leisen_reimer' or 'bbs', see price_american_binomial_batch.
+        richardson (bool): If True, extrapolate from trees with steps and steps // 2.
+
+    Returns:
+        float: American option price, or a PricingResult if greeks is True
+    """
+    return price_american_binomial_batch(OptionBatch.from_options([option]), steps, greeks, tree, richardson)[0]
+
+@instrumented
+def price_american_binomial_batch(batch: OptionBatch, steps: int = 100, greeks: bool = False, tree: str = 'crr',
+                                  richardson: bool = False):
+    """
+    Price a batch of options on binomial trees.
+
+    All contracts are rolled back together on a 2-D (nodes x contracts)
+    lattice, so every time slice is a contiguous block of rows. Backward
+    induction runs one slice at a time over a single rolling value array,
+    in place, so memory is O(contracts * steps).
+
+    Tree variants:
+    - 'crr': Cox-Ross-Rubinstein, u = exp(sigma sqrt(dt)). Converges at
+      O(1/steps) but oscillates between odd and even step counts.
+    - 'leisen_reimer': Leisen-Reimer, with the probabilities taken from the
+      Peizer-Pratt inversion of d1 and d2, so the tree is centred on the
+      strike. European prices converge at O(1/steps^2) and American prices
+      at a smooth, monotone O(1/steps). Needs an odd number of steps:
+      even counts are rounded up.
+    - 'bbs': binomial Black-Scholes (Broadie-Detemple), a CRR tree whose
+      last step is replaced by the Black-Scholes value over dt (floored by
+      the exercise value for American contracts), which removes the
+      payoff-kink oscillation.
+
+    With richardson=True (smooth trees only) the batch is also priced with
+    steps // 2 and the two prices are extrapolated (Broadie-Detemple's BBSR
+    for 'bbs'), which cancels the leading error term. With greeks=True the
+    PricingResult also carries an error_estimate of the size of that
+    correction.
+
+    With greeks=True, delta and gamma are taken from the option values at
+    steps 1 and 2 and theta from the middle node of step 2, so they come
+    out of the same solve as the price (requires steps >= 2, 3 for 'bbs').
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        steps (int): Number of time steps in every tree.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        tree (str): 'crr', 'leisen_reimer' or 'bbs'.
+        richardson (bool): If True, extrapolate from trees with steps and steps // 2.
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    if tree not in TREES:
+        raise ValueError(f"tree must be one of {TREES}")
+    minimum = 3 if tree == 'bbs' else 2
+    if greeks and steps < minimum:
+        raise ValueError(f"Tree Greeks need at least {minimum} steps for tree='{tree}'")
+    if not richardson:
+        return _price_tree(batch, steps, greeks, tree)
+    if tree == 'crr':
+        raise ValueError("richardson needs a smoothly converging tree: use tree='leisen_reimer' or 'bbs'")
+
+    if steps // 2 < (minimum if greeks else 1):
+        raise ValueError(f"richardson needs steps // 2 >= {minimum if greeks else 1}")
+    fine_steps, coarse_steps = _odd(steps, tree), _odd(steps // 2, tree)
+    fine, coarse = (_price_tree(batch, n, greeks, tree) for n in (fine_steps, coarse_steps))
+    if not greeks:
+        fine, coarse = PricingResult(price=fine), PricingResult(price=coarse)
+    # Leading error order: O(1/steps^2) for European contracts on Leisen-Reimer
+    # trees, O(1/steps) for American contracts and on the smoothed CRR tree
+    order = np.where(batch.is_american | (tree == 'bbs'), 1, 2)
+    result = _extrapolate(coarse, fine, (fine_steps / coarse_steps) ** order)
+    return result if greeks else result.price
+
+def _odd(steps, tree):
+    """Leisen-Reimer trees need an odd number of steps; round even counts up."""
+    return steps + 1 if tree == 'leisen_reimer' and steps % 2 == 0 else steps
+
+def _price_tree(batch, steps, greeks, tree):
+    # Extracting parameters, one entry per contract (they broadcast over nodes)
+    S, K, T, r, sigma = batch.S, batch.K, batch.T, batch.r, batch.sigma
+    steps = _odd(steps, tree)
 
     # Time step and binomial tree parameters
     dt = T / steps
+    growth = np.exp(r * dt)
     u = np.exp(sigma * np.sqrt(dt))  # Up factor
     d = 1 / u  # Down factor
-    p = (np.exp(r * dt) - d) / (u - d)  # Risk-neutral probability
+    p = (growth - d) / (u - d)  # Risk-neutral probability
+    if tree == 'leisen_reimer':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol = sigma * np.sqrt(T)
+            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol
+            lr_p = _peizer_pratt(d1 - vol, steps)
+            lr_u = growth * _peizer_pratt(d1, steps) / lr_p
+            lr_d = (growth - lr_p * lr_u) / (1 - lr_p)
+        # Degenerate moneyness (S = 0) pins the probabilities at 0 or 1; keep CRR there
+        valid = np.isfinite(d1) & (lr_p > 0) & (lr_p < 1)
+        u, d, p = np.where(valid, lr_u, u), np.where(valid, lr_d, d), np.where(valid, lr_p, p)
 
-    # Initialize asset price tree and option value tree
-    asset_prices = np.zeros((steps + 1, steps + 1))  # Asset prices at each node
-    option_values = np.zeros((steps + 1, steps + 1))  # Option values at each node
+    # Discounted transition probabilities, computed once for the whole tree
+    discount = 1 / growth
+    if tree != 'bbs':
+        j = np.arange(steps + 1)[:, None]
+        return roll_back(S, K, batch.is_call, batch.is_american, u, d, discount * p, discount * (1 - p),
+                         u ** j * d ** (steps - j), dt, greeks)
 
-    # Calculate asset prices at maturity (leaf nodes)
-    for j in range(steps + 1):
-        asset_prices[j, steps] = S * (u ** j) * (d ** (steps - j))
-        option_values[j, steps] = max(asset_prices[j, steps] - K, 0) if is_call else max(K - asset_prices[j, steps], 0)
+    # Binomial Black-Scholes: the tree stops one step early, where every
+    # node takes the Black-Scholes value over the last step
+    j = np.arange(steps)[:, None]
+    powers = u ** (2 * j - (steps - 1))
+    sign = np.where(batch.is_call, 1.0, -1.0)
+    prices = S * powers
+    with np.errstate(divide='ignore'):
+        # At S = 0 every node is 0: d1 = -inf and the value is the discounted put payoff
+        d1 = (np.log(prices / K) + (r + 0.5 * sigma ** 2) * dt) / (sigma * np.sqrt(dt))
+    d2 = d1 - sigma * np.sqrt(dt)
+    european = sign * (prices * norm.cdf(sign * d1) - K * discount * norm.cdf(sign * d2))
+    exercise = np.where(batch.is_american, sign * (prices - K), -np.inf)
+    return roll_back(S, K, batch.is_call, batch.is_american, u, d, discount * p, discount * (1 - p),
+                     powers, dt, greeks, terminal=np.maximum(european, exercise))
 
-    # Backward induction: Calculate option values at each node
+def _peizer_pratt(z, steps):
+    """Peizer-Pratt method 2 inversion: the binomial probability matching N(z) on a tree of odd steps."""
+    ratio = z / (steps + 1 / 3)
+    return 0.5 + np.sign(z) * np.sqrt(0.25 - 0.25 * np.exp(-ratio ** 2 * (steps + 1 / 6)))
+
+def _extrapolate(coarse, fine, ratio):
+    """
+    Two-point Richardson extrapolation of tree results whose error scales
+    as (1 / steps)^p, where ratio = (fine steps / coarse steps)^p.
+    """
+    extrapolated, errors = {}, {}
+    for field in fields(PricingResult):
+        name = field.name
+        if name in ('std_error', 'error_estimate') or getattr(fine, name) is None:
+            continue
+        correction = (getattr(fine, name) - getattr(coarse, name)) / (ratio - 1)
+        extrapolated[name] = getattr(fine, name) + correction
+        errors[name] = np.abs(correction)
+    return PricingResult(**extrapolated, error_estimate=PricingResult(**errors))
+
+@instrumented(name='binomial.backward_induction')
+def roll_back(S, K, is_call, is_american, u, d, p_up, p_down, powers, dt, greeks=False, terminal=None):
+    """
+    Backward induction of a stack of binomial trees, one column per contract.
+
+    The tree constants either hold one entry per contract or are scalars
+    shared by all contracts (see plans.BinomialPlan).
+
+    Parameters:
+        S, K (np.ndarray): Spot and strike per contract, shape (n,).
+        is_call, is_american (np.ndarray): Boolean masks, shape (n,).
+        u, d (float or np.ndarray): Up and down factors.
+        p_up, p_down (float or np.ndarray): Discounted transition probabilities.
+        powers (np.ndarray): u**j * d**(steps - j) for the terminal nodes j, shape (steps + 1, n) or (steps + 1, 1).
+        dt (float or np.ndarray): Time step.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        terminal (np.ndarray): Option values at the terminal nodes (default: the payoff).
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    steps = len(powers) - 1
+    count('binomial.nodes', len(S) * (steps + 1) * (steps + 2) // 2)
+    sign = np.where(is_call, 1.0, -1.0)
+    # European contracts never exercise early: their exercise value is -inf
+    exercise_floor = np.where(is_american, 0.0, -np.inf)
+
+    # Asset prices and option values at maturity (j = number of up moves).
+    # The exercise value sign * (price - K) + floor is kept as
+    # signed_prices - strike_term, so each slice costs one subtraction.
+    signed_prices = sign * S * powers
+    strike_term = sign * K - exercise_floor
+    if terminal is None:
+        option_values = np.maximum(signed_prices - sign * K, 0)
+    else:
+        option_values = np.array(np.broadcast_to(terminal, signed_prices.shape), dtype=float)
+    scratch = np.empty_like(option_values)
+
+    # With only 2 steps, the step-2 values are the terminal ones
+    early_values = {steps: option_values.copy()} if greeks and steps == 2 else {}
+
+    # Backward induction: slice i only uses the first i + 1 rows.
+    # Node j at step i has price S * u**j * d**(i - j) = (node j + 1 at step i + 1) / u.
+    back = 1 / u
     for i in range(steps - 1, -1, -1):
-        for j in range(i + 1):
-            # Calculate the asset price at each node
-            asset_prices[j, i] = S * (u ** j) * (d ** (i - j))
-            
-            # Option value is the maximum of holding or exercising early
-            holding_value = np.exp(-r * dt) * (p * option_values[j + 1, i + 1] + (1 - p) * option_values[j, i + 1])
-            early_exercise_value = max(asset_prices[j, i] - K, 0) if is_call else max(K - asset_prices[j, i], 0)
-            option_values[j, i] = max(holding_value, early_exercise_value)
-
-    return option_values[0, 0]
+        values, held = option_values[:i + 1], scratch[:i + 1]
+        np.multiply(option_values[1:i + 2], p_up, out=held)
+        values *= p_down
+        values += held
+
+        prices = signed_prices[:i + 1]
+        np.multiply(signed_prices[1:i + 2], back, out=prices)
+
+        # Option value is the maximum of holding or exercising early
+        np.subtract(prices, strike_term, out=held)
+        np.maximum(values, held, out=values)
+
+        if greeks and i in (1, 2):
+            early_values[i] = values.copy()
+
+    if not greeks:
+        return option_values[0].copy()
+
+    # Nodes of steps 1 and 2 sit at S*d, S*u and S*d², S*u*d, S*u² (u*d = 1 on CRR trees)
+    V1, V2 = early_values[1], early_values[2]
+    delta = (V1[1] - V1[0]) / (S * u - S * d)
+    delta_up = (V2[2] - V2[1]) / (S * u**2 - S * u * d)
+    delta_down = (V2[1] - V2[0]) / (S * u * d - S * d**2)
+    gamma = (delta_up - delta_down) / (0.5 * (S * u**2 - S * d**2))
+    # Theta compares values at the same spot: move the middle node from S*u*d to S along delta
+    theta = (V2[1] + 0.5 * (delta_up + delta_down) * (S - S * u * d) - option_values[0]) / (2 * dt)
+    return PricingResult(price=option_values[0].copy(), delta=delta, gamma=gamma, theta=theta)
@@ -0,0 +1,113 @@
+import numpy as np
+from scipy.special import ndtr
+from core.option import Option, OptionBatch
+from core.pricers.closed_form import bivariate_normal_cdf, finite_difference_greeks
+from core.result import PricingResult
+from core.profiling import instrumented
+from utils.validators import black_scholes_price_batch
+
+def price_american_bjerksund_stensland(option: Option, steps=None, greeks: bool = False):
+    """
+    Price an American option with the Bjerksund-Stensland (2002) approximation.
+
+    Thin wrapper around price_american_bjerksund_stensland_batch for a single contract.
+
+    Parameters:
+        option (Option): Option instance.
+        steps: Ignored; the formula has no discretization.
+        greeks (bool): If True, also return the Greeks.
+
+    Returns:
+        float: Approximate American option price, or a PricingResult if greeks is True
+    """
+    return price_american_bjerksund_stensland_batch(OptionBatch.from_options([option]), greeks=greeks)[0]
+
+@instrumented
+def price_american_bjerksund_stensland_batch(batch: OptionBatch, steps=None, greeks: bool = False):
+    """
+    Price a batch of options with the Bjerksund-Stensland (2002) approximation.
+
+    The exercise boundary is approximated by two flat pieces, before and
+    after t1 = (sqrt(5) - 1) / 2 * T, which gives a closed form with
+    univariate and bivariate normal terms and no iteration at all. American
+    puts are priced through the put-call transformation
+    P(S, K, T, r, b) = C(K, S, T, r - b, -b). The underlying pays no
+    dividends, so American calls get the Black-Scholes price, as do
+    European contracts. Where the flat boundary is a poor exercise strategy
+    (long-dated contracts with b close to zero) the formula can fall below
+    the European value, so prices are floored at it.
+
+    With greeks=True all five Greeks are central differences of the formula.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        steps: Ignored; the formula has no discretization.
+        greeks (bool): If True, return a PricingResult with all five Greeks.
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    price = black_scholes_price_batch(batch)
+    # Only American puts carry an early exercise premium (no dividends, r > 0)
+    puts = batch.is_american & ~batch.is_call & (batch.r > 0)
+    if puts.any():
+        S, K, T, r, sigma = (x[puts] for x in (batch.S, batch.K, batch.T, batch.r, batch.sigma))
+        # Cost of carry b = r; the transformed call has rate r - b = 0 and carry -b = -r
+        price[puts] = _call(K, S, T, np.zeros_like(r), -r, sigma)
+    if not greeks:
+        return price
+    return finite_difference_greeks(price_american_bjerksund_stensland_batch, batch, PricingResult(price=price))
+
+def _call(S, K, T, r, b, sigma):
+    """Bjerksund-Stensland (2002) American call with rate r and cost of carry b < r."""
+    variance = sigma**2
+    vol = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (b + 0.5 * variance) * T) / vol
+    european = S * np.exp((b - r) * T) * ndtr(d1) - K * np.exp(-r * T) * ndtr(d1 - vol)
+    t1 = 0.5 * (np.sqrt(5) - 1) * T
+
+    beta = (0.5 - b / variance) + np.sqrt((b / variance - 0.5)**2 + 2 * r / variance)
+    B_inf = beta / (beta - 1) * K
+    B_0 = np.maximum(K, r / (r - b) * K)
+    spread = B_inf - B_0
+    h1 = -(b * t1 + 2 * sigma * np.sqrt(t1)) * K**2 / (spread * B_0)
+    h2 = -(b * T + 2 * sigma * np.sqrt(T)) * K**2 / (spread * B_0)
+    I1 = B_0 + spread * (1 - np.exp(h1))
+    I2 = B_0 + spread * (1 - np.exp(h2))
+    alpha1 = (I1 - K) * I1**-beta
+    alpha2 = (I2 - K) * I2**-beta
+
+    def phi(T, gamma, H, I):
+        lam = (-r + gamma * b + 0.5 * gamma * (gamma - 1) * variance) * T
+        vol = sigma * np.sqrt(T)
+        d = -(np.log(S / H) + (b + (gamma - 0.5) * variance) * T) / vol
+        kappa = 2 * b / variance + 2 * gamma - 1
+        return np.exp(lam) * S**gamma * (ndtr(d) - (I / S)**kappa * ndtr(d - 2 * np.log(I / S) / vol))
+
+    def psi(gamma, H):
+        drift = b + (gamma - 0.5) * variance
+        vol1 = sigma * np.sqrt(t1)
+        e1 = (np.log(S / I1) + drift * t1) / vol1
+        e2 = (np.log(I2**2 / (S * I1)) + drift * t1) / vol1
+        e3 = (np.log(S / I1) - drift * t1) / vol1
+        e4 = (np.log(I2**2 / (S * I1)) - drift * t1) / vol1
+        f1 = (np.log(S / H) + drift * T) / vol
+        f2 = (np.log(I2**2 / (S * H)) + drift * T) / vol
+        f3 = (np.log(I1**2 / (S * H)) + drift * T) / vol
+        f4 = (np.log(S * I1**2 / (H * I2**2)) + drift * T) / vol
+        rho = np.sqrt(t1 / T)
+        lam = -r + gamma * b + 0.5 * gamma * (gamma - 1) * variance
+        kappa = 2 * b / variance + 2 * gamma - 1
+        return np.exp(lam * T) * S**gamma * (
+            bivariate_normal_cdf(-e1, -f1, rho)
+            - (I2 / S)**kappa * bivariate_normal_cdf(-e2, -f2, rho)
+            - (I1 / S)**kappa * bivariate_normal_cdf(-e3, -f3, -rho)
+            + (I1 / I2)**kappa * bivariate_normal_cdf(-e4, -f4, -rho))
+
+    value = (alpha2 * S**beta - alpha2 * phi(t1, beta, I2, I2)
+             + phi(t1, 1, I2, I2) - phi(t1, 1, I1, I2)
+             - K * phi(t1, 0, I2, I2) + K * phi(t1, 0, I1, I2)
+             + alpha1 * phi(t1, beta, I1, I2) - alpha1 * psi(beta, I1)
+             + psi(1, I1) - psi(1, K) - K * psi(0, I1) + K * psi(0, K))
+    # Above the second trigger the call is exercised immediately
+    return np.where(S >= I2, S - K, np.maximum(value, european))
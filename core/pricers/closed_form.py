@@ -0,0 +1,87 @@
+import numpy as np
+from scipy.special import ndtr
+from core.option import OptionBatch
+from core.profiling import instrumented
+
+# Gauss-Legendre nodes and weights on [-1, 1] for the bivariate normal integral
+_LEGENDRE_NODES, _LEGENDRE_WEIGHTS = np.polynomial.legendre.leggauss(20)
+
+def normal_pdf(x):
+    """Standard normal density (scipy.stats.norm.pdf without its per-call overhead)."""
+    return np.exp(-0.5 * x**2) / np.sqrt(2 * np.pi)
+
+def bivariate_normal_cdf(a, b, rho):
+    """
+    Vectorized standard bivariate normal CDF M(a, b; rho) for |rho| < 1.
+
+    Uses Sheppard's formula
+    M(a, b; rho) = N(a) N(b) + 1/(2 pi) * int_0^asin(rho) exp(-(a² + b² - 2ab sin t) / (2 cos² t)) dt,
+    integrated with 20-point Gauss-Legendre quadrature, which is accurate to
+    about 1e-12 for the correlations used by the closed-form pricers.
+
+    Parameters:
+        a, b (np.ndarray): Upper integration limits (broadcastable).
+        rho (float or np.ndarray): Correlation.
+
+    Returns:
+        np.ndarray: M(a, b; rho)
+    """
+    a, b, rho = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (a, b, rho)))
+    half_angle = 0.5 * np.arcsin(rho)[..., None]
+    theta = half_angle * (_LEGENDRE_NODES + 1)
+    sin, cos2 = np.sin(theta), np.cos(theta)**2
+    a_, b_ = a[..., None], b[..., None]
+    integrand = np.exp(-(a_**2 + b_**2 - 2 * a_ * b_ * sin) / (2 * cos2))
+    integral = half_angle[..., 0] * (integrand * _LEGENDRE_WEIGHTS).sum(axis=-1)
+    return ndtr(a) * ndtr(b) + integral / (2 * np.pi)
+
+@instrumented
+def finite_difference_greeks(batch_pricer, batch, result, relative_bump=1e-4):
+    """
+    Fill the Greeks a closed-form batch pricer left as None by central
+    differences of its formula, all bumps priced in one stacked call.
+
+    Parameters:
+        batch_pricer (callable): Closed-form pricer returning prices for an OptionBatch.
+        batch (OptionBatch): Contracts priced.
+        result (PricingResult): Result holding at least the prices; completed in place.
+        relative_bump (float): Bump size relative to each parameter (absolute for r).
+
+    Returns:
+        PricingResult: The completed result
+    """
+    n = len(batch)
+    h_S = relative_bump * batch.S
+    h_T = relative_bump * batch.T
+    h_sigma = relative_bump * np.maximum(batch.sigma, 1e-2)
+    h_r = relative_bump
+    zero = np.zeros(n)
+    # Rows: S+, S-, T+, T-, sigma+, sigma-, r+, r-
+    bumps = {
+        'S': [h_S, -h_S, zero, zero, zero, zero, zero, zero],
+        'T': [zero, zero, h_T, -h_T, zero, zero, zero, zero],
+        'sigma': [zero, zero, zero, zero, h_sigma, -h_sigma, zero, zero],
+        'r': [zero, zero, zero, zero, zero, zero, zero + h_r, zero - h_r],
+    }
+    stacked = OptionBatch(
+        S=np.tile(batch.S, 8) + np.concatenate(bumps['S']),
+        K=np.tile(batch.K, 8),
+        T=np.tile(batch.T, 8) + np.concatenate(bumps['T']),
+        r=np.tile(batch.r, 8) + np.concatenate(bumps['r']),
+        sigma=np.tile(batch.sigma, 8) + np.concatenate(bumps['sigma']),
+        option_type=np.tile(np.where(batch.is_call, 'call', 'put'), 8),
+        style=np.tile(np.where(batch.is_american, 'american', 'european'), 8),
+    )
+    prices = batch_pricer(stacked).reshape(8, n)
+
+    if result.delta is None:
+        result.delta = (prices[0] - prices[1]) / (2 * h_S)
+    if result.gamma is None:
+        result.gamma = (prices[0] - 2 * result.price + prices[1]) / h_S**2
+    if result.theta is None:
+        result.theta = -(prices[2] - prices[3]) / (2 * h_T)
+    if result.vega is None:
+        result.vega = (prices[4] - prices[5]) / (2 * h_sigma)
+    if result.rho is None:
+        result.rho = (prices[6] - prices[7]) / (2 * h_r)
+    return result
@@ -1,71 +1,115 @@
-import numpy as np
-from scipy.linalg import solve_banded
-from core.option import Option
+from core.option import Option, OptionBatch
+from core.pricers.fd_grid import grid_result, interpolate_rows, richardson_result
+from core.result import PricingResult
+from core.pricers.fd_solver import solve_grids, solve_surface
+from core.profiling import instrumented
 
-def price_american_fd_cn(option: Option, M: int = 100, N: int = 100):
+def price_american_fd_cn(option: Option, M: int = 100, N: int = 100, greeks: bool = False,
+                         exercise_method: str = 'brennan_schwartz', grid: str = 'uniform',
+                         surface: bool = False, S_range=None, all_times: bool = False,
+                         rannacher_steps: int = 0, richardson: int = 1, n_std: float = 4.0,
+                         cluster_width: float = 0.05):
     """
     Price an American option using the Crank-Nicolson finite difference method.
 
+    Thin wrapper around price_american_fd_cn_batch for a single contract.
+    In surface mode the solved grid itself is returned as a PriceSurface, so
+    a whole spot ladder (and, with all_times, every time slice) is priced
+    from one solve. Richardson extrapolation is not available in surface mode.
+
     Parameters:
         option (Option): Option instance.
         M (int): Number of asset price steps.
         N (int): Number of time steps.
+        greeks (bool): If True, also read delta, gamma and theta off the grid.
+        exercise_method (str): 'brennan_schwartz', 'penalty' or 'projection'.
+        grid (str): 'uniform', 'log' or 'sinh', see fd_grid.build_grid.
+        surface (bool): If True, return a PriceSurface instead of a price.
+        S_range (tuple): Spot window the surface must cover.
+        all_times (bool): Keep every time slice in the surface.
+        rannacher_steps (int): Number of initial steps taken as two implicit half-steps.
+        richardson (int): Number of grid resolutions to extrapolate over (1 = off, 2 or 3).
+        n_std (float): Domain half-width of the 'log' and 'sinh' grids in multiples of σ√T.
+        cluster_width (float): Width of the 'sinh' clusters as a fraction of the domain.
 
     Returns:
-        float: American option price
+        float: American option price, a PricingResult if greeks is True or
+        richardson > 1, or a PriceSurface if surface is True
     """
-    # Unpack parameters
-    S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
-    is_call = option.option_type == 'call'
-
-    # Grid setup
-    S_max = 2 * S
-    dS = S_max / M
-    dt = T / N
-    grid = np.zeros((M + 1, N + 1))
-    stock_prices = np.linspace(0, S_max, M + 1)
-
-    # Payoff at maturity
-    if is_call:
-        grid[:, -1] = np.maximum(stock_prices - K, 0)
-    else:
-        grid[:, -1] = np.maximum(K - stock_prices, 0)
+    if surface:
+        if richardson > 1:
+            raise ValueError("Richardson extrapolation is not available in surface mode")
+        return solve_surface(option, M, N, 0.5, exercise_method, grid, S_range, all_times, rannacher_steps, n_std,
+                             cluster_width)
+    batch = OptionBatch.from_options([option])
+    return price_american_fd_cn_batch(batch, M, N, greeks, exercise_method, grid, rannacher_steps, richardson,
+                                      n_std, cluster_width)[0]
 
-    # Boundary conditions
-    if is_call:
-        grid[-1, :] = S_max - K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[0, :] = 0
-    else:
-        grid[0, :] = K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[-1, :] = 0
-
-    # Coefficients for interior points
-    i_vals = np.arange(1, M)
-    a = 0.25 * dt * (sigma**2 * i_vals**2 - r * i_vals)
-    b = -0.5 * dt * (sigma**2 * i_vals**2 + r)
-    c = 0.25 * dt * (sigma**2 * i_vals**2 + r * i_vals)
+@instrumented
+def price_american_fd_cn_batch(batch: OptionBatch, M: int = 100, N: int = 100, greeks: bool = False,
+                               exercise_method: str = 'brennan_schwartz', grid: str = 'uniform',
+                               rannacher_steps: int = 0, richardson: int = 1, n_std: float = 4.0,
+                               cluster_width: float = 0.05):
+    """
+    Price a batch of options using the Crank-Nicolson finite difference method.
 
-    main_diag = 1 - b
-    lower_diag = -a[1:]
-    upper_diag = -c[:-1]
+    Every contract gets its own (M + 1)-node grid (uniform on [0, 2 max(S, K)]
+    by default, or log-spaced or clustered around strike and spot); the grids are
+    stepped back together by the shared time-stepping core, which factorizes
+    the tridiagonal systems of all contracts once and solves them as one
+    stacked, constrained solve per time step.
 
-    ab = np.zeros((3, M - 1))
+    With greeks=True, delta and gamma are three-point differences on the t = 0
+    slice and theta is the difference between the first two time slices,
+    so they come out of the same solve as the price.
 
-    for j in reversed(range(N)):
-        rhs = a * grid[i_vals - 1, j + 1] + (1 + b) * grid[i_vals, j + 1] + c * grid[i_vals + 1, j + 1]
+    Accuracy acceleration: rannacher_steps > 0 starts the scheme with that
+    many steps split into two implicit half-steps, which removes the
+    oscillations the payoff kink causes around the strike (mostly visible in
+    gamma and with large time steps). With richardson = 2 or 3 the batch is
+    also solved on grids with M and N halved (and quartered), and the
+    results are Richardson-extrapolated; the returned PricingResult then
+    carries an error_estimate, a built-in convergence diagnostic. The grid
+    sizes must be divisible accordingly. Extrapolation works best on the
+    'sinh' and 'log' grids, which keep the spot and the strike on nodes at
+    every resolution.
 
-        ab[0, 1:] = upper_diag
-        ab[1, :] = main_diag
-        ab[2, :-1] = lower_diag
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        exercise_method (str): How early exercise is enforced, see fd_solver.solve_backward.
+        grid (str): Node placement and coordinates, see fd_grid.build_grid.
+        rannacher_steps (int): Number of initial steps taken as two implicit half-steps.
+        richardson (int): Number of grid resolutions to extrapolate over (1 = off, 2 or 3).
+        n_std (float): Domain half-width of the 'log' and 'sinh' grids in multiples of σ√T.
+        cluster_width (float): Width of the 'sinh' clusters as a fraction of the domain.
 
-        x = solve_banded((1, 1), ab, rhs)
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+        (always a PricingResult when richardson > 1)
+    """
+    if richardson not in (1, 2, 3):
+        raise ValueError("richardson must be 1, 2 or 3")
+    if richardson == 1:
+        return _solve_cn(batch, M, N, greeks, exercise_method, grid, rannacher_steps, n_std, cluster_width)
 
-        # Early exercise
-        S_vals = stock_prices[1:M]
-        if is_call:
-            exercise = np.maximum(S_vals - K, 0)
-        else:
-            exercise = np.maximum(K - S_vals, 0)
-        grid[1:M, j] = np.maximum(x, exercise)
+    refinement = 2 ** (richardson - 1)
+    if M % refinement or N % refinement or M // refinement < 4:
+        raise ValueError(f"M and N must be divisible by {refinement} (and M >= {4 * refinement}) "
+                         f"for richardson={richardson}")
+    results = []
+    for level in reversed(range(richardson)):
+        result = _solve_cn(batch, M >> level, N >> level, greeks, exercise_method, grid, rannacher_steps, n_std,
+                           cluster_width)
+        results.append(result if greeks else PricingResult(price=result))
+    return richardson_result(results)
 
-    return np.interp(S, stock_prices, grid[:, 0])
+def _solve_cn(batch, M, N, greeks, exercise_method, grid, rannacher_steps, n_std, cluster_width):
+    stock_prices, values, slices, dt = solve_grids(batch, M, N, 0.5, exercise_method, grid,
+                                                   keep=(1,) if greeks else (), rannacher_steps=rannacher_steps,
+                                                   n_std=n_std, cluster_width=cluster_width)
+    if greeks:
+        return grid_result(values, slices[1], stock_prices, batch.S, dt)
+    return interpolate_rows(batch.S, stock_prices, values)
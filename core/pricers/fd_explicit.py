@@ -1,51 +1,99 @@
+import warnings
 import numpy as np
 from core.option import Option
+from core.pricers.fd_grid import grid_result, interpolate_rows
+from core.profiling import count, instrumented
 
-def price_american_fd_explicit(option: Option, M: int = 50, N: int = 50):
+class StabilityWarning(UserWarning):
+    """
+    Issued when the requested time step is too large for the explicit scheme
+    and the number of time steps is raised to restore stability.
+
+    Attributes:
+        dt (float): Requested time step
+        dt_stable (float): Largest stable time step
+        N_requested (int): Requested number of time steps
+        N_used (int): Number of time steps actually used
+    """
+
+    def __init__(self, dt, dt_stable, N_requested, N_used):
+        self.dt = dt
+        self.dt_stable = dt_stable
+        self.N_requested = N_requested
+        self.N_used = N_used
+        super().__init__(f"dt = {dt:.5f} is too large for stability (dt_stable = {dt_stable:.5f}); "
+                         f"using N = {N_used} time steps instead of {N_requested}.")
+
+@instrumented
+def price_american_fd_explicit(option: Option, M: int = 50, N: int = 50, greeks: bool = False):
+    """
+    Price an American option using the explicit finite difference method.
+
+    Each time slice is updated in one array operation from stencil and
+    exercise vectors built once, keeping only two rolling slices in memory.
+    If dt exceeds the stability limit, N is raised and a StabilityWarning
+    is issued.
+
+    Parameters:
+        option (Option): Option instance.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        greeks (bool): If True, also read delta, gamma and theta off the grid.
+
+    Returns:
+        float: American option price, or a PricingResult if greeks is True
+    """
     S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
     is_call = option.option_type == 'call'
 
     S_max = 2 * S
-    dS = S_max / M
     dt = T / N
 
     # Check explicit FDM stability
     dt_stable = 1 / (sigma**2 * M**2)
     if dt > dt_stable:
-        print(f"[Warning] dt = {dt:.5f} is too large for stability. Reducing to dt_stable = {dt_stable:.5f}.")
-        N = int(T / dt_stable) + 1
+        N_stable = int(T / dt_stable) + 1
+        # stacklevel skips the @instrumented wrapper to point at the caller
+        warnings.warn(StabilityWarning(dt, dt_stable, N, N_stable), stacklevel=3)
+        N = N_stable
         dt = T / N
 
-    grid = np.zeros((M + 1, N + 1))
     stock_prices = np.linspace(0, S_max, M + 1)
 
-    # Terminal payoff
-    if is_call:
-        grid[:, -1] = np.maximum(stock_prices - K, 0)
-    else:
-        grid[:, -1] = np.maximum(K - stock_prices, 0)
+    # Terminal payoff, also the early exercise value at every node
+    exercise = np.maximum(stock_prices - K, 0) if is_call else np.maximum(K - stock_prices, 0)
+    values = exercise.copy()
+    # European options never exercise early: their exercise value is -inf
+    exercise = exercise[1:M] if option.style == 'american' else np.full(M - 1, -np.inf)
 
-    # Boundary conditions
+    # Boundary conditions for every time slice
+    discounted_strike = K * np.exp(-r * dt * (N - np.arange(N + 1)))
     if is_call:
-        grid[-1, :] = S_max - K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[0, :] = 0
+        lower_bc = np.zeros(N + 1)
+        upper_bc = S_max - discounted_strike
     else:
-        grid[0, :] = K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[-1, :] = 0
+        lower_bc = discounted_strike
+        upper_bc = np.zeros(N + 1)
 
-    # Explicit finite difference loop
-    for j in reversed(range(N)):
-        for i in range(1, M):
-            Si = i * dS
-            a = 0.5 * dt * (sigma**2 * i**2 - r * i)
-            b = 1 - dt * (sigma**2 * i**2 + r)
-            c = 0.5 * dt * (sigma**2 * i**2 + r * i)
+    # Stencil coefficients for interior points
+    i = np.arange(1, M)
+    a = 0.5 * dt * (sigma**2 * i**2 - r * i)
+    b = 1 - dt * (sigma**2 * i**2 + r)
+    c = 0.5 * dt * (sigma**2 * i**2 + r * i)
 
-            grid[i, j] = a * grid[i - 1, j + 1] + b * grid[i, j + 1] + c * grid[i + 1, j + 1]
+    # Explicit finite difference loop over two rolling slices
+    new_values = np.empty_like(values)
+    for j in reversed(range(N)):
+        if greeks and j == 0:
+            next_values = values.copy()
 
-            # Early exercise condition
-            exercise = max(Si - K, 0) if is_call else max(K - Si, 0)
-            grid[i, j] = max(grid[i, j], exercise)
+        new_values[0] = lower_bc[j]
+        new_values[M] = upper_bc[j]
+        # Early exercise condition
+        np.maximum(a * values[:-2] + b * values[1:-1] + c * values[2:], exercise, out=new_values[1:M])
+        values, new_values = new_values, values
+    count('fd.nodes', N * (M + 1))
 
-    # Interpolate to get value at S
-    return np.interp(S, stock_prices, grid[:, 0])
+    if greeks:
+        return grid_result(values[None], next_values[None], stock_prices[None], np.array([S]), np.array([dt]))[0]
+    return interpolate_rows(np.array([S]), stock_prices[None], values[None])[0]
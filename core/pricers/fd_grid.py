@@ -0,0 +1,298 @@
+import inspect
+from dataclasses import fields
+import numpy as np
+from core.result import PricingResult
+
+GRID_TYPES = ('uniform', 'log', 'sinh')
+
+def build_grid(batch, M, grid='uniform', n_std=4.0, cluster_width=0.05, S_range=None):
+    """
+    Build the asset price nodes of a batch of FD grids.
+
+    - 'uniform': M equal steps on [0, 2 * max(S, K)], the classic grid.
+    - 'log': equal steps in log S on [min(S, K) / e^(n_std σ√T), max(S, K) * e^(n_std σ√T)];
+      these grids are solved in log-S coordinates.
+    - 'sinh': nodes on [0, max(S, K) * e^(n_std σ√T)] concentrated around the
+      strike and the spot by a sinh stretching, so most nodes sit where the
+      payoff kink and the quoted spot are.
+
+    On the 'log' and 'sinh' grids the node nearest the spot is moved onto
+    the spot and the node nearest the strike onto the strike; the stencils
+    are non-uniform anyway, so this costs nothing. A spot or strike of 0
+    already sits on the first 'sinh' node. The 'log' grid cannot reach 0
+    and rejects such contracts.
+
+    Parameters:
+        batch (OptionBatch): Contracts the grids are built for.
+        M (int): Number of asset price steps.
+        grid (str): One of GRID_TYPES.
+        n_std (float): Domain half-width in multiples of σ√T (log-price standard deviations).
+        cluster_width (float): Width of the sinh clusters as a fraction of the domain.
+        S_range (tuple): Optional (low, high) spot window the grids must also cover.
+
+    Returns:
+        tuple: (nodes of shape (n, M + 1), True if the grids use log-S coordinates)
+    """
+    if grid not in GRID_TYPES:
+        raise ValueError(f"grid must be one of {GRID_TYPES}")
+
+    S, K, T, sigma = (x[:, None] for x in (batch.S, batch.K, batch.T, batch.sigma))
+    low, high = np.minimum(S, K), np.maximum(S, K)
+    if S_range is not None:
+        low, high = np.minimum(low, S_range[0]), np.maximum(high, S_range[1])
+    if (high <= 0).any():
+        raise ValueError("FD grids need S > 0 or K > 0")
+    if grid == 'log' and (low <= 0).any():
+        raise ValueError("The log grid needs S > 0 and K > 0 (and a positive S_range); use the 'sinh' grid")
+    u = np.linspace(0, 1, M + 1)
+
+    if grid == 'uniform':
+        return 2 * high * u, False
+
+    spread = np.exp(n_std * sigma * np.sqrt(T))
+    if grid == 'log':
+        nodes = low / spread * (high * spread / (low / spread)) ** u
+    else:
+        nodes = _sinh_nodes(np.zeros_like(high), high * spread, (K, S), cluster_width, u)
+
+    _snap_nodes(nodes, S[:, 0], K[:, 0])
+    return nodes, grid == 'log'
+
+def _sinh_nodes(low, high, centres, cluster_width, u):
+    """
+    Nodes x(u) on [low, high] with density proportional to
+    sum_c 1 / sqrt(w² + (x - c)²), i.e. the inverse of the map
+    F(x) = sum_c asinh((x - c) / w) sampled at equally spaced values.
+    """
+    width = cluster_width * (high - low)
+    stretch = lambda x: sum(np.arcsinh((x - c) / width) for c in centres)
+    target = stretch(low) + u * (stretch(high) - stretch(low))
+
+    # F is increasing, so a vectorized bisection inverts it robustly; 30
+    # halvings place the nodes to ~1e-9 of the domain, far below any spacing
+    lo, hi = np.broadcast_to(low, target.shape).copy(), np.broadcast_to(high, target.shape).copy()
+    for _ in range(30):
+        mid = 0.5 * (lo + hi)
+        below = stretch(mid) < target
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    nodes = 0.5 * (lo + hi)
+    nodes[:, 0], nodes[:, -1] = low[:, 0], high[:, 0]
+    return nodes
+
+def _snap_nodes(nodes, S, K):
+    """
+    Move the interior node nearest S onto S and the one nearest K onto K, in
+    place. Values on the first node (S or K = 0 on the sinh grid) stay put.
+    """
+    rows = np.arange(len(S))
+    M = nodes.shape[1] - 1
+    j_spot = np.clip(np.abs(nodes - S[:, None]).argmin(axis=1), 1, M - 1)
+    j_strike = np.clip(np.abs(nodes - K[:, None]).argmin(axis=1), 1, M - 1)
+    # If both want the same node, the strike takes the neighbour on its side
+    clash = j_strike == j_spot
+    j_strike = np.where(clash, j_spot + np.sign(K - S).astype(int), j_strike)
+    spot_inside = S > nodes[:, 0]
+    nodes[rows[spot_inside], j_spot[spot_inside]] = S[spot_inside]
+    movable = ((j_strike != j_spot) | ~spot_inside) & (j_strike >= 1) & (j_strike <= M - 1) & (K > nodes[:, 0])
+    nodes[rows[movable], j_strike[movable]] = K[movable]
+
+def operator_coefficients(nodes, r, sigma, log_coordinates=False):
+    """
+    Three-point coefficients of the Black-Scholes operator
+    L V = ½σ²S² V_SS + r S V_S - r V at the interior nodes of possibly
+    non-uniform grids, so that (L V)_i = alpha_i V_{i-1} + beta_i V_i + gamma_i V_{i+1}.
+
+    With log_coordinates the operator is discretized in x = log S, where it
+    reads ½σ² V_xx + (r - ½σ²) V_x - r V.
+
+    Parameters:
+        nodes (np.ndarray): Increasing asset price nodes, shape (n, M + 1).
+        r, sigma (np.ndarray): Rates and volatilities, shape (n, 1).
+        log_coordinates (bool): Discretize in log S instead of S.
+
+    Returns:
+        tuple: (alpha, beta, gamma), each of shape (n, M - 1)
+    """
+    x = np.log(nodes) if log_coordinates else nodes
+    h_down = x[:, 1:-1] - x[:, :-2]
+    h_up = x[:, 2:] - x[:, 1:-1]
+    h_sum = h_down + h_up
+
+    if log_coordinates:
+        diffusion = 0.5 * sigma**2
+        drift = r - 0.5 * sigma**2
+    else:
+        diffusion = 0.5 * sigma**2 * nodes[:, 1:-1]**2
+        drift = r * nodes[:, 1:-1]
+
+    alpha = diffusion * 2 / (h_down * h_sum) - drift * h_up / (h_down * h_sum)
+    beta = -diffusion * 2 / (h_down * h_up) + drift * (h_up - h_down) / (h_down * h_up) - r
+    gamma = diffusion * 2 / (h_up * h_sum) + drift * h_down / (h_up * h_sum)
+    return alpha, beta, gamma
+
+def interpolate_rows(x, xp, fp):
+    """
+    Row-wise linear interpolation: np.interp(x[k], xp[k], fp[k]) for every row k.
+
+    Parameters:
+        x (np.ndarray): Points to evaluate, shape (n,).
+        xp (np.ndarray): Increasing grid nodes, shape (n, m).
+        fp (np.ndarray): Values at the nodes, shape (n, m).
+
+    Returns:
+        np.ndarray: Interpolated values, shape (n,)
+    """
+    rows = np.arange(len(x))
+    i = np.clip((xp < x[:, None]).sum(axis=1) - 1, 0, xp.shape[1] - 2)
+    x0, x1 = xp[rows, i], xp[rows, i + 1]
+    w = (x - x0) / (x1 - x0)
+    return (1 - w) * fp[rows, i] + w * fp[rows, i + 1]
+
+def nodal_derivatives(values, nodes):
+    """
+    First and second derivatives of grid values along the last axis.
+
+    Uses three-point formulas that are exact for quadratics on non-uniform
+    nodes and reduce to central differences on uniform ones. End nodes take
+    the value of their neighbour.
+
+    Parameters:
+        values (np.ndarray): Values at the nodes, shape (..., m).
+        nodes (np.ndarray): Increasing grid nodes, broadcastable to values.
+
+    Returns:
+        tuple: (first derivative, second derivative), each shaped like values
+    """
+    nodes = np.broadcast_to(nodes, values.shape)
+    h_down = nodes[..., 1:-1] - nodes[..., :-2]
+    h_up = nodes[..., 2:] - nodes[..., 1:-1]
+    v_down, v_mid, v_up = values[..., :-2], values[..., 1:-1], values[..., 2:]
+
+    first = np.empty_like(values)
+    second = np.empty_like(values)
+    first[..., 1:-1] = (h_down**2 * (v_up - v_mid) + h_up**2 * (v_mid - v_down)) / (h_down * h_up * (h_down + h_up))
+    second[..., 1:-1] = 2 * (h_down * (v_up - v_mid) - h_up * (v_mid - v_down)) / (h_down * h_up * (h_down + h_up))
+    for derivative in (first, second):
+        derivative[..., 0] = derivative[..., 1]
+        derivative[..., -1] = derivative[..., -2]
+    return first, second
+
+def grid_result(values, next_values, stock_prices, S, dt):
+    """
+    Read price, delta, gamma and theta at the spot off a solved grid.
+
+    Parameters:
+        values (np.ndarray): Option values at t = 0, shape (n, M + 1).
+        next_values (np.ndarray): Option values at t = dt, shape (n, M + 1).
+        stock_prices (np.ndarray): Grid nodes, shape (n, M + 1).
+        S (np.ndarray): Spot of each contract, shape (n,).
+        dt (np.ndarray): Time step of each grid, shape (n,).
+
+    Returns:
+        PricingResult: Price, delta, gamma and theta arrays
+    """
+    delta, gamma = nodal_derivatives(values, stock_prices)
+    price = interpolate_rows(S, stock_prices, values)
+    theta = (interpolate_rows(S, stock_prices, next_values) - price) / dt
+    return PricingResult(price=price,
+                         delta=interpolate_rows(S, stock_prices, delta),
+                         gamma=interpolate_rows(S, stock_prices, gamma),
+                         theta=theta)
+
+def richardson_result(results, orders=None):
+    """
+    Richardson-extrapolate results from grids refined by a factor 2 in both
+    M and N.
+
+    A field with error O(h^p) (p = 2 for Crank-Nicolson prices and spatial
+    Greeks, 1 for the one-step theta) is combined as (2^p V_h - V_2h) / (2^p - 1);
+    with three grids a second pass removes the O(h^2p) term as well. The
+    error estimate is the size of the last O(h^p) correction: |V_h - V_2h| / (2^p - 1)
+    for two grids, and the change of the first-pass extrapolant between the
+    two finer pairs for three.
+
+    Parameters:
+        results (list): PricingResults from the coarsest to the finest grid (2 or 3 of them).
+        orders (dict): Leading error order per field name; fields not listed use 2.
+
+    Returns:
+        PricingResult: Extrapolated fields, with error_estimate holding their estimated errors
+    """
+    orders = {'theta': 1, **(orders or {})}
+    extrapolated, errors = {}, {}
+    for field in fields(PricingResult):
+        name = field.name
+        if name in ('std_error', 'error_estimate') or getattr(results[-1], name) is None:
+            continue
+        p = orders.get(name, 2)
+        levels = [getattr(result, name) for result in results]
+        first = [(2**p * fine - coarse) / (2**p - 1) for coarse, fine in zip(levels, levels[1:])]
+        if len(first) == 1:
+            extrapolated[name] = first[0]
+            errors[name] = np.abs(levels[1] - levels[0]) / (2**p - 1)
+        else:
+            extrapolated[name] = (4**p * first[1] - first[0]) / (4**p - 1)
+            errors[name] = np.abs(first[1] - first[0])
+    return PricingResult(**extrapolated, error_estimate=PricingResult(**errors))
+
+def supports_surface(pricer):
+    """Return True if the pricer accepts surface=True and then returns a PriceSurface."""
+    try:
+        return 'surface' in inspect.signature(pricer).parameters
+    except (TypeError, ValueError):
+        return False
+
+class PriceSurface:
+    """
+    Option values from one FD solve, interpolated across spot and time.
+
+    Every node of the grid is a valid spot, so a whole spot ladder is priced
+    from a single solve. Values between nodes (and between stored time
+    slices) are interpolated linearly; delta and gamma are differentiated on
+    the grid before interpolation.
+
+    Attributes:
+        stock_prices (np.ndarray): Grid nodes, shape (M + 1,)
+        times (np.ndarray): Increasing times of the stored slices, starting at 0
+        values (np.ndarray): Option values, shape (len(times), M + 1)
+    """
+
+    def __init__(self, stock_prices, times, values):
+        self.stock_prices = np.asarray(stock_prices, dtype=float)
+        self.times = np.asarray(times, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self._delta, self._gamma = nodal_derivatives(self.values, self.stock_prices)
+
+    def _at_time(self, nodal, t):
+        if t <= self.times[0] or len(self.times) == 1:
+            return nodal[0]
+        k = min(np.searchsorted(self.times, t) - 1, len(self.times) - 2)
+        w = min((t - self.times[k]) / (self.times[k + 1] - self.times[k]), 1.0)
+        return (1 - w) * nodal[k] + w * nodal[k + 1]
+
+    def _interpolate(self, nodal, S, t):
+        return np.interp(S, self.stock_prices, self._at_time(nodal, t))
+
+    def price(self, S, t=0.0):
+        """Option value at spot(s) S and time t."""
+        return self._interpolate(self.values, S, t)
+
+    __call__ = price
+
+    def delta(self, S, t=0.0):
+        """∂V/∂S at spot(s) S and time t."""
+        return self._interpolate(self._delta, S, t)
+
+    def gamma(self, S, t=0.0):
+        """∂²V/∂S² at spot(s) S and time t."""
+        return self._interpolate(self._gamma, S, t)
+
+    def theta(self, S):
+        """∂V/∂t at spot(s) S and t = 0, from the first two stored slices."""
+        dt = self.times[1] - self.times[0]
+        return (np.interp(S, self.stock_prices, self.values[1]) - self.price(S)) / dt
+
+    def __repr__(self):
+        return (f"PriceSurface(S in [{self.stock_prices[0]:g}, {self.stock_prices[-1]:g}], "
+                f"{len(self.stock_prices)} nodes, {len(self.times)} time slices)")
@@ -1,60 +1,76 @@
-import numpy as np
-from scipy.linalg import solve_banded
-from core.option import Option
-
-def price_american_fd_implicit(option: Option, M: int = 100, N: int = 100):
-    S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
-    is_call = option.option_type == 'call'
-
-    S_max = 2 * S
-    dS = S_max / M
-    dt = T / N
-    stock_prices = np.linspace(0, S_max, M + 1)
-    grid = np.zeros((M + 1, N + 1))
-
-    # Terminal payoff
-    if is_call:
-        grid[:, -1] = np.maximum(stock_prices - K, 0)
-    else:
-        grid[:, -1] = np.maximum(K - stock_prices, 0)
-
-    # Boundary conditions
-    if is_call:
-        grid[-1, :] = S_max - K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[0, :] = 0
-    else:
-        grid[0, :] = K * np.exp(-r * dt * (N - np.arange(N + 1)))
-        grid[-1, :] = 0
-
-    # Coefficients
-    i_vals = np.arange(1, M)
-    a = -0.5 * dt * (sigma**2 * i_vals**2 - r * i_vals)
-    b = 1 + dt * (sigma**2 * i_vals**2 + r)
-    c = -0.5 * dt * (sigma**2 * i_vals**2 + r * i_vals)
-
-    ab = np.zeros((3, M - 1))
-
-    for j in reversed(range(N)):
-        rhs = grid[1:M, j + 1].copy()
-
-        # Adjust for boundary conditions
-        rhs[0] -= a[0] * grid[0, j]
-        rhs[-1] -= c[-1] * grid[M, j]
-
-        # Fill band matrix
-        ab[0, 1:] = c[:-1]        # upper diagonal
-        ab[1, :] = b              # main diagonal
-        ab[2, :-1] = a[1:]        # lower diagonal
-
-        # Solve
-        x = solve_banded((1, 1), ab, rhs)
-
-        # Early exercise
-        S_vals = stock_prices[1:M]
-        if is_call:
-            exercise = np.maximum(S_vals - K, 0)
-        else:
-            exercise = np.maximum(K - S_vals, 0)
-        grid[1:M, j] = np.maximum(x, exercise)
-
-    return np.interp(S, stock_prices, grid[:, 0])
+from core.option import Option, OptionBatch
+from core.pricers.fd_grid import grid_result, interpolate_rows
+from core.pricers.fd_solver import solve_grids, solve_surface
+from core.profiling import instrumented
+
+def price_american_fd_implicit(option: Option, M: int = 100, N: int = 100, greeks: bool = False,
+                               exercise_method: str = 'brennan_schwartz', grid: str = 'uniform',
+                               surface: bool = False, S_range=None, all_times: bool = False, n_std: float = 4.0,
+                               cluster_width: float = 0.05):
+    """
+    Price an American option using the implicit finite difference method.
+
+    Thin wrapper around price_american_fd_implicit_batch for a single contract.
+    In surface mode the solved grid itself is returned as a PriceSurface, so
+    a whole spot ladder (and, with all_times, every time slice) is priced
+    from one solve.
+
+    Parameters:
+        option (Option): Option instance.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        greeks (bool): If True, also read delta, gamma and theta off the grid.
+        exercise_method (str): 'brennan_schwartz', 'penalty' or 'projection'.
+        grid (str): 'uniform', 'log' or 'sinh', see fd_grid.build_grid.
+        surface (bool): If True, return a PriceSurface instead of a price.
+        S_range (tuple): Spot window the surface must cover.
+        all_times (bool): Keep every time slice in the surface.
+        n_std (float): Domain half-width of the 'log' and 'sinh' grids in multiples of σ√T.
+        cluster_width (float): Width of the 'sinh' clusters as a fraction of the domain.
+
+    Returns:
+        float: American option price, a PricingResult if greeks is True,
+        or a PriceSurface if surface is True
+    """
+    if surface:
+        return solve_surface(option, M, N, 1.0, exercise_method, grid, S_range, all_times, n_std=n_std,
+                             cluster_width=cluster_width)
+    batch = OptionBatch.from_options([option])
+    return price_american_fd_implicit_batch(batch, M, N, greeks, exercise_method, grid, n_std, cluster_width)[0]
+
+@instrumented
+def price_american_fd_implicit_batch(batch: OptionBatch, M: int = 100, N: int = 100, greeks: bool = False,
+                                     exercise_method: str = 'brennan_schwartz', grid: str = 'uniform',
+                                     n_std: float = 4.0, cluster_width: float = 0.05):
+    """
+    Price a batch of options using the implicit finite difference method.
+
+    Every contract gets its own (M + 1)-node grid (uniform on [0, 2 max(S, K)]
+    by default, or log-spaced or clustered around strike and spot); the grids are
+    stepped back together by the shared time-stepping core, which factorizes
+    the tridiagonal systems of all contracts once and solves them as one
+    stacked, constrained solve per time step.
+
+    With greeks=True, delta and gamma are three-point differences on the t = 0
+    slice and theta is the difference between the first two time slices,
+    so they come out of the same solve as the price.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        exercise_method (str): How early exercise is enforced, see fd_solver.solve_backward.
+        grid (str): Node placement and coordinates, see fd_grid.build_grid.
+        n_std (float): Domain half-width of the 'log' and 'sinh' grids in multiples of σ√T.
+        cluster_width (float): Width of the 'sinh' clusters as a fraction of the domain.
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    stock_prices, values, slices, dt = solve_grids(batch, M, N, 1.0, exercise_method, grid,
+                                                   keep=(1,) if greeks else (), n_std=n_std,
+                                                   cluster_width=cluster_width)
+    if greeks:
+        return grid_result(values, slices[1], stock_prices, batch.S, dt)
+    return interpolate_rows(batch.S, stock_prices, values)
@@ -0,0 +1,189 @@
+import numpy as np
+from core.option import OptionBatch
+from core.pricers.fd_grid import PriceSurface, build_grid, operator_coefficients
+from core.pricers.tridiagonal import TridiagonalFactorization, solve_penalized
+from core.profiling import count, instrumented
+
+EXERCISE_METHODS = ('brennan_schwartz', 'penalty', 'projection')
+
+@instrumented(name='fd.time_stepping')
+def solve_backward(values, alpha, beta, gamma, dt, theta, exercise, lower_bc, upper_bc, is_call,
+                   exercise_method='brennan_schwartz', keep=(), rannacher_steps=0):
+    """
+    Step a stack of FD grids back from maturity to t = 0 with the theta scheme.
+
+    The spatial operator at interior node i is
+    (L V)_i = alpha_i V_{i-1} + beta_i V_i + gamma_i V_{i+1},
+    and each step solves (I - theta dt L) V^j = (I + (1 - theta) dt L) V^{j+1}
+    (theta = 1: implicit, theta = 0.5: Crank-Nicolson). The matrix on the left
+    is the same at every step, so it is factorized once. Only the current
+    time slice and the slices listed in `keep` are held in memory.
+
+    With rannacher_steps > 0 (and theta < 1) the first steps from maturity
+    are each replaced by two implicit half-steps. These damp the
+    high-frequency error from the payoff kink that Crank-Nicolson alone
+    leaves oscillating around the strike.
+
+    The early exercise constraint V >= exercise is enforced by
+    - 'brennan_schwartz': exact single-sweep solve of the constrained system,
+    - 'penalty': penalty iteration, for exercise regions of any shape,
+    - 'projection': unconstrained solve followed by clipping.
+
+    Parameters:
+        values (np.ndarray): Terminal values, shape (n, M + 1); overwritten.
+        alpha, beta, gamma (np.ndarray): Operator coefficients at interior nodes, shape (n, M - 1).
+        dt (np.ndarray): Time step of each grid, shape (n, 1).
+        theta (float): Implicitness of the scheme.
+        exercise (np.ndarray): Exercise values at interior nodes, shape (n, M - 1); -inf where not exercisable.
+        lower_bc, upper_bc (np.ndarray): Boundary values for every time slice, shape (n, N + 1).
+        is_call (np.ndarray): Boolean mask of calls, shape (n,).
+        exercise_method (str): One of EXERCISE_METHODS.
+        keep (iterable): Time indices j (t = j * dt) of slices to return besides t = 0.
+        rannacher_steps (int): Number of initial steps taken as two implicit half-steps.
+
+    Returns:
+        tuple: (values at t = 0, dict mapping each kept j to its slice)
+    """
+    if exercise_method not in EXERCISE_METHODS:
+        raise ValueError(f"exercise_method must be one of {EXERCISE_METHODS}")
+
+    M = values.shape[1] - 1
+    N = lower_bc.shape[1] - 1
+
+    def system(theta, dt):
+        implicit_dt = theta * dt
+        lower = -implicit_dt * alpha
+        diag = 1 - implicit_dt * beta
+        upper = -implicit_dt * gamma
+        factorization = None
+        if exercise_method != 'penalty':
+            factorization = TridiagonalFactorization(lower, diag, upper, reverse=~is_call)
+            count('fd.factorizations', len(values))
+        return theta, implicit_dt, (1 - theta) * dt, lower, diag, upper, factorization
+
+    def step(values, system, lower_value, upper_value):
+        theta, implicit_dt, explicit_dt, lower, diag, upper, factorization = system
+        rhs = values[:, 1:M].copy()
+        if theta < 1:
+            rhs += explicit_dt * (alpha * values[:, :M - 1] + beta * values[:, 1:M] + gamma * values[:, 2:])
+
+        # Boundary values of the new slice enter the first and last equations
+        rhs[:, 0] += implicit_dt[:, 0] * alpha[:, 0] * lower_value
+        rhs[:, -1] += implicit_dt[:, 0] * gamma[:, -1] * upper_value
+
+        if exercise_method == 'brennan_schwartz':
+            x = factorization.solve(rhs, exercise)
+        elif exercise_method == 'penalty':
+            x = solve_penalized(lower, diag, upper, rhs, exercise, values[:, 1:M])
+        else:
+            x = np.maximum(factorization.solve(rhs), exercise)
+
+        values[:, 0] = lower_value
+        values[:, M] = upper_value
+        values[:, 1:M] = x
+
+    main = system(theta, dt)
+    startup = system(1.0, dt / 2) if rannacher_steps > 0 and theta < 1 else None
+
+    keep = set(keep)
+    slices = {N: values.copy()} if N in keep else {}
+    for j in reversed(range(N)):
+        if startup is not None and j >= N - rannacher_steps:
+            # Boundary values at the half step are interpolated between slices
+            step(values, startup, 0.5 * (lower_bc[:, j] + lower_bc[:, j + 1]),
+                 0.5 * (upper_bc[:, j] + upper_bc[:, j + 1]))
+            step(values, startup, lower_bc[:, j], upper_bc[:, j])
+        else:
+            step(values, main, lower_bc[:, j], upper_bc[:, j])
+        if j in keep:
+            slices[j] = values.copy()
+
+    # Every step solves one system per grid; start-up steps solve two
+    solves = len(values) * (N + (min(rannacher_steps, N) if startup is not None else 0))
+    count('fd.linear_solves', solves)
+    count('fd.nodes', solves * (M + 1))
+    return values, slices
+
+@instrumented(name='fd.solve_grids')
+def solve_grids(batch, M, N, theta, exercise_method='brennan_schwartz', grid='uniform', S_range=None, keep=(),
+                rannacher_steps=0, n_std=4.0, cluster_width=0.05):
+    """
+    Build grids for a batch of contracts (see fd_grid.build_grid) and solve
+    them back to t = 0 with the theta scheme.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        theta (float): 1 for implicit, 0.5 for Crank-Nicolson.
+        exercise_method (str): One of EXERCISE_METHODS.
+        grid (str): One of fd_grid.GRID_TYPES.
+        S_range (tuple): Optional (low, high) spot window the grids must cover.
+        keep (iterable): Time indices of extra slices to return, see solve_backward.
+        rannacher_steps (int): Implicit start-up steps, see solve_backward.
+        n_std, cluster_width (float): Domain width and clustering of the grid, see fd_grid.build_grid.
+
+    Returns:
+        tuple: (grid nodes, values at t = 0, kept slices, dt), with node and
+        value arrays of shape (n, M + 1) and dt of shape (n,)
+    """
+    # Unpack parameters as column vectors so they broadcast over grid nodes
+    S, K, T, r, sigma = (x[:, None] for x in (batch.S, batch.K, batch.T, batch.r, batch.sigma))
+    is_call = batch.is_call
+    # European contracts never exercise early: their exercise value is -inf
+    exercise_floor = np.where(batch.is_american, 0.0, -np.inf)[:, None]
+
+    # Grid setup
+    stock_prices, log_coordinates = build_grid(batch, M, grid, n_std, cluster_width, S_range)
+    S_min, S_max = stock_prices[:, :1], stock_prices[:, -1:]
+    dt = T / N
+
+    # Payoff at maturity, also the early exercise value at every node
+    exercise = np.where(is_call[:, None], np.maximum(stock_prices - K, 0), np.maximum(K - stock_prices, 0))
+    values = exercise.copy()
+    exercise = exercise + exercise_floor
+
+    # Boundary conditions for every time slice: discounted forward payoff at
+    # the far ends, never below the exercise value for American contracts
+    discounted_strike = K * np.exp(-r * dt * (N - np.arange(N + 1)))
+    lower_bc = np.where(is_call[:, None], 0, np.maximum(discounted_strike - S_min, exercise[:, :1]))
+    upper_bc = np.where(is_call[:, None], np.maximum(S_max - discounted_strike, exercise[:, -1:]), 0)
+
+    alpha, beta, gamma = operator_coefficients(stock_prices, r, sigma, log_coordinates)
+
+    values, slices = solve_backward(values, alpha, beta, gamma, dt, theta, exercise[:, 1:M], lower_bc, upper_bc,
+                                    is_call, exercise_method, keep, rannacher_steps)
+    return stock_prices, values, slices, dt[:, 0]
+
+@instrumented
+def solve_surface(option, M, N, theta, exercise_method='brennan_schwartz', grid='uniform', S_range=None,
+                  all_times=False, rannacher_steps=0, n_std=4.0, cluster_width=0.05):
+    """
+    Solve one grid for an option and return it as a PriceSurface.
+
+    The grid is widened to cover the requested spot window; a uniform grid
+    spans [0, 2 * max(S, K, S_range[1])], so every spot in the window lies
+    in its well-resolved lower half.
+
+    Parameters:
+        option (Option): Option instance; its spot is used when S_range is None.
+        M (int): Number of asset price steps.
+        N (int): Number of time steps.
+        theta (float): 1 for implicit, 0.5 for Crank-Nicolson.
+        exercise_method (str): One of EXERCISE_METHODS.
+        grid (str): One of fd_grid.GRID_TYPES.
+        S_range (tuple): (low, high) spot window to cover.
+        all_times (bool): Keep every time slice instead of only t = 0 and t = dt.
+        rannacher_steps (int): Implicit start-up steps, see solve_backward.
+        n_std, cluster_width (float): Domain width and clustering of the grid, see fd_grid.build_grid.
+
+    Returns:
+        PriceSurface: Interpolant of price, delta and gamma over the grid
+    """
+    keep = range(1, N + 1) if all_times else (1,)
+    stock_prices, values, slices, dt = solve_grids(OptionBatch.from_options([option]), M, N, theta,
+                                                   exercise_method, grid, S_range, keep, rannacher_steps, n_std,
+                                                   cluster_width)
+    times = [0] + sorted(slices)
+    stacked = np.array([values[0]] + [slices[j][0] for j in times[1:]])
+    return PriceSurface(stock_prices[0], np.array(times) * dt[0], stacked)
@@ -0,0 +1,347 @@
+import multiprocessing
+import numpy as np
+from core.option import Option, OptionBatch
+from core.result import PricingResult
+from core.profiling import count, instrumented
+from utils.validators import black_scholes_price
+
+def price_american_mc_lsm_engine(option: Option, n_paths=100000, n_steps=50, poly_degree=2, seed=42,
+                                 shard_size=65536, n_workers=1, float32=False, antithetic=False,
+                                 control_variate=False, std_error=False, policy_paths=None):
+    """
+    Price an American option with the sharded, memory-bounded LSM path engine.
+
+    Thin wrapper around price_american_mc_lsm_engine_batch for a single contract.
+
+    Parameters:
+        option (Option): Option instance.
+        n_paths (int): Number of simulated price paths.
+        n_steps (int): Time discretization steps.
+        poly_degree (int): Degree of polynomial for regression.
+        seed (int): Root seed; every shard gets its own spawned stream.
+        shard_size (int): Number of paths per shard.
+        n_workers (int): Number of worker processes (1 runs in-process).
+        float32 (bool): Store path states in float32.
+        antithetic (bool): Use antithetic variates.
+        control_variate (bool): Use the European payoff as a control variate.
+        std_error (bool): If True, return a PricingResult with the price and its standard error.
+        policy_paths (int): Paths used to fit the exercise policy (default: all), see the batch pricer.
+
+    Returns:
+        float: American option price, or a PricingResult if std_error is True
+    """
+    batch = OptionBatch.from_options([option])
+    return price_american_mc_lsm_engine_batch(batch, n_paths, n_steps, poly_degree, seed, shard_size, n_workers,
+                                              float32, antithetic, control_variate, std_error=std_error,
+                                              policy_paths=policy_paths)[0]
+
+@instrumented
+def price_american_mc_lsm_engine_batch(batch: OptionBatch, n_paths=100000, n_steps=50, poly_degree=2, seed=42,
+                                       shard_size=65536, n_workers=1, float32=False, antithetic=False,
+                                       control_variate=False, chunk_size=16, std_error=False, policy_paths=None):
+    """
+    Price a batch of options with Longstaff-Schwartz on a sharded path engine.
+
+    Memory does not grow with n_steps: instead of storing whole paths, every
+    shard draws the Brownian motion at maturity and walks backwards in time
+    with the Brownian bridge, holding only the current time slice and one
+    cashflow per path and contract. With float32 those states take half the
+    memory; regression sums are still accumulated in float64.
+
+    The paths are split into shards of shard_size. Each shard draws from its
+    own np.random.Generator spawned from SeedSequence(seed), and all
+    cross-shard sums are taken in shard order, so the result depends on
+    the seed and the shard size but not on n_workers. At each exercise date
+    every shard returns its normal equations for the regression; the sums
+    are solved once and the coefficients sent back. With n_workers > 1 the
+    shards are spread over that many processes, each holding only its own
+    paths. The processes are started once and reused for every chunk.
+
+    The regression at each date needs the cashflows of every path that
+    fits it, so those shards stay alive for the whole backward induction:
+    by default all n_paths paths, and memory grows linearly with n_paths.
+    With policy_paths the exercise policy is fitted on the first shards
+    holding policy_paths paths only; the remaining shards are then
+    simulated one at a time (one per worker) under the fitted policy and
+    freed, so memory is bounded by chunk_size * (policy_paths + shard_size)
+    path states however large n_paths grows. Those extra paths follow a
+    policy fitted on other paths, so they carry the usual low bias of an
+    out-of-sample LSM estimate instead of the high bias of an in-sample one.
+
+    Contracts are processed in chunks of chunk_size on the same paths
+    (common random numbers).
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        n_paths (int): Number of simulated price paths.
+        n_steps (int): Time discretization steps.
+        poly_degree (int): Degree of polynomial for regression.
+        seed (int): Root seed of the shard streams.
+        shard_size (int): Number of paths per shard.
+        n_workers (int): Number of worker processes (1 runs in-process).
+        float32 (bool): Store path states in float32.
+        antithetic (bool): Use antithetic variates (pairs never straddle shards).
+        control_variate (bool): Use the European payoff, with its Black-Scholes mean, as a control variate.
+        chunk_size (int): Number of contracts priced together.
+        std_error (bool): If True, return a PricingResult with prices and their standard errors.
+        policy_paths (int): Paths used to fit the exercise policy, rounded up to whole shards
+            (default: all, which keeps every path in memory).
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    if antithetic and (n_paths % 2 or shard_size % 2):
+        raise ValueError("Antithetic variates need an even number of paths and an even shard size")
+
+    sizes = [min(shard_size, n_paths - start) for start in range(0, n_paths, shard_size)]
+    shards = list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+    n_policy = len(shards) if policy_paths is None else min(len(shards), max(1, -(-policy_paths // shard_size)))
+    policy, streamed = shards[:n_policy], shards[n_policy:]
+    dtype = np.float32 if float32 else np.float64
+    options = (n_steps, poly_degree, dtype, antithetic, control_variate)
+
+    prices = np.empty(len(batch))
+    std_errors = np.empty(len(batch))
+    pool = _ShardPool(min(n_workers, len(shards)), options) if n_workers > 1 else None
+    try:
+        for start in range(0, len(batch), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            if pool is not None:
+                totals = pool.run(batch[chunk], policy, streamed)
+            else:
+                totals = _run_shards(batch[chunk], policy, streamed, options)
+            exact = np.array([black_scholes_price(option) for option in batch[chunk]]) if control_variate else None
+            prices[chunk], std_errors[chunk] = _estimate(totals, exact)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    if std_error:
+        return PricingResult(price=prices, std_error=PricingResult(price=std_errors))
+    return prices
+
+class _PathShard:
+    """
+    One shard of paths for a chunk of contracts, stepped backwards in time.
+
+    The Brownian motion is kept in units of sqrt(dt): W_n = sqrt(n) Z, and
+    given W_t the bridge back to W_0 = 0 gives
+    W_{t-1} = W_t (t - 1) / t + sqrt((t - 1) / t) Z.
+    """
+
+    def __init__(self, batch, n_paths, seed_sequence, n_steps, poly_degree, dtype, antithetic, control_variate):
+        S, K, T, r, sigma = (x[:, None] for x in (batch.S, batch.K, batch.T, batch.r, batch.sigma))
+        dt = T / n_steps
+        # Per-contract constants in the storage dtype, so path arithmetic never upcasts
+        self.S, self.K = S.astype(dtype), K.astype(dtype)
+        self.sign = np.where(batch.is_call, 1.0, -1.0)[:, None].astype(dtype)
+        self.american = batch.is_american[:, None]
+        self.discount = np.exp(-r * dt).astype(dtype)
+        self.drift = ((r - 0.5 * sigma**2) * dt).astype(dtype)
+        self.vol = (sigma * np.sqrt(dt)).astype(dtype)
+        self.n_coeffs = poly_degree + 1
+        self.dtype = dtype
+        self.antithetic = antithetic
+        self.rng = np.random.default_rng(seed_sequence)
+        self.n_draws = n_paths // 2 if antithetic else n_paths
+
+        self.t = n_steps
+        self.W = self.dtype(np.sqrt(n_steps)) * self._normals()
+        _, self.cashflow = self._spot_and_payoff()
+        self.european = np.exp(-r * T).astype(dtype) * self.cashflow if control_variate else None
+
+    def _normals(self):
+        Z = self.rng.standard_normal(self.n_draws, dtype=self.dtype)
+        return np.concatenate([Z, -Z]) if self.antithetic else Z
+
+    def _spot_and_payoff(self):
+        S_t = self.S * np.exp(self.drift * self.dtype(self.t) + self.vol * self.W)
+        return S_t, np.maximum(self.sign * (S_t - self.K), 0)
+
+    def step_back(self, regression=True):
+        """Move to the previous exercise date and return this shard's normal equations there (None if not regression)."""
+        self.cashflow *= self.discount
+        t = self.t
+        self.W = self.W * self.dtype((t - 1) / t) + self.dtype(np.sqrt((t - 1) / t)) * self._normals()
+        self.t = t - 1
+
+        S_t, self.payoff = self._spot_and_payoff()
+        self.in_the_money = self.payoff > 0
+        self.x = S_t / self.K - 1
+        if not regression:
+            return None
+
+        # Power sums of the centred moneyness basis, accumulated in float64
+        weighted = self.in_the_money.astype(self.dtype)
+        power_sums = np.empty((len(self.x), 2 * self.n_coeffs - 1))
+        moments = np.empty((len(self.x), self.n_coeffs))
+        for k in range(2 * self.n_coeffs - 1):
+            power_sums[:, k] = weighted.sum(axis=1, dtype=np.float64)
+            if k < self.n_coeffs:
+                moments[:, k] = (weighted * self.cashflow).sum(axis=1, dtype=np.float64)
+            weighted *= self.x
+        return power_sums, moments
+
+    def exercise(self, coeffs, fitted):
+        """Apply the exercise decision for the regression coefficients of the current date."""
+        continuation = np.zeros_like(self.x)
+        for k in range(self.n_coeffs - 1, -1, -1):
+            continuation *= self.x
+            continuation += coeffs[:, k:k + 1].astype(self.dtype)
+        exercise = self.in_the_money & (self.payoff > continuation) & fitted[:, None] & self.american
+        self.cashflow = np.where(exercise, self.payoff, self.cashflow)
+
+    def totals(self):
+        """Sums needed for the price, its standard error and the control variate."""
+        price = self.cashflow * self.discount
+        european = self.european
+        if self.antithetic:
+            # Each antithetic pair counts as one independent sample
+            price = 0.5 * (price[:, :self.n_draws] + price[:, self.n_draws:])
+            if european is not None:
+                european = 0.5 * (european[:, :self.n_draws] + european[:, self.n_draws:])
+        price = price.astype(np.float64)
+        totals = {'n': price.shape[1], 'x': price.sum(axis=1), 'xx': (price**2).sum(axis=1)}
+        if european is not None:
+            european = european.astype(np.float64)
+            totals.update(y=european.sum(axis=1), yy=(european**2).sum(axis=1), xy=(price * european).sum(axis=1))
+        return totals
+
+def _solve_normal_equations(normal_equations, n_coeffs):
+    """Sum per-shard normal equations in shard order and solve for the regression coefficients."""
+    power_sums = sum(ne[0] for ne in normal_equations)
+    moments = sum(ne[1] for ne in normal_equations)
+    hankel = np.add.outer(np.arange(n_coeffs), np.arange(n_coeffs))
+    gram = power_sums[:, hankel]
+    # Not enough points to fit the polynomial: skip regression for that contract
+    fitted = power_sums[:, 0] >= n_coeffs
+    gram[~fitted] = np.eye(n_coeffs)
+    count('lsm.regressions', int(fitted.sum()))
+    return np.linalg.solve(gram, moments[..., None])[..., 0], fitted
+
+def _sum_totals(totals):
+    return {key: sum(t[key] for t in totals) for key in totals[0]}
+
+def _run_shards(batch, policy, streamed, options):
+    """Backward induction over in-process shards; returns the summed totals."""
+    n_steps, poly_degree = options[0], options[1]
+    shards = [_PathShard(batch, size, seq, *options) for size, seq in policy]
+    fitted_policy = []
+    for _ in range(n_steps - 1):
+        coeffs, fitted = _solve_normal_equations([shard.step_back() for shard in shards], poly_degree + 1)
+        for shard in shards:
+            shard.exercise(coeffs, fitted)
+        fitted_policy.append((coeffs, fitted))
+    totals = [shard.totals() for shard in shards]
+    del shards
+    totals += [_stream_shard(batch, size, seq, options, fitted_policy) for size, seq in streamed]
+    return _sum_totals(totals)
+
+def _stream_shard(batch, size, seed_sequence, options, fitted_policy):
+    """Simulate one shard under an already fitted exercise policy and return its totals."""
+    shard = _PathShard(batch, size, seed_sequence, *options)
+    for coeffs, fitted in fitted_policy:
+        shard.step_back(regression=False)
+        shard.exercise(coeffs, fitted)
+    return shard.totals()
+
+def _shard_worker(connection, options):
+    """Process loop owning a block of shards for one chunk of contracts at a time, answering the driver's commands."""
+    batch, shards = None, []
+    while True:
+        command, payload = connection.recv()
+        if command == 'shards':
+            batch, blocks = payload
+            shards = [_PathShard(batch, size, seq, *options) for size, seq in blocks]
+        elif command == 'step_back':
+            connection.send([shard.step_back() for shard in shards])
+        elif command == 'exercise':
+            for shard in shards:
+                shard.exercise(*payload)
+        elif command == 'totals':
+            connection.send([shard.totals() for shard in shards])
+            shards = []
+        elif command == 'stream':
+            blocks, fitted_policy = payload
+            connection.send([_stream_shard(batch, size, seq, options, fitted_policy) for size, seq in blocks])
+        elif command == 'close':
+            break
+    connection.close()
+
+class _ShardPool:
+    """
+    Worker processes for the backward induction, started once and reused
+    for every chunk of contracts. Each worker owns a contiguous block of
+    shards, which keeps the shard order when results are gathered.
+    """
+
+    def __init__(self, n_workers, options):
+        self.options = options
+        context = multiprocessing.get_context()
+        self.connections, self.processes = [], []
+        try:
+            for _ in range(n_workers):
+                parent, child = context.Pipe()
+                process = context.Process(target=_shard_worker, args=(child, options), daemon=True)
+                process.start()
+                child.close()
+                self.connections.append(parent)
+                self.processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def _blocks(self, shards):
+        bounds = np.linspace(0, len(shards), len(self.connections) + 1).astype(int)
+        return [shards[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+    def run(self, batch, policy, streamed):
+        """Backward induction for one chunk of contracts; returns the summed totals."""
+        n_steps, poly_degree = self.options[0], self.options[1]
+        for connection, blocks in zip(self.connections, self._blocks(policy)):
+            connection.send(('shards', (batch, blocks)))
+
+        fitted_policy = []
+        for _ in range(n_steps - 1):
+            for connection in self.connections:
+                connection.send(('step_back', None))
+            normal_equations = [ne for connection in self.connections for ne in connection.recv()]
+            coeffs, fitted = _solve_normal_equations(normal_equations, poly_degree + 1)
+            for connection in self.connections:
+                connection.send(('exercise', (coeffs, fitted)))
+            fitted_policy.append((coeffs, fitted))
+
+        for connection in self.connections:
+            connection.send(('totals', None))
+        totals = [t for connection in self.connections for t in connection.recv()]
+        if streamed:
+            for connection, blocks in zip(self.connections, self._blocks(streamed)):
+                connection.send(('stream', (blocks, fitted_policy)))
+            totals += [t for connection in self.connections for t in connection.recv()]
+        return _sum_totals(totals)
+
+    def close(self):
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+def _estimate(totals, exact=None):
+    """Mean and standard error from summed totals, with the optimal control variate if exact is given."""
+    n = totals['n']
+    mean = totals['x'] / n
+    variance = (totals['xx'] - n * mean**2) / (n - 1)
+    if exact is not None:
+        mean_y = totals['y'] / n
+        variance_y = (totals['yy'] - n * mean_y**2) / (n - 1)
+        covariance = (totals['xy'] - n * mean * mean_y) / (n - 1)
+        coefficient = np.divide(covariance, variance_y, out=np.zeros_like(covariance), where=variance_y > 0)
+        mean = mean - coefficient * (mean_y - exact)
+        variance = variance - 2 * coefficient * covariance + coefficient**2 * variance_y
+    return mean, np.sqrt(np.maximum(variance, 0) / n)
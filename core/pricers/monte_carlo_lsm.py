@@ -1,63 +1,261 @@
 import numpy as np
-from numpy.polynomial.polynomial import Polynomial
-from core.option import Option
+from scipy.stats import norm, qmc
+from core.option import Option, OptionBatch
+from core.result import PricingResult
+from core.profiling import count, instrumented
+from utils.validators import black_scholes_price
 
-def price_american_mc_lsm(option: Option, n_paths=10000, n_steps=50, poly_degree=2, seed=42):
+GREEK_NAMES = ('price', 'delta', 'gamma', 'theta', 'vega', 'rho')
+SOBOL_REPLICATES = 8  # independently scrambled Sobol blocks, for the standard error
+
+def price_american_mc_lsm(option: Option, n_paths=10000, n_steps=50, poly_degree=2, seed=42, greeks=False,
+                          antithetic=False, control_variate=False, sobol=False, std_error=False):
     """
     Price American option using Monte Carlo + Longstaff-Schwartz Method.
 
+    Thin wrapper around price_american_mc_lsm_batch for a single contract.
+
     Parameters:
         option (Option): Option instance.
         n_paths (int): Number of simulated price paths.
         n_steps (int): Time discretization steps.
         poly_degree (int): Degree of polynomial for regression.
         seed (int): RNG seed for reproducibility.
+        greeks (bool): If True, also estimate Greeks on the same paths.
+        antithetic (bool): Use antithetic variates.
+        control_variate (bool): Use the European payoff as a control variate.
+        sobol (bool): Use scrambled Sobol normals with a Brownian-bridge construction.
+        std_error (bool): If True, return a PricingResult with the price and its standard error.
 
     Returns:
-        float: American option price.
+        float: American option price, or a PricingResult if greeks or std_error is True.
     """
-    np.random.seed(seed)
+    batch = OptionBatch.from_options([option])
+    return price_american_mc_lsm_batch(batch, n_paths, n_steps, poly_degree, seed, greeks=greeks,
+                                       antithetic=antithetic, control_variate=control_variate, sobol=sobol,
+                                       std_error=std_error)[0]
 
-    S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
-    is_call = option.option_type == 'call'
-    dt = T / n_steps
-    discount = np.exp(-r * dt)
+@instrumented
+def price_american_mc_lsm_batch(batch: OptionBatch, n_paths=10000, n_steps=50, poly_degree=2, seed=42,
+                                chunk_size=64, greeks=False, antithetic=False, control_variate=False,
+                                sobol=False, std_error=False):
+    """
+    Price a batch of options using Monte Carlo + Longstaff-Schwartz Method.
 
-    # 1. Simulate asset paths
-    Z = np.random.normal(size=(n_paths, n_steps))
-    S_paths = np.zeros_like(Z)
-    S_paths[:, 0] = S
+    All contracts are driven by the same standard normal draws (common random
+    numbers), so each contract gets exactly the price the single-contract
+    pricer would give with the same seed. Contracts are processed in chunks
+    and the per-contract regressions of a chunk are solved as one stacked
+    least-squares problem.
 
-    for t in range(1, n_steps):
-        S_paths[:, t] = S_paths[:, t - 1] * np.exp((r - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * Z[:, t])
+    With greeks=True the fitted exercise policy is kept fixed and Greeks are
+    estimated on the same paths: delta, vega and rho pathwise, gamma with a
+    likelihood-ratio/pathwise mixed estimator on the first time step. Theta
+    is left as None. Each Greek comes with its Monte Carlo standard error.
 
-    # 2. Compute payoff matrix
-    if is_call:
-        payoff = np.maximum(S_paths - K, 0)
-    else:
-        payoff = np.maximum(K - S_paths, 0)
+    Variance reduction, all optional and combinable:
+    - antithetic: every draw is also used with its sign flipped; the
+      standard error is computed over the averaged pairs.
+    - control_variate: the discounted European payoff on the same paths,
+      whose exact mean is the Black-Scholes price, is used as a control for
+      the price, with the variance-minimizing coefficient fitted per contract.
+    - sobol: the normals come from scrambled Sobol points mapped to paths
+      with a Brownian bridge, so the leading dimensions carry the coarse path
+      shape. The paths are split into SOBOL_REPLICATES independently
+      scrambled blocks and the standard error is taken over the block means.
+      Every block gets a power-of-two number of points, which keeps the
+      Sobol balance properties: n_paths is rounded up to SOBOL_REPLICATES
+      times a power of two (doubled with antithetic), e.g. 10000 -> 16384.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        n_paths (int): Number of simulated price paths.
+        n_steps (int): Time discretization steps.
+        poly_degree (int): Degree of polynomial for regression.
+        seed (int): RNG seed for reproducibility.
+        chunk_size (int): Number of contracts simulated together.
+        greeks (bool): If True, return a PricingResult with Greeks and standard errors.
+        antithetic (bool): Use antithetic variates.
+        control_variate (bool): Use the European payoff as a control variate for the price.
+        sobol (bool): Use scrambled Sobol normals with a Brownian-bridge construction.
+        std_error (bool): If True, return a PricingResult with prices and their standard errors.
+
+    Returns:
+        np.ndarray: American option prices, one per contract, or a PricingResult of arrays.
+    """
+    # 1. Simulate Brownian paths once; every contract rescales the same draws
+    W = _brownian_paths(n_paths, n_steps, seed, antithetic, sobol)
+    n_blocks = SOBOL_REPLICATES if sobol else 1
 
-    # 3. Initialize cashflows: last time step payoff
-    cashflow = payoff[:, -1]
+    names = GREEK_NAMES if greeks else GREEK_NAMES[:1]
+    means = {name: np.full(len(batch), np.nan) for name in names}
+    std_errors = {name: np.full(len(batch), np.nan) for name in names}
+    for start in range(0, len(batch), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        samples = _simulate_lsm_chunk(batch[chunk], W, n_steps, poly_degree, greeks, control_variate)
+        if control_variate:
+            european = samples.pop('european')
+            exact = np.array([black_scholes_price(option) for option in batch[chunk]])
+            samples['price'] = _apply_control(samples['price'], european, exact)
+        for name, values in samples.items():
+            means[name][chunk], std_errors[name][chunk] = _mean_and_std_error(values, antithetic, n_blocks)
 
-    # 4. Backward induction
-    for t in range(n_steps - 2, 0, -1):
-        in_the_money = payoff[:, t] > 0
-        X = S_paths[in_the_money, t]
-        Y = cashflow[in_the_money] * discount
+    if not greeks:
+        if std_error:
+            return PricingResult(price=means['price'], std_error=PricingResult(price=std_errors['price']))
+        return means['price']
+
+    # Theta is not estimated on the paths
+    means['theta'] = std_errors['theta'] = None
+    return PricingResult(**means, std_error=PricingResult(**std_errors))
+
+@instrumented(name='lsm.paths')
+def _brownian_paths(n_paths, n_steps, seed, antithetic=False, sobol=False):
+    """
+    Brownian motion at t_1..t_n in units of sqrt(dt), shape (n_paths, n_steps).
+
+    With antithetic the second half of the paths mirrors the first. With
+    sobol the paths come in SOBOL_REPLICATES consecutive, independently
+    scrambled blocks built with a Brownian bridge, each of a power-of-two
+    size, so the number of draws is rounded up to SOBOL_REPLICATES * 2^k.
+    """
+    n_draws = n_paths // 2 if antithetic else n_paths
+    if antithetic and n_paths % 2:
+        raise ValueError("Antithetic variates need an even number of paths")
 
-        if len(X) < poly_degree + 1:
-            # Not enough points to fit the polynomial, skip regression
+    if sobol:
+        block_log2 = max(0, int(np.ceil(np.log2(n_draws / SOBOL_REPLICATES))))
+        seeds = np.random.SeedSequence(seed).spawn(SOBOL_REPLICATES)
+        uniforms = [qmc.Sobol(n_steps, seed=np.random.default_rng(s)).random_base2(block_log2) for s in seeds]
+        W = _brownian_bridge(norm.ppf(np.concatenate(uniforms)))
+    else:
+        np.random.seed(seed)
+        W = np.cumsum(np.random.normal(size=(n_draws, n_steps)), axis=1)
+
+    return np.concatenate([W, -W]) if antithetic else W
+
+def _brownian_bridge(Z):
+    """
+    Map normals (paths x steps), most important dimension first, to Brownian
+    motion at t_1..t_n in units of sqrt(dt): the first draw sets the endpoint,
+    the next ones the midpoints of ever finer intervals.
+    """
+    n = Z.shape[1]
+    W = np.empty_like(Z)
+    W[:, n - 1] = np.sqrt(n) * Z[:, 0]
+    intervals = [(0, n)]  # (left, right) time indices with W known at both ends; W_0 = 0
+    k = 1
+    for left, right in intervals:
+        if right - left < 2:
             continue
+        mid = (left + right) // 2
+        w_left = W[:, left - 1] if left > 0 else 0.0
+        # Conditional law of W_mid given both ends
+        W[:, mid - 1] = ((right - mid) * w_left + (mid - left) * W[:, right - 1]) / (right - left) \
+            + np.sqrt((mid - left) * (right - mid) / (right - left)) * Z[:, k]
+        k += 1
+        intervals += [(left, mid), (mid, right)]
+    return W
 
-        # Regression: estimate continuation value
-        coeffs = Polynomial.fit(X, Y, poly_degree).convert().coef
-        continuation = np.polyval(coeffs[::-1], X)
+def _apply_control(samples, control, exact):
+    """Control-variate adjusted samples with the variance-minimizing coefficient per contract."""
+    centred = control - control.mean(axis=1, keepdims=True)
+    variance = (centred**2).sum(axis=1)
+    covariance = (centred * (samples - samples.mean(axis=1, keepdims=True))).sum(axis=1)
+    coefficient = np.divide(covariance, variance, out=np.zeros_like(variance), where=variance > 0)
+    return samples - coefficient[:, None] * (control - exact[:, None])
+
+def _mean_and_std_error(samples, antithetic, n_blocks):
+    """Mean and standard error of per-path samples (contracts x paths) over independent units."""
+    if antithetic:
+        half = samples.shape[1] // 2
+        samples = 0.5 * (samples[:, :half] + samples[:, half:])
+    if n_blocks > 1:
+        samples = samples.reshape(len(samples), n_blocks, -1).mean(axis=2)
+    return samples.mean(axis=1), samples.std(axis=1, ddof=1) / np.sqrt(samples.shape[1])
+
+@instrumented(name='lsm.backward_induction')
+def _simulate_lsm_chunk(batch, W, n_steps, poly_degree, greeks, control_variate=False):
+    """
+    Run LSM for a chunk of contracts and return per-path samples (contracts x
+    paths) of the discounted payoff and, if requested, of the Greek estimators
+    and of the discounted European payoff.
+    """
+    S, K, T, r, sigma = (x[:, None] for x in (batch.S, batch.K, batch.T, batch.r, batch.sigma))
+    sign = np.where(batch.is_call, 1.0, -1.0)[:, None]
+    american = batch.is_american[:, None]
+    dt = T / n_steps
+    discount = np.exp(-r * dt)
+    drift = (r - 0.5 * sigma ** 2) * dt
+    vol = sigma * np.sqrt(dt)
+
+    def spot_and_payoff(t, W_t):
+        S_t = S * np.exp(drift * t + vol * W_t)
+        return S_t, np.maximum(sign * (S_t - K), 0)
+
+    # 2. Initialize cashflows: payoff at maturity
+    _, cashflow = spot_and_payoff(n_steps, W[:, -1])
+    exercise_step = np.full(cashflow.shape, n_steps)
+    european = np.exp(-r * T) * cashflow
+
+    # 3. Backward induction
+    n_coeffs = poly_degree + 1
+    hankel = np.add.outer(np.arange(n_coeffs), np.arange(n_coeffs))
+    for t in range(n_steps - 1, 0, -1):
+        cashflow *= discount  # value of the continuation cashflow at time t
+        S_t, payoff = spot_and_payoff(t, W[:, t - 1])
+        in_the_money = payoff > 0
+
+        # Regression on in-the-money paths: estimate continuation value.
+        # The basis is powers of centred moneyness, which keeps the normal
+        # equations well conditioned; they are assembled from power sums.
+        x = S_t / K - 1
+        weighted = in_the_money.astype(float)
+        power_sums = np.empty((len(x), 2 * n_coeffs - 1))
+        moments = np.empty((len(x), n_coeffs))
+        for k in range(2 * n_coeffs - 1):
+            power_sums[:, k] = weighted.sum(axis=1)
+            if k < n_coeffs:
+                moments[:, k] = (weighted * cashflow).sum(axis=1)
+            weighted *= x
+        gram = power_sums[:, hankel]
+
+        # Not enough points to fit the polynomial: skip regression for that contract
+        fitted = power_sums[:, 0] >= n_coeffs
+        gram[~fitted] = np.eye(n_coeffs)
+        coeffs = np.linalg.solve(gram, moments[..., None])[..., 0]
+        count('lsm.regressions', int(fitted.sum()))
+
+        # Horner evaluation of the fitted polynomial
+        continuation = np.zeros_like(x)
+        for k in range(poly_degree, -1, -1):
+            continuation *= x
+            continuation += coeffs[:, k:k + 1]
 
         # Exercise decision
-        exercise = payoff[in_the_money, t] > continuation
-        cashflow[in_the_money] = np.where(exercise, payoff[in_the_money, t], cashflow[in_the_money] * discount)
+        exercise = in_the_money & (payoff > continuation) & fitted[:, None] & american
+        cashflow = np.where(exercise, payoff, cashflow)
+        exercise_step[exercise] = t
+
+    # 4. Discount to time 0
+    samples = {'price': cashflow * discount}
+    if control_variate:
+        samples['european'] = european
+    if not greeks:
+        return samples
+
+    # 5. Greeks under the fitted (now fixed) exercise policy. The payoff is
+    # differentiated at the exercise time tau; by optimality of the policy
+    # the exercise boundary itself contributes nothing to first order.
+    W_tau = W[np.arange(W.shape[0]), exercise_step - 1]
+    tau = exercise_step * dt
+    S_tau, _ = spot_and_payoff(exercise_step, W_tau)
+    in_the_money = sign * (S_tau - K) > 0
+    payoff_slope = np.exp(-r * tau) * sign * in_the_money * S_tau  # discounted dPayoff/dlog(S_tau)
 
-    # 5. Discount to time 0
-    price = np.mean(cashflow) * discount
-    return price
+    samples['delta'] = payoff_slope / S
+    samples['vega'] = payoff_slope * (np.sqrt(dt) * W_tau - sigma * tau)
+    samples['rho'] = tau * (payoff_slope - samples['price'])
+    # Likelihood ratio on the first step on top of the pathwise delta
+    samples['gamma'] = samples['delta'] * (W[:, 0] / vol - 1) / S
+    return samples
@@ -0,0 +1,325 @@
+import numpy as np
+from core.cache import LRUCache
+from core.option import Option, OptionBatch
+from core.result import PricingResult
+from core.pricers.binomial import roll_back
+from core.pricers.fd_cn import price_american_fd_cn_batch
+from core.pricers.fd_implicit import price_american_fd_implicit_batch
+from core.pricers.fd_solver import solve_surface
+from core.profiling import instrumented
+
+# Moneyness window of the FD plans for contracts near the money
+DEFAULT_WINDOW = (2 / 3, 1.5)
+# Moneyness covered by FD plans at all; M grows with the window, so contracts beyond are priced directly
+PLAN_RANGE = (1 / 8, 8.0)
+
+class BinomialPlan:
+    """
+    CRR tree constants shared by every contract with the same (T, r, sigma, steps).
+
+    The up/down factors, discounted transition probabilities and the
+    terminal node powers u**(2j - steps) are computed once; pricing a
+    contract only scales them by its spot and strike. The spot enters every
+    node of a CRR tree, so each (S, K) pair still needs its own backward
+    induction, but all of them run as one stacked roll-back.
+
+    Attributes:
+        T, r, sigma (float): Shared contract terms
+        steps (int): Number of time steps in the tree
+    """
+
+    def __init__(self, T, r, sigma, steps):
+        self.T, self.r, self.sigma, self.steps = float(T), float(r), float(sigma), int(steps)
+        self.dt = self.T / self.steps
+        self.u = np.exp(self.sigma * np.sqrt(self.dt))
+        self.d = 1 / self.u
+        p = (np.exp(self.r * self.dt) - self.d) / (self.u - self.d)
+        discount = np.exp(-self.r * self.dt)
+        self.p_up, self.p_down = discount * p, discount * (1 - p)
+        self.powers = self.u ** (2 * np.arange(self.steps + 1)[:, None] - self.steps)
+
+    def price(self, S, K, is_call, is_american, greeks=False):
+        """
+        Price contracts that share the plan's (T, r, sigma).
+
+        Parameters:
+            S, K (np.ndarray): Spot and strike per contract.
+            is_call, is_american (np.ndarray): Boolean masks per contract.
+            greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+
+        Returns:
+            np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+        """
+        if greeks and self.steps < 2:
+            raise ValueError("Tree Greeks need at least 2 steps")
+        return roll_back(np.asarray(S, dtype=float), np.asarray(K, dtype=float), np.asarray(is_call),
+                         np.asarray(is_american), self.u, self.d, self.p_up, self.p_down, self.powers,
+                         self.dt, greeks)
+
+    def __repr__(self):
+        return f"BinomialPlan(T={self.T:g}, r={self.r:g}, sigma={self.sigma:g}, steps={self.steps})"
+
+class FDPlan:
+    """
+    One FD solve in moneyness coordinates, shared by every strike and spot
+    with the same (T, r, sigma, type, style) and grid settings.
+
+    Without dividends the Black-Scholes problem is homogeneous of degree one
+    in (S, K): V(S, K) = K v(S / K), where v is the value of the contract
+    with strike 1. The plan builds the grid, operator and tridiagonal
+    factorization once, solves v over a window of moneyness x = S / K, and
+    prices each contract by interpolating the solved surface:
+    delta = v'(x), gamma = v''(x) / K and theta = K dv/dt.
+
+    Contracts outside the default window (2/3, 1.5) get their own plans on
+    wider windows (see plan_window), whose M grows with the width of the
+    domain so the node spacing, and with it the accuracy, is kept. Windows
+    end at PLAN_RANGE, which bounds M at about 5 times its default.
+
+    Attributes:
+        surface (PriceSurface): Solved v over the moneyness grid
+        x_range (tuple): (low, high) moneyness window the grid was built to cover
+    """
+
+    def __init__(self, T, r, sigma, option_type, style, theta, M, N, exercise_method='brennan_schwartz',
+                 grid='sinh', rannacher_steps=0, x_range=DEFAULT_WINDOW):
+        self.option = Option(1.0, 1.0, T, r, sigma, option_type, style)
+        self.theta, self.M, self.N = theta, M, N
+        self.exercise_method, self.grid, self.rannacher_steps = exercise_method, grid, rannacher_steps
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.surface = solve_surface(self.option, M, N, theta, exercise_method, grid, self.x_range,
+                                     rannacher_steps=rannacher_steps)
+
+    def covers(self, x):
+        """Return True if every moneyness in x lies inside the plan's window."""
+        return self.x_range[0] <= np.min(x) and np.max(x) <= self.x_range[1]
+
+    def price(self, S, K, greeks=False):
+        """
+        Price contracts that share the plan's terms.
+
+        Parameters:
+            S, K (np.ndarray): Spot and strike per contract; S / K must lie in x_range.
+            greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+
+        Returns:
+            np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+        """
+        S, K = np.asarray(S, dtype=float), np.asarray(K, dtype=float)
+        x = S / K
+        if not self.covers(x):
+            raise ValueError(f"moneyness outside the plan window {self.x_range}; see plan_window")
+        price = K * self.surface.price(x)
+        if not greeks:
+            return price
+        return PricingResult(price=price, delta=self.surface.delta(x), gamma=self.surface.gamma(x) / K,
+                             theta=K * self.surface.theta(x))
+
+    def __repr__(self):
+        option = self.option
+        return (f"FDPlan(T={option.T:g}, r={option.r:g}, sigma={option.sigma:g}, {option.style} "
+                f"{option.option_type}, theta={self.theta:g}, M={self.M}, N={self.N}, grid='{self.grid}', "
+                f"x in [{self.x_range[0]:.3g}, {self.x_range[1]:.3g}])")
+
+class PlanCache(LRUCache):
+    """
+    Bounded LRU cache of pricing plans keyed on the shared contract terms
+    and method settings. Least recently used plans are evicted first.
+
+    Attributes:
+        maxsize (int): Maximum number of plans kept
+        hits, misses, evictions (int): Statistics, see LRUCache
+    """
+
+    def __init__(self, maxsize=256):
+        super().__init__(maxsize)
+
+    def binomial(self, T, r, sigma, steps):
+        """Return the BinomialPlan for (T, r, sigma, steps), building it on a miss."""
+        key = ('binomial', float(T), float(r), float(sigma), int(steps))
+        return self.get(key, lambda: BinomialPlan(T, r, sigma, steps))
+
+    def fd(self, T, r, sigma, option_type, style, theta, M, N, exercise_method, grid, rannacher_steps,
+           x_range=DEFAULT_WINDOW):
+        """
+        Return the FDPlan for the terms and a moneyness window from plan_window.
+
+        The window is part of the key, so contracts far from the money get
+        plans of their own and never coarsen the plan of the default window.
+        M is the number of steps on the default window; wider windows scale
+        it with the domain: [0, ~high] on the uniform and sinh grids, the
+        log-width of the window on the log grid. Windows must lie inside
+        PLAN_RANGE, which caps that growth.
+        """
+        x_range = (float(x_range[0]), float(x_range[1]))
+        if not PLAN_RANGE[0] <= x_range[0] < x_range[1] <= PLAN_RANGE[1]:
+            raise ValueError(f"FD plan windows must lie inside PLAN_RANGE {PLAN_RANGE}, got {x_range}")
+        key = ('fd', float(T), float(r), float(sigma), option_type, style, theta, M, N, exercise_method, grid,
+               rannacher_steps, x_range)
+        if grid == 'log':
+            scale = np.log(x_range[1] / x_range[0]) / np.log(DEFAULT_WINDOW[1] / DEFAULT_WINDOW[0])
+        else:
+            scale = x_range[1] / DEFAULT_WINDOW[1]
+        M = max(M, int(np.ceil(M * scale)))
+        return self.get(key, lambda: FDPlan(T, r, sigma, option_type, style, theta, M, N, exercise_method,
+                                            grid, rannacher_steps, x_range))
+
+default_plans = PlanCache()
+
+def plan_window(x):
+    """
+    Moneyness window of the FD plan that prices each contract.
+
+    Contracts inside DEFAULT_WINDOW share it; outside it the window edges
+    are rounded out to powers of two, so outliers fall into a few wider
+    windows instead of widening one window per contract. Contracts outside
+    PLAN_RANGE (including S = 0 and K = 0) get NaN edges: no plan covers them.
+
+    Parameters:
+        x (np.ndarray): Moneyness S / K per contract.
+
+    Returns:
+        tuple: (low, high) window edges per contract
+    """
+    x = np.asarray(x, dtype=float)
+    inside = (x >= PLAN_RANGE[0]) & (x <= PLAN_RANGE[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low = np.where(x >= DEFAULT_WINDOW[0], DEFAULT_WINDOW[0], 2.0 ** np.floor(np.log2(x)))
+        high = np.where(x <= DEFAULT_WINDOW[1], DEFAULT_WINDOW[1], 2.0 ** np.ceil(np.log2(x)))
+    return np.where(inside, low, np.nan), np.where(inside, high, np.nan)
+
+@instrumented
+def price_american_binomial_chain(batch: OptionBatch, steps: int = 100, greeks: bool = False, plans=None):
+    """
+    Price a batch of options on CRR trees, sharing one BinomialPlan per
+    distinct (T, r, sigma).
+
+    Gives the same prices as price_american_binomial_batch; the tree
+    constants of each group come from the plan cache instead of being
+    recomputed per contract.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        steps (int): Number of time steps in every tree.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        plans (PlanCache): Plan cache to use (default: the module-level default_plans).
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    plans = default_plans if plans is None else plans
+    keys = np.stack([batch.T, batch.r, batch.sigma], axis=1)
+
+    def price_group(members, terms):
+        plan = plans.binomial(*terms, steps)
+        return plan.price(batch.S[members], batch.K[members], batch.is_call[members], batch.is_american[members],
+                          greeks)
+    return _price_groups(keys, price_group, len(batch), greeks)
+
+@instrumented
+def price_american_fd_implicit_chain(batch: OptionBatch, M: int = 400, N: int = 100, greeks: bool = False,
+                                     exercise_method: str = 'brennan_schwartz', grid: str = 'sinh', plans=None):
+    """
+    Price a batch of options with the implicit FD method, one FDPlan solve
+    per distinct (T, r, sigma, type, style) and moneyness window (see plan_window).
+
+    Every contract of a group is read off the same moneyness surface, so a
+    chain of any length costs one grid solve plus an interpolation per
+    contract. See FDPlan. Contracts outside PLAN_RANGE are priced by
+    price_american_fd_implicit_batch on their own sinh grids.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        M (int): Number of moneyness steps of each plan's grid.
+        N (int): Number of time steps.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        exercise_method (str): How early exercise is enforced, see fd_solver.solve_backward.
+        grid (str): Node placement and coordinates, see fd_grid.build_grid.
+        plans (PlanCache): Plan cache to use (default: the module-level default_plans).
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    return _price_fd_chain(batch, 1.0, M, N, greeks, exercise_method, grid, 0, plans)
+
+@instrumented
+def price_american_fd_cn_chain(batch: OptionBatch, M: int = 400, N: int = 100, greeks: bool = False,
+                               exercise_method: str = 'brennan_schwartz', grid: str = 'sinh',
+                               rannacher_steps: int = 2, plans=None):
+    """
+    Price a batch of options with Crank-Nicolson, one FDPlan solve per
+    distinct (T, r, sigma, type, style) and moneyness window (see plan_window).
+
+    Every contract of a group is read off the same moneyness surface, so a
+    chain of any length costs one grid solve plus an interpolation per
+    contract. Strikes away from the money no longer sit on the payoff kink
+    of their own grid, so Rannacher start-up steps are on by default.
+    Contracts outside PLAN_RANGE are priced by price_american_fd_cn_batch
+    on their own sinh grids.
+
+    Parameters:
+        batch (OptionBatch): Contracts to price.
+        M (int): Number of moneyness steps of each plan's grid.
+        N (int): Number of time steps.
+        greeks (bool): If True, return a PricingResult with delta, gamma and theta.
+        exercise_method (str): How early exercise is enforced, see fd_solver.solve_backward.
+        grid (str): Node placement and coordinates, see fd_grid.build_grid.
+        rannacher_steps (int): Number of initial steps taken as two implicit half-steps.
+        plans (PlanCache): Plan cache to use (default: the module-level default_plans).
+
+    Returns:
+        np.ndarray: Option prices, one per contract, or a PricingResult of arrays
+    """
+    return _price_fd_chain(batch, 0.5, M, N, greeks, exercise_method, grid, rannacher_steps, plans)
+
+def _price_fd_chain(batch, theta, M, N, greeks, exercise_method, grid, rannacher_steps, plans):
+    plans = default_plans if plans is None else plans
+    with np.errstate(divide='ignore', invalid='ignore'):
+        low, high = plan_window(batch.S / batch.K)
+    planned = np.isfinite(low)
+    if not planned.all():
+        # Too far from the money (or at S = 0 or K = 0) for a plan: own sinh grids around spot and strike
+        inside, outside = np.flatnonzero(planned), np.flatnonzero(~planned)
+        if theta == 1.0:
+            direct = price_american_fd_implicit_batch(batch[outside], M, N, greeks, exercise_method, 'sinh')
+        else:
+            direct = price_american_fd_cn_batch(batch[outside], M, N, greeks, exercise_method, 'sinh',
+                                                rannacher_steps)
+        parts = [(outside, direct)]
+        if len(inside):
+            parts.append((inside, _price_fd_chain(batch[inside], theta, M, N, greeks, exercise_method, grid,
+                                                  rannacher_steps, plans)))
+        return _scatter(parts, len(batch), greeks)
+    # One group per distinct (T, r, sigma, is_call, is_american, window)
+    keys = np.stack([batch.T, batch.r, batch.sigma, batch.is_call, batch.is_american, low, high], axis=1)
+
+    def price_group(members, terms):
+        T, r, sigma, is_call, is_american, low, high = terms
+        plan = plans.fd(T, r, sigma, 'call' if is_call else 'put', 'american' if is_american else 'european',
+                        theta, M, N, exercise_method, grid, rannacher_steps, (low, high))
+        return plan.price(batch.S[members], batch.K[members], greeks)
+    return _price_groups(keys, price_group, len(batch), greeks)
+
+def _price_groups(keys, price_group, n, greeks):
+    """Run price_group(members, terms) for every distinct row of keys and scatter the results."""
+    unique, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.ravel()
+    parts = []
+    for g, terms in enumerate(unique):
+        members = np.flatnonzero(group == g)
+        parts.append((members, price_group(members, terms)))
+    return _scatter(parts, n, greeks)
+
+def _scatter(parts, n, greeks):
+    """Assemble (members, values) pairs covering contracts 0..n-1 into one result."""
+    price = np.empty(n)
+    delta, gamma, theta = (np.empty(n) for _ in range(3)) if greeks else (None, None, None)
+    for members, values in parts:
+        if greeks:
+            price[members], delta[members], gamma[members], theta[members] = (
+                values.price, values.delta, values.gamma, values.theta)
+        else:
+            price[members] = values
+    if not greeks:
+        return price
+    return PricingResult(price=price, delta=delta, gamma=gamma, theta=theta)
@@ -0,0 +1,202 @@
+import numpy as np
+from scipy.linalg.lapack import dgtsv
+from core.profiling import count
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+    """
+    Solve a stack of independent tridiagonal systems.
+
+    Row k of each argument describes system k: lower[k, i] multiplies
+    x[k, i - 1] and upper[k, i] multiplies x[k, i + 1] in equation i, so
+    lower[:, 0] and upper[:, -1] are ignored.
+
+    Parameters:
+        lower (np.ndarray): Sub-diagonals, shape (n, m).
+        diag (np.ndarray): Main diagonals, shape (n, m).
+        upper (np.ndarray): Super-diagonals, shape (n, m).
+        rhs (np.ndarray): Right-hand sides, shape (n, m).
+
+    Returns:
+        np.ndarray: Solutions, shape (n, m)
+    """
+    n, m = rhs.shape
+
+    if n == 1:
+        # A single system is solved faster by LAPACK than by a Python sweep
+        _, _, _, x, info = dgtsv(lower[0, 1:], diag[0], upper[0, :-1], rhs[0])
+        if info != 0:
+            raise np.linalg.LinAlgError("singular tridiagonal system")
+        return x[None, :]
+
+    # Thomas algorithm, vectorized across systems. Work on (m, n) copies so
+    # each sweep step touches one contiguous row.
+    lower, diag, upper, rhs = (np.ascontiguousarray(x.T) for x in (lower, diag, upper, rhs))
+    c_prime = np.empty((m, n))
+    x = np.empty((m, n))
+
+    beta = diag[0]
+    x[0] = rhs[0] / beta
+    for i in range(1, m):
+        c_prime[i - 1] = upper[i - 1] / beta
+        beta = diag[i] - lower[i] * c_prime[i - 1]
+        x[i] = (rhs[i] - lower[i] * x[i - 1]) / beta
+
+    for i in range(m - 2, -1, -1):
+        x[i] -= c_prime[i] * x[i + 1]
+
+    return x.T
+
+def solve_penalized(lower, diag, upper, rhs, obstacle, initial_guess, penalty=1e8, max_iter=50):
+    """
+    Solve a stack of tridiagonal linear complementarity problems
+    A x >= rhs, x >= obstacle, (A x - rhs) * (x - obstacle) = 0
+    by penalty iteration.
+
+    Nodes where the current iterate falls below the obstacle get a large
+    penalty term added to their row, which pins them to the obstacle; the
+    systems are re-solved until the set of pinned nodes stops changing.
+    Unlike Brennan-Schwartz this does not assume the exercise region is
+    contiguous at one end of the grid.
+
+    Parameters:
+        lower, diag, upper (np.ndarray): Matrix diagonals, shape (n, m), as in solve_tridiagonal.
+        rhs (np.ndarray): Right-hand sides, shape (n, m).
+        obstacle (np.ndarray): Lower bounds on x, shape (n, m); -inf where unconstrained.
+        initial_guess (np.ndarray): Starting iterate, e.g. the previous time slice.
+        penalty (float): Penalty weight.
+        max_iter (int): Maximum number of penalty iterations.
+
+    Returns:
+        np.ndarray: Solutions, shape (n, m)
+    """
+    active = initial_guess < obstacle
+    for _ in range(max_iter):
+        count('fd.penalty_iterations')
+        weight = np.where(active, penalty, 0.0)
+        x = solve_tridiagonal(lower, diag + weight, upper, rhs + np.where(active, penalty * obstacle, 0.0))
+        new_active = x < obstacle
+        if (new_active == active).all():
+            break
+        active = new_active
+    return np.maximum(x, obstacle)
+
+class TridiagonalFactorization:
+    """
+    Thomas (LU) factorization of a stack of tridiagonal matrices, computed
+    once and reused for every right-hand side.
+
+    The matrices of the implicit and Crank-Nicolson schemes do not change
+    between time steps, so only the O(m) substitution sweeps remain per step.
+    Systems flagged in `reverse` are eliminated from the last row towards
+    the first. This matters for Brennan-Schwartz, which needs the
+    elimination to start in the continuation region: at high S for puts
+    (reverse=True) and at low S for calls (reverse=False).
+
+    A single system runs the sweeps on Python floats, which is much faster
+    than NumPy calls on length-1 arrays.
+
+    Parameters:
+        lower, diag, upper (np.ndarray): Matrix diagonals, shape (n, m), as in solve_tridiagonal.
+        reverse (bool or np.ndarray): Per-system elimination direction.
+    """
+
+    def __init__(self, lower, diag, upper, reverse=False):
+        n, m = diag.shape
+        self.shape = (n, m)
+        self.reverse = np.broadcast_to(np.asarray(reverse, dtype=bool), (n,))
+        self._reverse_any = self.reverse.any()
+        self._reverse_all = self.reverse.all()
+
+        # Reversing the equation order swaps the roles of the off-diagonals
+        lower, upper = self._orient(lower, upper[:, ::-1]), self._orient(upper, lower[:, ::-1])
+        diag = self._orient(diag)
+
+        multipliers = np.zeros((m, n))
+        pivots = np.empty((m, n))
+        pivots[0] = diag[:, 0]
+        for i in range(1, m):
+            multipliers[i] = lower[:, i] / pivots[i - 1]
+            pivots[i] = diag[:, i] - multipliers[i] * upper[:, i - 1]
+
+        self._scalar = n == 1
+        self._multipliers = self._rows(multipliers.T)
+        self._inv_pivots = self._rows(1 / pivots.T)
+        self._upper = self._rows(upper)
+
+    def _orient(self, a, flipped=None):
+        """Put rows of reversed systems in elimination order."""
+        if not self._reverse_any:
+            return a
+        if flipped is None:
+            flipped = a[:, ::-1]
+        if self._reverse_all:
+            return flipped
+        return np.where(self.reverse[:, None], flipped, a)
+
+    def _rows(self, a):
+        """Split an (n, m) array into m per-equation rows (floats for a single system)."""
+        if self._scalar:
+            return a[0].tolist()
+        return list(np.ascontiguousarray(a.T))
+
+    def solve(self, rhs, obstacle=None):
+        """
+        Solve A x = rhs for every system.
+
+        If obstacle is given, run the Brennan-Schwartz algorithm instead: the
+        back substitution clips each unknown to max(x_i, obstacle_i) as soon as
+        it is computed, which solves the American (linear complementarity)
+        problem exactly in one sweep when the exercise region is contiguous at
+        the end of the grid where the substitution starts.
+
+        Parameters:
+            rhs (np.ndarray): Right-hand sides, shape (n, m).
+            obstacle (np.ndarray): Optional lower bounds on x, shape (n, m); -inf where unconstrained.
+
+        Returns:
+            np.ndarray: Solutions, shape (n, m)
+        """
+        n, m = self.shape
+        y = self._rows(self._orient(rhs))
+        bound = None if obstacle is None else self._rows(self._orient(obstacle))
+        sweep = self._sweep_scalar if self._scalar else self._sweep
+        x = np.array(sweep(y, bound), dtype=float).reshape(m, n).T
+        return self._orient(x)
+
+    def _sweep(self, y, bound):
+        """Substitution sweeps over per-equation rows, in place on y."""
+        m = len(y)
+        multipliers, inv_pivots, upper = self._multipliers, self._inv_pivots, self._upper
+
+        # Forward elimination
+        for i in range(1, m):
+            y[i] = y[i] - multipliers[i] * y[i - 1]
+
+        # Back substitution, projected onto the obstacle for Brennan-Schwartz
+        x = y[m - 1] * inv_pivots[m - 1]
+        if bound is not None:
+            x = np.maximum(x, bound[m - 1])
+        y[m - 1] = x
+        for i in range(m - 2, -1, -1):
+            x = (y[i] - upper[i] * x) * inv_pivots[i]
+            if bound is not None:
+                x = np.maximum(x, bound[i])
+            y[i] = x
+        return y
+
+    def _sweep_scalar(self, y, bound):
+        """Same as _sweep for a single system, written for Python float speed."""
+        m = len(y)
+        multipliers, inv_pivots, upper = self._multipliers, self._inv_pivots, self._upper
+
+        previous = y[0]
+        for i in range(1, m):
+            previous = y[i] = y[i] - multipliers[i] * previous
+
+        x = 0.0
+        for i in range(m - 1, -1, -1):
+            x = (y[i] - upper[i] * x) * inv_pivots[i]
+            if bound is not None and x < bound[i]:
+                x = bound[i]
+            y[i] = x
+        return y
@@ -0,0 +1,205 @@
+import csv
+import functools
+import io
+import json
+import time
+from contextvars import ContextVar
+
+# The profile collecting in the current thread / task, or None when profiling is off
+_current = ContextVar('american_pricing_profile', default=None)
+
+class Profile:
+    """
+    Per-phase timings and work counters, collected while the profile is active.
+
+    Use it as a context manager around any pricing code:
+
+        with Profile() as prof:
+            compute_all_greeks(price_american_binomial, option, 200)
+        print(prof.format())
+
+    Every function marked with @instrumented (the batch pricers, the FD and
+    tree solvers, the LSM regressions, the bump-and-reprice Greeks) records
+    its call count and wall time, and the solvers add counters such as
+    'binomial.nodes', 'fd.linear_solves' or 'lsm.regressions'. Phases nest:
+    'total' time includes nested phases, 'self' time does not. When no
+    profile is active an instrumented call costs one context-variable
+    lookup and nothing is recorded.
+
+    The active profile is held in a context variable, so profiles in
+    different threads (e.g. concurrent Streamlit sessions) do not mix.
+
+    Attributes:
+        phases (dict): Phase name -> [calls, total seconds, self seconds]
+        counters (dict): Counter name -> accumulated count
+        wall_time (float): Seconds the profile was active
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.wall_time = 0.0
+        self._children = []  # nested time of the phases currently running, innermost last
+        self._token = None
+        self._start = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_time += time.perf_counter() - self._start
+        _current.reset(self._token)
+        self._token = None
+        return False
+
+    def add(self, name, n=1):
+        """Add n to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other):
+        """Add the phases and counters of another profile (e.g. one collected in a worker thread)."""
+        for name, (calls, total, own) in other.phases.items():
+            stats = self.phases.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += calls
+            stats[1] += total
+            stats[2] += own
+        for name, value in other.counters.items():
+            self.add(name, value)
+
+    def _enter_phase(self):
+        self._children.append(0.0)
+        return time.perf_counter()
+
+    def _exit_phase(self, name, start):
+        elapsed = time.perf_counter() - start
+        nested = self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        stats = self.phases.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += elapsed - nested
+
+    def report(self):
+        """
+        Return the collected statistics as plain data.
+
+        Returns:
+            dict: {'wall_time_s', 'phases': list of dicts sorted by self time, 'counters': dict}
+        """
+        phases = [{
+            'phase': name,
+            'calls': calls,
+            'total_s': total,
+            'self_s': own,
+            'mean_ms': total / calls * 1e3,
+            'self_share': own / self.wall_time if self.wall_time else 0.0,
+        } for name, (calls, total, own) in self.phases.items()]
+        phases.sort(key=lambda row: row['self_s'], reverse=True)
+        return {'wall_time_s': self.wall_time, 'phases': phases, 'counters': dict(sorted(self.counters.items()))}
+
+    def to_json(self, path=None):
+        """Return the report as JSON text, and also write it to path if given."""
+        text = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path=None):
+        """
+        Return the report as CSV text (one row per phase, then one per
+        counter with its value in 'calls'), and also write it to path if given.
+        """
+        report = self.report()
+        fields = ('phase', 'calls', 'total_s', 'self_s', 'mean_ms', 'self_share')
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(report['phases'])
+        for name, value in report['counters'].items():
+            writer.writerow({'phase': f"counter:{name}", 'calls': value})
+        text = buffer.getvalue()
+        if path is not None:
+            with open(path, 'w', newline='') as f:
+                f.write(text)
+        return text
+
+    def format(self):
+        """Return the report as a text table."""
+        report = self.report()
+        lines = [f"Profiled wall time: {report['wall_time_s'] * 1e3:.2f} ms",
+                 f"{'phase':<40}{'calls':>8}{'total ms':>11}{'self ms':>11}{'self %':>8}"]
+        for row in report['phases']:
+            lines.append(f"{row['phase']:<40}{row['calls']:>8}{row['total_s'] * 1e3:>11.2f}"
+                         f"{row['self_s'] * 1e3:>11.2f}{row['self_share']:>8.1%}")
+        if report['counters']:
+            lines.append(f"{'counter':<40}{'count':>8}")
+            lines.extend(f"{name:<40}{value:>8}" for name, value in report['counters'].items())
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return (f"Profile({len(self.phases)} phases, {len(self.counters)} counters, "
+                f"wall_time={self.wall_time * 1e3:.2f} ms)")
+
+def active_profile():
+    """Return the profile collecting in this context, or None when profiling is off."""
+    return _current.get()
+
+def count(name, n=1):
+    """Add n to a counter of the active profile; does nothing when profiling is off."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, n)
+
+class phase:
+    """
+    Context manager timing a block as a named phase of the active profile.
+
+        with phase('fd.setup'):
+            ...
+
+    Does nothing when profiling is off.
+    """
+
+    __slots__ = ('name', 'profile', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.profile = _current.get()
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.start = self.profile._enter_phase()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile._exit_phase(self.name, self.start)
+        return False
+
+def instrumented(func=None, name=None):
+    """
+    Decorator recording every call of a function as a phase of the active
+    profile (named after the function unless name is given).
+
+    The wrapper keeps the function's signature, so capability checks such
+    as supports_native_greeks still see the original parameters.
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    phase_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        start = profile._enter_phase()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile._exit_phase(phase_name, start)
+    return wrapper
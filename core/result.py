@@ -0,0 +1,34 @@
+from dataclasses import dataclass, fields
+
+@dataclass
+class PricingResult:
+    """
+    Price and sensitivities returned by a pricer in one solve.
+
+    Fields are floats for a single option and NumPy arrays for a batch.
+    Greeks a pricer cannot read off its own lattice or grid are left as None.
+
+    Attributes:
+        price: Option price
+        delta: ∂V/∂S
+        gamma: ∂²V/∂S²
+        theta: ∂V/∂t (calendar time, per year)
+        vega: ∂V/∂σ
+        rho: ∂V/∂r
+        std_error: Standard errors of the fields above, for Monte Carlo pricers
+        error_estimate: Estimated discretization errors of the fields above,
+            for grid pricers run with Richardson extrapolation
+    """
+    price: float
+    delta: float = None
+    gamma: float = None
+    theta: float = None
+    vega: float = None
+    rho: float = None
+    std_error: 'PricingResult' = None
+    error_estimate: 'PricingResult' = None
+
+    def __getitem__(self, index):
+        """Return the result of contract `index` from a batch result."""
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        return PricingResult(**{k: None if v is None else v[index] for k, v in values.items()})
@@ -0,0 +1,199 @@
+import os
+import pickle
+import functools
+from concurrent.futures import CancelledError, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from core.greeks import compute_delta, compute_gamma, compute_theta
+from core.option import OptionBatch
+from core.pricers.fd_grid import supports_surface
+from core.profiling import Profile, active_profile, instrumented
+
+# Option terms a sweep can vary
+SWEEP_AXES = ('S', 'K', 'T', 'r', 'sigma')
+# Greeks a PriceSurface can read off the grid directly
+SURFACE_GREEKS = {compute_delta: 'delta', compute_gamma: 'gamma', compute_theta: 'theta'}
+
+class SweepResult:
+    """
+    A labeled array of prices or Greeks over one or more sweep axes.
+
+    values[i, j, ...] belongs to the option with the i-th value of the first
+    axis, the j-th of the second, and so on.
+
+    Attributes:
+        values (np.ndarray): Results, one dimension per axis
+        axes (dict): Axis name (an Option term) -> coordinates, in dimension order
+        quantity (str): What the values are, e.g. 'price' or 'delta'
+    """
+
+    def __init__(self, values, axes, quantity='price'):
+        self.values = np.asarray(values, dtype=float)
+        self.axes = dict(axes)
+        self.quantity = quantity
+
+    @property
+    def dims(self):
+        """Axis names, in dimension order."""
+        return tuple(self.axes)
+
+    def sel(self, **coords):
+        """
+        Return the sub-result at the coordinates nearest to the given values,
+        e.g. result.sel(sigma=0.2) for one slice of an (S, sigma) sweep.
+        """
+        index = []
+        for name, coords_ in self.axes.items():
+            index.append(int(np.abs(coords_ - coords[name]).argmin()) if name in coords else slice(None))
+        return SweepResult(self.values[tuple(index)], {name: c for name, c in self.axes.items() if name not in coords},
+                           self.quantity)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def __repr__(self):
+        axes = ", ".join(f"{name}: {len(c)} in [{c[0]:g}, {c[-1]:g}]" for name, c in self.axes.items())
+        return f"SweepResult({self.quantity}; {axes})"
+
+@instrumented
+def sweep(pricer, base_option, axes, steps=100, greek=None, executor='auto', workers=None, batch_pricer=None,
+          cancel=None):
+    """
+    Evaluate a price or a Greek over a grid of option terms, fanned out over a pool.
+
+    The grid is the Cartesian product of the axes, each a sequence of
+    values for one Option term (see SWEEP_AXES), e.g. {'S': spots} for a
+    spot ladder or {'S': spots, 'sigma': vols} for a heatmap. Every grid
+    point is base_option with those terms replaced.
+
+    The evaluations are split into tasks that run on the chosen executor:
+    - FD pricers with surface mode and an 'S' axis: one grid solve per
+      combination of the other axes prices the whole spot ladder (price,
+      delta, gamma and theta);
+    - with batch_pricer and no greek: the points are priced as OptionBatch
+      chunks, one vectorized call per task;
+    - otherwise chunks of points, one pricer (or Greek) call per point.
+
+    Parameters:
+        pricer (callable): Pricer called as pricer(option, steps).
+        base_option (Option): Option whose terms are swept.
+        axes (dict): Axis name -> values; the order sets the dimension order.
+        steps (int): Steps passed to the pricer.
+        greek (callable): Greek function from core.greeks, e.g. compute_delta (None: price).
+        executor: 'auto', 'serial', 'thread', 'process' or a concurrent.futures.Executor.
+            'auto' uses processes when there are several cores, enough tasks and
+            the pricer can be pickled (lambdas cannot), threads when it cannot.
+        workers (int): Pool size (default: the number of cores).
+        batch_pricer (callable): Optional batch pricer called as batch_pricer(batch, steps).
+        cancel (threading.Event): Stop early (raising CancelledError) once set;
+            tasks not yet started are dropped.
+
+    Returns:
+        SweepResult: Values of shape (len(axis) for each axis)
+    """
+    axes = {name: np.atleast_1d(np.asarray(values, dtype=float)) for name, values in dict(axes).items()}
+    unknown = set(axes) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"Unknown sweep axes {sorted(unknown)}; choose from {SWEEP_AXES}")
+    names = list(axes)
+    shape = tuple(len(values) for values in axes.values())
+    if greek is None:
+        quantity = 'price'
+    else:
+        quantity = SURFACE_GREEKS.get(greek, greek.__name__.replace('compute_', ''))
+
+    def point(index, dims):
+        return base_option.replace(**{name: axes[name][i] for name, i in zip(dims, index)})
+
+    if 'S' in axes and supports_surface(pricer) and (greek is None or greek in SURFACE_GREEKS):
+        spot_axis = names.index('S')
+        others = [name for name in names if name != 'S']
+        other_shape = shape[:spot_axis] + shape[spot_axis + 1:]
+        spots = axes['S']
+        tasks = [('surface', point(index, others), spots) for index in np.ndindex(other_shape)]
+        values = _run(tasks, pricer, greek, quantity, steps, batch_pricer, executor, workers, cancel)
+        values = np.moveaxis(np.reshape(values, other_shape + (len(spots),)), -1, spot_axis)
+        return SweepResult(values, axes, quantity)
+
+    options = [point(index, names) for index in np.ndindex(shape)]
+    kind = 'batch' if batch_pricer is not None and greek is None else 'points'
+    workers = workers or os.cpu_count() or 1
+    # A few tasks per worker balances the load without paying per-point dispatch
+    size = max(1, -(-len(options) // (4 * workers)))
+    tasks = [(kind, options[i:i + size], None) for i in range(0, len(options), size)]
+    values = _run(tasks, pricer, greek, quantity, steps, batch_pricer, executor, workers, cancel)
+    return SweepResult(np.reshape(values, shape), axes, quantity)
+
+def _evaluate(task, pricer, greek, quantity, steps, batch_pricer):
+    """Evaluate one sweep task; module level so process pools can pickle it."""
+    kind, payload, spots = task
+    if kind == 'surface':
+        surface = pricer(payload, steps, surface=True, S_range=(spots.min(), spots.max()))
+        return np.asarray(getattr(surface, quantity)(spots), dtype=float)
+    if kind == 'batch':
+        return np.asarray(batch_pricer(OptionBatch.from_options(payload), steps), dtype=float)
+    if greek is None:
+        return np.array([float(pricer(option, steps)) for option in payload])
+    return np.array([float(greek(pricer, option, steps)) for option in payload])
+
+def _profiled(evaluate, task):
+    """Evaluate a task under its own Profile, for pool workers that cannot see the caller's."""
+    with Profile() as profile:
+        value = evaluate(task)
+    return value, profile
+
+def _picklable(*objects):
+    try:
+        pickle.dumps(objects)
+        return True
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+
+def _run(tasks, pricer, greek, quantity, steps, batch_pricer, executor, workers, cancel):
+    """Run the tasks on the executor and concatenate their results in task order."""
+    evaluate = functools.partial(_evaluate, pricer=pricer, greek=greek, quantity=quantity, steps=steps,
+                                 batch_pricer=batch_pricer)
+    workers = workers or os.cpu_count() or 1
+    if executor == 'auto':
+        if workers == 1 or len(tasks) == 1:
+            executor = 'serial'
+        elif len(tasks) >= 2 * workers and _picklable(pricer, greek, batch_pricer):
+            executor = 'process'
+        else:
+            executor = 'thread'
+
+    if executor == 'serial':
+        results = []
+        for task in tasks:
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+            results.append(evaluate(task))
+        return np.concatenate(results)
+
+    if not isinstance(executor, Executor) and executor not in ('thread', 'process'):
+        raise ValueError("executor must be 'auto', 'serial', 'thread', 'process' or an Executor")
+    # Pool workers do not see the caller's profile: each task records its own and they are merged here
+    profile = active_profile()
+    if profile is not None:
+        evaluate = functools.partial(_profiled, evaluate)
+    if isinstance(executor, Executor):
+        return _gather(executor, evaluate, tasks, cancel, profile)
+    pool_type = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    with pool_type(max_workers=min(workers, len(tasks))) as pool:
+        return _gather(pool, evaluate, tasks, cancel, profile)
+
+def _gather(pool, evaluate, tasks, cancel, profile=None):
+    futures = [pool.submit(evaluate, task) for task in tasks]
+    try:
+        results = []
+        for future in futures:
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+            value = future.result()
+            if profile is not None:
+                value, task_profile = value
+                profile.merge(task_profile)
+            results.append(value)
+        return np.concatenate(results)
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,4 @@
+import sys
+from pipeline.price_book import main
+
+sys.exit(main())
@@ -0,0 +1,382 @@
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Add the project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.option import Option, OptionBatch
+from core.greeks import compute_all_greeks, compute_all_greeks_batch, compute_theta_batch
+from core.result import PricingResult
+from core.pricers.alo import price_american_alo_batch
+from core.pricers.baw import price_american_baw_batch
+from core.pricers.binomial import TREES, price_american_binomial_batch
+from core.pricers.bjerksund_stensland import price_american_bjerksund_stensland_batch
+from core.pricers.fd_cn import price_american_fd_cn_batch
+from core.pricers.fd_explicit import StabilityWarning, price_american_fd_explicit
+from core.pricers.fd_implicit import price_american_fd_implicit_batch
+from core.pricers.monte_carlo_lsm import price_american_mc_lsm_batch
+from core.pricers.plans import price_american_fd_cn_chain
+
+METHODS = ('binomial', 'fd_explicit', 'fd_implicit', 'fd_cn', 'fd_cn_chain', 'mc_lsm', 'baw',
+           'bjerksund_stensland', 'alo')
+# Methods whose greeks=True already gives vega and rho (pathwise or analytic), so they are not bumped
+# (mc_lsm gives no theta, which is bumped in maturity instead)
+NATIVE_GREEK_METHODS = ('mc_lsm', 'baw', 'bjerksund_stensland', 'alo')
+CONTRACT_FIELDS = ('S', 'K', 'T', 'r', 'sigma', 'option_type', 'style')
+GREEK_FIELDS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+
+def batch_pricer(method, settings):
+    """
+    Return the batch pricer of a method, called as pricer(batch, steps, greeks=False)
+    so it plugs into core.greeks.compute_all_greeks_batch.
+
+    Parameters:
+        method (str): One of METHODS.
+        settings (dict): steps, time_steps, grid, tree, richardson, paths, mc_steps and seed.
+
+    Returns:
+        callable: Batch pricer
+    """
+    steps = settings['steps']
+    time_steps = settings.get('time_steps') or steps
+    grid = settings.get('grid', 'uniform')
+    if method == 'binomial':
+        return lambda batch, _, greeks=False: price_american_binomial_batch(
+            batch, steps, greeks, settings.get('tree', 'crr'), settings.get('richardson', False))
+    if method == 'fd_explicit':
+        return lambda batch, _, greeks=False: _explicit_batch(batch, steps, time_steps, greeks)
+    if method == 'fd_implicit':
+        return lambda batch, _, greeks=False: price_american_fd_implicit_batch(batch, steps, time_steps, greeks,
+                                                                               grid=grid)
+    if method == 'fd_cn':
+        return lambda batch, _, greeks=False: price_american_fd_cn_batch(batch, steps, time_steps, greeks, grid=grid,
+                                                                         rannacher_steps=2)
+    if method == 'fd_cn_chain':
+        return lambda batch, _, greeks=False: price_american_fd_cn_chain(batch, steps, time_steps, greeks)
+    if method == 'mc_lsm':
+        return lambda batch, _, greeks=False: price_american_mc_lsm_batch(
+            batch, settings.get('paths', 10000), settings.get('mc_steps', 50), seed=settings.get('seed', 42),
+            greeks=greeks)
+    if method == 'baw':
+        return price_american_baw_batch
+    if method == 'bjerksund_stensland':
+        return price_american_bjerksund_stensland_batch
+    if method == 'alo':
+        return price_american_alo_batch
+    raise ValueError(f"method must be one of {METHODS}")
+
+def _explicit_batch(batch, M, N, greeks):
+    """The explicit scheme has no batch entry point; N is raised to the stability limit where needed."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', StabilityWarning)
+        results = [price_american_fd_explicit(option, M, N, greeks) for option in batch]
+    if not greeks:
+        return np.array(results)
+    return PricingResult(**{name: np.array([getattr(result, name) for result in results])
+                            for name in ('price', 'delta', 'gamma', 'theta')})
+
+def price_chunk(rows, method, settings, greeks=False):
+    """
+    Price one chunk of input rows; the unit of work sent to the worker processes.
+
+    Every row is validated by building an Option; rows that fail get an
+    'error' column and no price, the rest are priced as one OptionBatch.
+    With greeks the Greeks come from the pricer itself where it gives vega
+    and rho (NATIVE_GREEK_METHODS; a missing theta comes from
+    core.greeks.compute_theta_batch), otherwise from
+    core.greeks.compute_all_greeks_batch (compute_all_greeks for the
+    explicit scheme, which has no batch pricer).
+
+    Parameters:
+        rows (list): Input rows as dicts with at least S, K, T, r, sigma.
+        method (str): One of METHODS.
+        settings (dict): Method settings, see batch_pricer.
+        greeks (bool): Also compute delta, gamma, theta, vega and rho.
+
+    Returns:
+        list: Output rows (input columns plus price, the Greeks and error)
+    """
+    options, valid, output = [], [], []
+    for row in rows:
+        out = dict(row)
+        try:
+            options.append(Option(*(row[name] for name in CONTRACT_FIELDS[:5]),
+                                  option_type=row.get('option_type') or 'put', style=row.get('style') or 'american'))
+            valid.append(out)
+            out['error'] = ''
+        except (KeyError, TypeError, ValueError) as error:
+            out['error'] = f"{type(error).__name__}: {error}"
+        output.append(out)
+    if not options:
+        return output
+
+    batch = OptionBatch.from_options(options)
+    pricer = batch_pricer(method, settings)
+    try:
+        if not greeks:
+            result = PricingResult(price=np.asarray(pricer(batch, settings['steps']), dtype=float))
+        elif method in NATIVE_GREEK_METHODS:
+            result = pricer(batch, settings['steps'], greeks=True)
+            if result.theta is None:
+                # mc_lsm does not estimate theta on its paths. Reprice up to a week closer to expiry on the
+                # same paths (same seed); a bump of a day or less is swamped by the refitted exercise policy.
+                epsilon = np.minimum(1 / 52, 0.5 * batch.T)
+                result.theta = compute_theta_batch(pricer, batch, settings['steps'], epsilon, result.price)
+        elif method == 'fd_explicit':
+            # No batch pricer to stack the bumps into: Greeks contract by contract
+            single = lambda option, steps, greeks=False: pricer(OptionBatch.from_options([option]), steps, greeks)[0]
+            values = np.array([compute_all_greeks(single, option, settings['steps']) for option in options], dtype=float)
+            result = PricingResult(np.asarray(pricer(batch, settings['steps']), dtype=float), *values.T)
+        else:
+            result = compute_all_greeks_batch(pricer, batch, settings['steps'])
+    except Exception as error:  # one bad chunk must not stop the book
+        for out in valid:
+            out['error'] = f"{type(error).__name__}: {error}"
+        return output
+
+    fields = ('price',) + (GREEK_FIELDS if greeks else ())
+    for i, out in enumerate(valid):
+        for name in fields:
+            value = getattr(result, name)
+            out[name] = '' if value is None else float(value[i])
+    return output
+
+def read_chunks(path, chunk_size, input_format=None):
+    """
+    Stream input rows in chunks of chunk_size from a CSV or JSON-lines file.
+
+    Only one chunk is held in memory at a time.
+
+    Yields:
+        list: Rows as dicts
+    """
+    input_format = input_format or _format_of(path)
+    with open(path, newline='') as f:
+        if input_format == 'csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _format_of(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+class ResultWriter:
+    """
+    Append-only CSV or JSON-lines writer that flushes after every chunk and
+    reports its byte offset, so a checkpoint can cut off a half-written chunk.
+    """
+
+    def __init__(self, path, output_format, fields, resume_offset=None):
+        self.format = output_format
+        self.fields = fields
+        if resume_offset is None:
+            self.file = open(path, 'w', newline='')
+            self.header_written = False
+        else:
+            self.file = open(path, 'r+', newline='')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+            self.header_written = resume_offset > 0
+        self.csv = None
+
+    def write(self, rows):
+        if self.format == 'csv':
+            if self.csv is None:
+                self.csv = csv.DictWriter(self.file, fieldnames=self.fields, extrasaction='ignore', restval='')
+            if not self.header_written:
+                self.csv.writeheader()
+                self.header_written = True
+            self.csv.writerows(rows)
+        else:
+            for row in rows:
+                self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+def load_checkpoint(path, run):
+    """Return the saved checkpoint for this run, or raise if it belongs to a different one."""
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint['run'] != run:
+        raise ValueError(f"Checkpoint {path} was written by a different run: {checkpoint['run']}")
+    return checkpoint
+
+def save_checkpoint(path, run, chunks_done, output_offset, contracts):
+    """Atomically record that the first chunks_done chunks are in the output, up to output_offset bytes."""
+    temporary = path + ".tmp"
+    with open(temporary, 'w') as f:
+        json.dump({'run': run, 'chunks_done': chunks_done, 'output_offset': output_offset,
+                   'contracts': contracts}, f)
+    os.replace(temporary, path)
+
+def price_book(input_path, output_path, method='binomial', settings=None, greeks=False, chunk_size=1000,
+               workers=1, max_in_flight=None, resume=False, input_format=None, output_format=None, quiet=False):
+    """
+    Price a book of contracts from a file, streaming it chunk by chunk.
+
+    Chunks are priced on a process pool with at most max_in_flight chunks
+    submitted but not yet written; reading pauses until the oldest one is
+    written, so memory stays flat regardless of file size. Results are
+    written in input order and the output is flushed after every chunk.
+    After each chunk a checkpoint (output_path + '.checkpoint') records the
+    chunks done and the output size; with resume=True a crashed run picks
+    up after the last checkpointed chunk, truncating anything written past
+    it. The checkpoint is removed when the book is done.
+
+    Parameters:
+        input_path (str): CSV or JSON-lines file with S, K, T, r, sigma and optional option_type, style.
+        output_path (str): CSV or JSON-lines output.
+        method (str): One of METHODS.
+        settings (dict): Method settings, see batch_pricer.
+        greeks (bool): Also compute the five Greeks.
+        chunk_size (int): Contracts per chunk.
+        workers (int): Worker processes (1 prices in-process).
+        max_in_flight (int): Chunks in flight (default 2 * workers).
+        resume (bool): Continue from the checkpoint of an interrupted run.
+        input_format, output_format (str): 'csv' or 'jsonl' (default: from the file extension).
+        quiet (bool): Do not print progress.
+
+    Returns:
+        dict: Throughput summary
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    settings = dict({'steps': 100}, **(settings or {}))
+    output_format = output_format or _format_of(output_path)
+    max_in_flight = max_in_flight or 2 * workers
+    checkpoint_path = output_path + ".checkpoint"
+    run = {'input': os.path.abspath(input_path), 'method': method, 'settings': settings, 'greeks': greeks,
+           'chunk_size': chunk_size}
+
+    skip, offset, contracts = 0, None, 0
+    if resume and os.path.exists(checkpoint_path):
+        checkpoint = load_checkpoint(checkpoint_path, run)
+        skip, offset, contracts = checkpoint['chunks_done'], checkpoint['output_offset'], checkpoint['contracts']
+        if not quiet:
+            print(f"Resuming after chunk {skip} ({contracts} contracts already priced)")
+
+    chunks = read_chunks(input_path, chunk_size, input_format)
+    for _ in range(skip):
+        next(chunks, None)
+
+    writer = None
+    start = time.perf_counter()
+    stats = {'contracts': 0, 'failed': 0, 'chunks': 0}
+
+    def write(index, rows):
+        nonlocal writer, contracts
+        if writer is None:
+            extra = [name for name in rows[0] if name not in CONTRACT_FIELDS and name != 'error']
+            fields = list(CONTRACT_FIELDS) + [name for name in extra if name not in ('price',) + GREEK_FIELDS]
+            fields += ['price'] + (list(GREEK_FIELDS) if greeks else []) + ['error']
+            writer = ResultWriter(output_path, output_format, fields, offset)
+        end = writer.write(rows)
+        contracts += len(rows)
+        stats['contracts'] += len(rows)
+        stats['failed'] += sum(1 for row in rows if row['error'])
+        stats['chunks'] += 1
+        save_checkpoint(checkpoint_path, run, index + 1, end, contracts)
+        if not quiet:
+            elapsed = time.perf_counter() - start
+            print(f"chunk {index + 1}: {contracts} contracts written, "
+                  f"{stats['contracts'] / elapsed:,.0f} contracts/s", flush=True)
+
+    try:
+        if workers <= 1:
+            for index, rows in enumerate(chunks, start=skip):
+                write(index, price_chunk(rows, method, settings, greeks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight, done, next_index = {}, {}, skip
+                index = skip
+                exhausted = False
+                while not exhausted or in_flight or done:
+                    # Top up to max_in_flight chunks (submitted or finished but not yet written)
+                    while not exhausted and len(in_flight) + len(done) < max_in_flight:
+                        rows = next(chunks, None)
+                        if rows is None:
+                            exhausted = True
+                            break
+                        in_flight[pool.submit(price_chunk, rows, method, settings, greeks)] = index
+                        index += 1
+                    if in_flight:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            done[in_flight.pop(future)] = future.result()
+                    # Write finished chunks in input order
+                    while next_index in done:
+                        write(next_index, done.pop(next_index))
+                        next_index += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if not os.path.exists(output_path):
+        # Empty input: still leave a (header-only) output behind
+        open(output_path, 'w').close()
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    elapsed = time.perf_counter() - start
+    summary = dict(stats, seconds=elapsed, contracts_per_second=stats['contracts'] / elapsed if elapsed else 0.0,
+                   skipped_chunks=skip, method=method, workers=workers)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price a book of option contracts from a CSV or JSON-lines file, "
+                                                 "streaming it in chunks.")
+    parser.add_argument("input", help="CSV or JSON-lines file with columns S, K, T, r, sigma[, option_type, style]")
+    parser.add_argument("output", help="Output CSV or JSON-lines file")
+    parser.add_argument("--method", choices=METHODS, default='binomial', help="Pricing method")
+    parser.add_argument("--steps", type=int, default=100, help="Tree steps, or asset steps M of the FD grids")
+    parser.add_argument("--time-steps", type=int, help="FD time steps N (default: --steps)")
+    parser.add_argument("--grid", choices=('uniform', 'log', 'sinh'), default='uniform', help="FD grid")
+    parser.add_argument("--tree", choices=TREES, default='crr', help="Binomial tree variant")
+    parser.add_argument("--richardson", action='store_true',
+                        help="Extrapolate binomial prices from steps and steps / 2 (leisen_reimer and bbs trees)")
+    parser.add_argument("--paths", type=int, default=10000, help="Monte Carlo paths")
+    parser.add_argument("--mc-steps", type=int, default=50, help="Monte Carlo time steps")
+    parser.add_argument("--seed", type=int, default=42, help="Monte Carlo seed")
+    parser.add_argument("--greeks", action='store_true', help="Also compute delta, gamma, theta, vega and rho")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Contracts per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 prices in-process)")
+    parser.add_argument("--max-in-flight", type=int, help="Chunks in flight at once (default: 2 x workers)")
+    parser.add_argument("--resume", action='store_true', help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--input-format", choices=('csv', 'jsonl'), help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=('csv', 'jsonl'), help="Default: from the file extension")
+    parser.add_argument("--quiet", action='store_true', help="Only print the summary")
+    args = parser.parse_args(argv)
+    if args.method == 'binomial' and args.richardson and args.tree == 'crr':
+        parser.error("--richardson needs a smooth tree: --tree leisen_reimer or bbs")
+
+    settings = {'steps': args.steps, 'time_steps': args.time_steps, 'grid': args.grid, 'tree': args.tree,
+                'richardson': args.richardson, 'paths': args.paths, 'mc_steps': args.mc_steps, 'seed': args.seed}
+    summary = price_book(args.input, args.output, args.method, settings, args.greeks, args.chunk_size, args.workers,
+                         args.max_in_flight, args.resume, args.input_format, args.output_format, args.quiet)
+    print(f"Priced {summary['contracts']} contracts in {summary['chunks']} chunks ({summary['failed']} failed) "
+          f"in {summary['seconds']:.2f} s: {summary['contracts_per_second']:,.0f} contracts/s "
+          f"with {summary['method']} on {summary['workers']} worker(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
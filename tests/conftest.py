@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The repo is not installed as a package: make `core` and `pipeline` importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
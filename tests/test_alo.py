@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from core.greeks import compute_all_greeks, compute_delta, compute_vega
+from core.implied_vol import CONVERGED, implied_vol
+from core.option import Option, OptionBatch
+from core.pricers.alo import exercise_boundary, price_american_alo, price_american_alo_batch
+from core.pricers.binomial import price_american_binomial_batch
+from core.sweep import sweep
+
+@pytest.fixture
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+def test_alo_matches_a_fine_tree():
+    batch = OptionBatch(100.0, [80.0, 100.0, 120.0], [0.5, 1.0, 2.0], 0.05, [0.2, 0.25, 0.3], 'put', 'american')
+    np.testing.assert_allclose(price_american_alo_batch(batch), price_american_binomial_batch(batch, 2000), atol=5e-3)
+
+def test_steps_are_ignored(put):
+    assert price_american_alo(put, 10) == price_american_alo(put, 500) == price_american_alo(put)
+
+def test_exercise_boundary_reprices_the_batch(put):
+    boundary = exercise_boundary(put.T, put.r, put.sigma)
+    assert boundary.price(put.S, put.K) == pytest.approx(price_american_alo(put), abs=1e-10)
+
+def test_compute_all_greeks(put):
+    native = compute_all_greeks(price_american_alo, put, 100)
+    price = lambda option, steps: price_american_alo(option)
+    bumped = [compute_delta(price, put), compute_vega(price, put)]
+    assert all(np.isfinite(native))
+    np.testing.assert_allclose([native[0], native[3]], bumped, rtol=1e-4)
+
+def test_sweep_point_and_batch_pricers_agree(put):
+    spots = np.linspace(80, 120, 9)
+    expected = price_american_alo_batch(OptionBatch(spots, put.K, put.T, put.r, put.sigma, 'put', 'american'))
+    points = sweep(price_american_alo, put, {'S': spots}, executor='serial')
+    batched = sweep(price_american_alo, put, {'S': spots}, executor='serial', batch_pricer=price_american_alo_batch)
+    np.testing.assert_allclose(points.values, expected, rtol=1e-12)
+    np.testing.assert_allclose(batched.values, expected, rtol=1e-12)
+
+def test_implied_vol_round_trip():
+    sigma = np.array([0.15, 0.25, 0.4])
+    batch = OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, sigma, 'put', 'american')
+    prices = price_american_alo_batch(batch)
+    result = implied_vol(prices, batch, batch_pricer=price_american_alo_batch)
+    assert (result.status == CONVERGED).all()
+    np.testing.assert_allclose(result.sigma, sigma, atol=1e-5)
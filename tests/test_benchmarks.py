@@ -0,0 +1,48 @@
+import copy
+import csv
+import json
+import os
+
+import pytest
+
+from benchmarks.suite import RESULT_FIELDS, compare, contract_grid, main, reference_prices, run_suite, write_results
+
+@pytest.fixture(scope='module')
+def report():
+    return run_suite(['baw', 'alo', 'binomial'], max_resolution=50, repeats=1, verbose=False)
+
+def test_suite_rows_cover_the_selected_sweeps(report):
+    assert [(row['pricer'], row['resolution']) for row in report['results']] == [
+        ('baw', 0), ('alo', 4), ('alo', 8), ('alo', 16), ('alo', 32), ('binomial', 25), ('binomial', 50)]
+    batch, labels = contract_grid()
+    assert len(report['contracts']) == len(batch) == 24 and labels[0] == 'put OTM T=0.1 vol=0.15'
+    errors = {row['resolution']: row['max_abs_error'] for row in report['results'] if row['pricer'] == 'alo'}
+    assert errors[32] < errors[4] and errors[32] < 1e-3
+    assert (reference_prices(batch) > 0).all()
+    with pytest.raises(ValueError, match="Unknown pricers"):
+        run_suite(['trinomial'], verbose=False)
+
+def test_results_are_written_as_json_and_csv(report, tmp_path):
+    path = write_results(report, str(tmp_path))
+    with open(path) as f:
+        assert json.load(f)['results'] == report['results']
+    with open(tmp_path / 'results.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert tuple(rows[0]) == RESULT_FIELDS and len(rows) == len(report['results'])
+
+def test_compare_flags_slowdowns_and_accuracy_regressions(report):
+    baseline = copy.deepcopy(report)
+    assert not any(row['flags'] for row in compare(report, baseline))
+    for row in baseline['results']:
+        if row['pricer'] == 'binomial':
+            row['time_s'] /= 10
+            row['max_abs_error'] /= 10
+    flagged = {row['resolution']: row['flags'] for row in compare(report, baseline) if row['flags']}
+    assert set(flagged) == {25, 50} and 'LESS ACCURATE' in flagged[25]
+
+def test_command_line_run_and_compare(tmp_path, capsys):
+    output = str(tmp_path / 'run')
+    assert main(['run', '--pricers', 'baw', '--no-plot', '--repeats', '1', '--output', output]) == 0
+    results = os.path.join(output, 'results.json')
+    assert main(['compare', results, results]) == 0
+    assert "0 of 1 measurements flagged" in capsys.readouterr().out
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from core.option import Option, OptionBatch
+from core.pricers.alo import price_american_alo_batch
+from core.pricers.binomial import price_american_binomial, price_american_binomial_batch
+from utils.validators import black_scholes_price_batch
+
+TREES = ('crr', 'leisen_reimer', 'bbs')
+
+@pytest.fixture(scope='module')
+def puts():
+    return OptionBatch(100.0, [80.0, 90.0, 100.0, 110.0, 120.0], [0.25, 0.5, 1.0, 1.0, 2.0], 0.05,
+                       [0.2, 0.3, 0.25, 0.2, 0.4], 'put', 'american')
+
+@pytest.fixture(scope='module')
+def reference(puts):
+    return price_american_alo_batch(puts, n_nodes=48, n_quadrature=96, n_iterations=24, n_pricing=128)
+
+@pytest.mark.parametrize('tree', TREES)
+def test_batch_matches_single_contracts(puts, tree):
+    single = [price_american_binomial(puts[i], 101, tree=tree) for i in range(len(puts))]
+    np.testing.assert_allclose(price_american_binomial_batch(puts, 101, tree=tree), single, rtol=1e-14)
+
+@pytest.mark.parametrize('tree, steps, tolerance', [
+    ('crr', 500, 2e-2),
+    ('leisen_reimer', 201, 5e-3),
+    ('bbs', 201, 5e-3),
+])
+def test_american_puts_converge(puts, reference, tree, steps, tolerance):
+    np.testing.assert_allclose(price_american_binomial_batch(puts, steps, tree=tree), reference, rtol=5e-4,
+                               atol=tolerance)
+
+@pytest.mark.parametrize('tree', ('leisen_reimer', 'bbs'))
+def test_richardson_tightens_smooth_trees(puts, reference, tree):
+    plain = np.abs(price_american_binomial_batch(puts, 100, tree=tree) - reference).max()
+    result = price_american_binomial_batch(puts, 100, greeks=True, tree=tree, richardson=True)
+    assert np.abs(result.price - reference).max() < plain
+    assert result.error_estimate is not None and np.all(np.isfinite(result.delta))
+
+def test_leisen_reimer_european_prices_match_black_scholes():
+    batch = OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, 0.25, ['call', 'put', 'put'], 'european')
+    np.testing.assert_allclose(price_american_binomial_batch(batch, 101, tree='leisen_reimer'),
+                               black_scholes_price_batch(batch), atol=1e-3)
+
+@pytest.mark.parametrize('tree', TREES)
+def test_tree_greeks_match_bumps(tree):
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+    result = price_american_binomial(option, 301, greeks=True, tree=tree)
+    up, down = (price_american_binomial(option.replace(S=S), 301, tree=tree) for S in (101.0, 99.0))
+    assert result.price == pytest.approx(price_american_binomial(option, 301, tree=tree), rel=1e-14)
+    assert result.delta == pytest.approx((up - down) / 2, abs=5e-3)
+    assert result.theta < 0 and result.gamma > 0
+
+def test_invalid_settings_are_rejected(puts):
+    with pytest.raises(ValueError, match="tree must be one of"):
+        price_american_binomial_batch(puts, 100, tree='trinomial')
+    with pytest.raises(ValueError, match="richardson needs a smoothly converging tree"):
+        price_american_binomial_batch(puts, 100, richardson=True)
+    with pytest.raises(ValueError, match="at least 3 steps"):
+        price_american_binomial_batch(puts, 2, greeks=True, tree='bbs')
@@ -0,0 +1,72 @@
+import dataclasses
+import threading
+
+import pytest
+
+from core.cache import LRUCache, PricingCache
+from core.greeks import supports_native_greeks
+from core.option import Option
+from core.pricers.binomial import price_american_binomial
+
+@pytest.fixture
+def put():
+    return Option(100, 100, 1, 0.05, 0.25, 'PUT', 'American')
+
+def test_options_are_immutable_hashable_values(put):
+    assert put == Option(100.0, 100.0, 1.0, 0.05, 0.25) and hash(put) == hash(Option(100.0, 100.0, 1.0, 0.05, 0.25))
+    assert isinstance(put.S, float) and put.option_type == 'put'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        put.S = 101.0
+    bumped = put.replace(S=101.0)
+    assert bumped.S == 101.0 and put.S == 100.0 and len({put, bumped}) == 2
+    with pytest.raises(ValueError):
+        put.replace(T=0.0)
+
+def test_lru_eviction_and_statistics():
+    cache = LRUCache(maxsize=2)
+    calls = []
+    build = lambda key: lambda: calls.append(key) or key * 10
+    assert [cache.get(key, build(key)) for key in (1, 2, 1, 3, 2)] == [10, 20, 10, 30, 20]
+    # 2 was the least recently used entry when 3 arrived
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2, 'hit_rate': 0.2}
+    assert cache.pop(3) == 30 and len(cache) == 1
+    cache.clear()
+    assert cache.stats()['misses'] == 0 and len(cache) == 0
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+def test_pricing_cache_keys_on_pricer_settings_and_option(put):
+    calls = []
+    def pricer(option, steps, greeks=False):
+        calls.append((option, steps))
+        return price_american_binomial(option, steps, greeks)
+
+    cache = PricingCache(maxsize=16)
+    first = cache.price(pricer, put, 50)
+    assert cache.price(pricer, Option(100.0, 100.0, 1.0, 0.05, 0.25), 50) == first
+    cache.price(pricer, put, 60)
+    cache.price(pricer, put.replace(S=101.0), 50)
+    assert len(calls) == 3 and cache.hits == 1
+
+    result = cache.price(pricer, put, 50, greeks=True)
+    result.delta = 0.0
+    assert cache.price(pricer, put, 50, greeks=True).delta != 0.0
+
+def test_quantized_requests_share_a_result(put):
+    cache = PricingCache(quantize={'S': 0.01})
+    price = cache.price(price_american_binomial, put.replace(S=100.001), 50)
+    assert cache.price(price_american_binomial, put.replace(S=99.998), 50) == price
+    assert price == price_american_binomial(put, 50) and cache.hits == 1
+
+def test_cached_pricer_keeps_the_signature(put):
+    cache = PricingCache()
+    cached = cache.cached(lambda option, steps, greeks=False: price_american_binomial(option, steps, greeks),
+                          key=('binomial', 'crr'))
+    assert supports_native_greeks(cached)
+    threads = [threading.Thread(target=cached, args=(put, 50)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cached(put, 50) == price_american_binomial(put, 50) and len(cache) == 1
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from core.greeks import compute_all_greeks, compute_delta, compute_rho, compute_vega
+from core.implied_vol import CONVERGED, implied_vol
+from core.option import Option, OptionBatch
+from core.price_grid import build_price_grid
+from core.pricers.baw import price_american_baw, price_american_baw_batch
+from core.pricers.binomial import price_american_binomial_batch
+from core.pricers.bjerksund_stensland import (price_american_bjerksund_stensland,
+                                              price_american_bjerksund_stensland_batch)
+from core.sweep import sweep
+from utils.validators import black_scholes_price_batch
+
+PRICERS = [(price_american_baw, price_american_baw_batch),
+           (price_american_bjerksund_stensland, price_american_bjerksund_stensland_batch)]
+
+@pytest.fixture
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+@pytest.mark.parametrize('pricer, batch_pricer', PRICERS)
+def test_prices_are_close_to_a_fine_tree(pricer, batch_pricer):
+    batch = OptionBatch(100.0, [80.0, 100.0, 120.0], [0.5, 1.0, 2.0], 0.05, [0.2, 0.25, 0.3], 'put', 'american')
+    np.testing.assert_allclose(batch_pricer(batch), price_american_binomial_batch(batch, 2000), rtol=1e-2, atol=1e-2)
+
+@pytest.mark.parametrize('pricer, batch_pricer', PRICERS)
+def test_calls_and_european_contracts_get_black_scholes(pricer, batch_pricer):
+    batch = OptionBatch(100.0, [90.0, 110.0, 90.0, 110.0], 1.0, 0.05, 0.25, ['call', 'call', 'put', 'put'],
+                        ['american', 'american', 'european', 'european'])
+    np.testing.assert_allclose(batch_pricer(batch, 100), black_scholes_price_batch(batch), rtol=1e-12)
+
+@pytest.mark.parametrize('pricer, batch_pricer', PRICERS)
+def test_compute_all_greeks(pricer, batch_pricer, put):
+    native = compute_all_greeks(pricer, put, 100)
+    bumped = [compute_delta(pricer, put, 100), compute_vega(pricer, put, 100), compute_rho(pricer, put, 100)]
+    assert all(np.isfinite(native))
+    np.testing.assert_allclose([native[0], native[3], native[4]], bumped, rtol=1e-3)
+
+@pytest.mark.parametrize('pricer, batch_pricer', PRICERS)
+def test_sweep_point_and_batch_pricers_agree(pricer, batch_pricer, put):
+    spots, vols = np.linspace(80, 120, 5), np.array([0.2, 0.3])
+    S, sigma = np.meshgrid(spots, vols, indexing='ij')
+    expected = batch_pricer(OptionBatch(S.ravel(), put.K, put.T, put.r, sigma.ravel(), 'put', 'american'))
+    points = sweep(pricer, put, {'S': spots, 'sigma': vols}, executor='serial')
+    batched = sweep(pricer, put, {'S': spots, 'sigma': vols}, executor='serial', batch_pricer=batch_pricer)
+    np.testing.assert_allclose(points.values.ravel(), expected, rtol=1e-12)
+    np.testing.assert_allclose(batched.values.ravel(), expected, rtol=1e-12)
+
+@pytest.mark.parametrize('pricer, batch_pricer', PRICERS)
+def test_implied_vol_round_trip(pricer, batch_pricer):
+    sigma = np.array([0.15, 0.25, 0.4])
+    batch = OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, sigma, 'put', 'american')
+    result = implied_vol(batch_pricer(batch), batch, batch_pricer=batch_pricer)
+    assert (result.status == CONVERGED).all()
+    np.testing.assert_allclose(result.sigma, sigma, atol=1e-5)
+
+def test_price_grid_takes_a_closed_form(tmp_path):
+    grid = build_price_grid(str(tmp_path / "baw.grid"), price_american_baw_batch, np.linspace(0.8, 1.2, 9),
+                            [0.5, 1.0], [0.2, 0.3], [0.05], greeks=True, validate=64)
+    batch = OptionBatch(100.0, 100.0, 1.0, 0.05, 0.2, 'put', 'american')
+    assert grid.price_batch(batch)[0] == pytest.approx(price_american_baw_batch(batch)[0], rel=1e-12)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from core.option import Option, OptionBatch
+from core.pricers.fd_explicit import StabilityWarning, price_american_fd_explicit
+from utils.validators import black_scholes_price_batch
+
+def reference_loop(option, M, N):
+    # The original node-by-node scheme the vectorized solver replaced
+    S, K, T, r, sigma = option.S, option.K, option.T, option.r, option.sigma
+    is_call = option.option_type == 'call'
+    S_max, dt = 2 * S, T / N
+    stock_prices = np.linspace(0, S_max, M + 1)
+    grid = np.zeros((M + 1, N + 1))
+    grid[:, -1] = np.maximum(stock_prices - K, 0) if is_call else np.maximum(K - stock_prices, 0)
+    discounted = K * np.exp(-r * dt * (N - np.arange(N + 1)))
+    if is_call:
+        grid[-1, :] = S_max - discounted
+    else:
+        grid[0, :] = discounted
+    for j in reversed(range(N)):
+        for i in range(1, M):
+            a = 0.5 * dt * (sigma ** 2 * i ** 2 - r * i)
+            b = 1 - dt * (sigma ** 2 * i ** 2 + r)
+            c = 0.5 * dt * (sigma ** 2 * i ** 2 + r * i)
+            grid[i, j] = a * grid[i - 1, j + 1] + b * grid[i, j + 1] + c * grid[i + 1, j + 1]
+            if option.style == 'american':
+                grid[i, j] = max(grid[i, j], stock_prices[i] - K if is_call else K - stock_prices[i])
+    return np.interp(S, stock_prices, grid[:, 0])
+
+@pytest.mark.parametrize('option', [
+    Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american'),
+    Option(100.0, 110.0, 0.5, 0.03, 0.4, 'put', 'american'),
+    Option(100.0, 90.0, 1.0, 0.05, 0.2, 'call', 'american'),
+    Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'european'),
+])
+def test_matches_the_node_by_node_scheme(option):
+    assert price_american_fd_explicit(option, 40, 400) == pytest.approx(reference_loop(option, 40, 400), rel=1e-12)
+
+def test_european_prices_match_black_scholes():
+    batch = OptionBatch(100.0, [90.0, 110.0], 1.0, 0.05, 0.25, ['put', 'call'], 'european')
+    prices = [price_american_fd_explicit(option, 100, 1000) for option in batch]
+    np.testing.assert_allclose(prices, black_scholes_price_batch(batch), atol=2e-2)
+
+def test_unstable_time_steps_are_raised_with_a_warning():
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+    with pytest.warns(StabilityWarning) as record:
+        price = price_american_fd_explicit(option, 50, 10)
+    warning = record[0].message
+    assert warning.N_requested == 10 and warning.N_used > 10 and warning.dt_stable < warning.dt
+    assert record[0].filename == __file__
+    assert price == price_american_fd_explicit(option, 50, warning.N_used)
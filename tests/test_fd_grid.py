@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from core.option import Option, OptionBatch
+from core.pricers.fd_cn import price_american_fd_cn, price_american_fd_cn_batch
+from core.pricers.fd_grid import build_grid
+from core.pricers.fd_implicit import price_american_fd_implicit, price_american_fd_implicit_batch
+
+@pytest.fixture
+def batch():
+    return OptionBatch(100.0, [90.0, 110.0], 1.0, 0.05, 0.25, 'put', 'american')
+
+@pytest.mark.parametrize('grid', ['log', 'sinh'])
+def test_grids_cover_n_std_and_keep_spot_and_strike_on_nodes(batch, grid):
+    for n_std in (3.0, 6.0):
+        nodes, log_coordinates = build_grid(batch, 100, grid, n_std=n_std)
+        assert log_coordinates == (grid == 'log')
+        assert (np.diff(nodes, axis=1) > 0).all()
+        np.testing.assert_allclose(nodes[:, -1], np.maximum(batch.S, batch.K) * np.exp(n_std * 0.25))
+        for row, S, K in zip(nodes, batch.S, batch.K):
+            assert S in row and K in row
+
+@pytest.mark.parametrize('pricer', [price_american_fd_implicit_batch, price_american_fd_cn_batch])
+def test_pricers_pass_the_grid_controls_on(batch, pricer):
+    default = pricer(batch, 200, 200, grid='sinh')
+    assert np.array_equal(pricer(batch, 200, 200, grid='sinh', n_std=4.0, cluster_width=0.05), default)
+    for settings in ({'n_std': 6.0}, {'cluster_width': 0.2}):
+        prices = pricer(batch, 200, 200, grid='sinh', **settings)
+        assert not np.array_equal(prices, default)
+        np.testing.assert_allclose(prices, default, atol=0.05)
+
+@pytest.mark.parametrize('pricer', [price_american_fd_implicit, price_american_fd_cn])
+def test_surface_mode_passes_n_std_on(pricer):
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25)
+    surface = pricer(option, 100, 100, grid='sinh', surface=True, n_std=2.0)
+    assert surface.stock_prices[-1] == pytest.approx(100.0 * np.exp(2.0 * 0.25))
+
+def test_sinh_grid_prices_zero_spot_and_strike():
+    batch = OptionBatch([0.0, 0.0, 0.0, 100.0, 100.0], [100.0, 100.0, 100.0, 0.0, 0.0], 1.0, 0.05, 0.25,
+                        ['put', 'put', 'call', 'put', 'call'], ['american', 'european', 'american', 'american',
+                                                                'american'])
+    expected = [100.0, 100.0 * np.exp(-0.05), 0.0, 0.0, 100.0]
+    for pricer in (price_american_fd_implicit_batch, price_american_fd_cn_batch):
+        result = pricer(batch, 100, 100, greeks=True, grid='sinh')
+        np.testing.assert_allclose(result.price, expected, atol=1e-6)
+        assert np.isfinite(result.delta).all() and np.isfinite(result.gamma).all()
+
+@pytest.mark.parametrize('S, K', [(0.0, 100.0), (100.0, 0.0)])
+def test_log_grid_rejects_zero_spot_or_strike(S, K):
+    with pytest.raises(ValueError, match="log grid"):
+        price_american_fd_cn_batch(OptionBatch(S, K, 1.0, 0.05, 0.25), 100, 100, grid='log')
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from core.option import OptionBatch
+from core.pricers.alo import price_american_alo_batch
+from core.pricers.fd_cn import price_american_fd_cn_batch
+from core.pricers.fd_implicit import price_american_fd_implicit_batch
+from core.pricers.tridiagonal import TridiagonalFactorization, solve_penalized, solve_tridiagonal
+from core.profiling import Profile
+
+FD_PRICERS = (price_american_fd_implicit_batch, price_american_fd_cn_batch)
+
+@pytest.fixture(scope='module')
+def puts():
+    return OptionBatch(100.0, [80.0, 90.0, 100.0, 110.0, 120.0], [0.25, 0.5, 1.0, 1.0, 2.0], 0.05,
+                       [0.2, 0.3, 0.25, 0.2, 0.4], 'put', 'american')
+
+@pytest.fixture(scope='module')
+def reference(puts):
+    # ALO at high resolution is accurate to well below the FD discretization error
+    return price_american_alo_batch(puts, n_nodes=48, n_quadrature=96, n_iterations=24, n_pricing=128)
+
+def black_scholes(batch):
+    sign = np.where(batch.is_call, 1.0, -1.0)
+    d1 = (np.log(batch.S / batch.K) + (batch.r + 0.5 * batch.sigma ** 2) * batch.T) / (batch.sigma * np.sqrt(batch.T))
+    d2 = d1 - batch.sigma * np.sqrt(batch.T)
+    return sign * (batch.S * norm.cdf(sign * d1) - batch.K * np.exp(-batch.r * batch.T) * norm.cdf(sign * d2))
+
+def random_systems(rng, n, m):
+    lower, upper = rng.uniform(-1, 0, (2, n, m))
+    diag = 2.5 + rng.uniform(0, 1, (n, m))
+    return lower, diag, upper, rng.normal(size=(n, m))
+
+def dense(lower, diag, upper):
+    return np.diag(diag) + np.diag(lower[1:], -1) + np.diag(upper[:-1], 1)
+
+@pytest.mark.parametrize('n', [1, 4])
+def test_tridiagonal_solvers_match_dense(n):
+    rng = np.random.default_rng(0)
+    lower, diag, upper, rhs = random_systems(rng, n, 12)
+    expected = np.array([np.linalg.solve(dense(*abc), b) for *abc, b in zip(lower, diag, upper, rhs)])
+
+    np.testing.assert_allclose(solve_tridiagonal(lower, diag, upper, rhs), expected, rtol=1e-10, atol=1e-12)
+    for reverse in (False, True, np.arange(n) % 2 == 0):
+        factorization = TridiagonalFactorization(lower, diag, upper, reverse=reverse)
+        np.testing.assert_allclose(factorization.solve(rhs), expected, rtol=1e-10, atol=1e-12)
+
+def test_brennan_schwartz_solves_the_complementarity_problem():
+    # A put-like obstacle: binding at the low end, where the reverse sweep ends
+    rng = np.random.default_rng(1)
+    lower, diag, upper, _ = random_systems(rng, 3, 20)
+    obstacle = np.tile(np.maximum(1.0 - np.linspace(0, 2, 20), 0), (3, 1))
+    rhs = np.full((3, 20), 0.1)
+    x = TridiagonalFactorization(lower, diag, upper, reverse=True).solve(rhs, obstacle)
+    residual = np.array([dense(*abc) @ xk for *abc, xk in zip(lower, diag, upper, x)]) - rhs
+    assert (x >= obstacle - 1e-12).all() and (residual >= -1e-10).all()
+    np.testing.assert_allclose(residual * (x - obstacle), 0, atol=1e-10)
+    np.testing.assert_allclose(solve_penalized(lower, diag, upper, rhs, obstacle, obstacle), x, atol=1e-6)
+
+@pytest.mark.parametrize('pricer, factorizations', [
+    (lambda batch: price_american_fd_implicit_batch(batch, 100, 50), 1),
+    (lambda batch: price_american_fd_cn_batch(batch, 100, 50, rannacher_steps=2), 2),
+])
+def test_systems_are_factorized_once_per_scheme(puts, pricer, factorizations):
+    with Profile() as profile:
+        pricer(puts)
+    assert profile.counters['fd.factorizations'] == factorizations * len(puts)
+    assert profile.counters['fd.linear_solves'] >= 50
+
+def test_unknown_exercise_method_is_rejected(puts):
+    with pytest.raises(ValueError, match="exercise_method"):
+        price_american_fd_cn_batch(puts, 50, 50, exercise_method='psor')
+
+@pytest.mark.parametrize('pricer, grid, tolerance', [
+    (price_american_fd_implicit_batch, 'uniform', 0.1),
+    (price_american_fd_implicit_batch, 'sinh', 3e-2),
+    (price_american_fd_cn_batch, 'uniform', 0.1),
+    (price_american_fd_cn_batch, 'sinh', 1e-2),
+])
+def test_american_put_matches_alo(puts, reference, pricer, grid, tolerance):
+    prices = pricer(puts, 200, 200, grid=grid)
+    np.testing.assert_allclose(prices, reference, atol=tolerance)
+
+def test_rannacher_and_richardson_tighten_cn(puts, reference):
+    rannacher = price_american_fd_cn_batch(puts, 200, 200, grid='sinh', rannacher_steps=2)
+    np.testing.assert_allclose(rannacher, reference, atol=5e-3)
+
+    extrapolated = price_american_fd_cn_batch(puts, 200, 200, grid='sinh', rannacher_steps=2, richardson=2)
+    np.testing.assert_allclose(extrapolated.price, reference, atol=1e-3)
+    assert extrapolated.error_estimate is not None
+
+@pytest.mark.parametrize('pricer', FD_PRICERS)
+def test_exercise_methods_agree(puts, pricer):
+    prices = {method: pricer(puts, 200, 200, exercise_method=method, grid='sinh')
+              for method in ('brennan_schwartz', 'projection', 'penalty')}
+
+    # Brennan-Schwartz and the penalty iteration both solve the same LCP exactly
+    np.testing.assert_allclose(prices['penalty'], prices['brennan_schwartz'], atol=1e-6)
+    # Projection applies the constraint after the linear solve: first order in dt
+    np.testing.assert_allclose(prices['projection'], prices['brennan_schwartz'], atol=2e-2)
+
+def test_european_cn_matches_black_scholes():
+    batch = OptionBatch(100.0, [80.0, 100.0, 120.0, 90.0], [0.5, 1.0, 2.0, 1.0], 0.05, [0.2, 0.25, 0.3, 0.2],
+                        ['put', 'put', 'call', 'call'], 'european')
+    prices = price_american_fd_cn_batch(batch, 200, 200, grid='sinh', rannacher_steps=2)
+    np.testing.assert_allclose(prices, black_scholes(batch), atol=5e-3)
+
+def test_american_call_without_dividends_is_european():
+    batch = OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, 0.25, 'call', 'american')
+    prices = price_american_fd_cn_batch(batch, 200, 200, grid='sinh', rannacher_steps=2)
+    np.testing.assert_allclose(prices, black_scholes(batch), atol=5e-3)
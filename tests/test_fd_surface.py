@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from core.option import Option
+from core.pricers.fd_cn import price_american_fd_cn
+from core.pricers.fd_grid import PriceSurface
+from core.pricers.fd_implicit import price_american_fd_implicit
+
+SPOTS = np.linspace(80, 120, 9)
+
+@pytest.fixture
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+@pytest.mark.parametrize('pricer', [price_american_fd_implicit, price_american_fd_cn])
+def test_one_solve_prices_the_whole_ladder(put, pricer):
+    surface = pricer(put, 400, 200, surface=True, S_range=(SPOTS[0], SPOTS[-1]))
+    assert isinstance(surface, PriceSurface)
+    assert surface.stock_prices[0] <= SPOTS[0] and surface.stock_prices[-1] >= SPOTS[-1]
+    single = [pricer(put.replace(S=S), 400, 200, greeks=True) for S in SPOTS]
+    np.testing.assert_allclose(surface.price(SPOTS), [r.price for r in single], atol=1e-2)
+    np.testing.assert_allclose(surface.delta(SPOTS), [r.delta for r in single], atol=2e-3)
+    np.testing.assert_allclose(surface.gamma(SPOTS), [r.gamma for r in single], atol=5e-4)
+    np.testing.assert_allclose(surface.theta(SPOTS), [r.theta for r in single], atol=2e-2)
+
+def test_all_times_keeps_every_slice(put):
+    surface = price_american_fd_implicit(put, 200, 50, surface=True, all_times=True)
+    assert len(surface.times) == 51 and surface.times[0] == 0.0 and surface.times[-1] == pytest.approx(put.T)
+    # At maturity the value is the payoff; in between, it decays towards it
+    np.testing.assert_allclose(surface.price(SPOTS, put.T), np.maximum(put.K - SPOTS, 0), atol=1e-9)
+    assert (surface.price(SPOTS, 0.5) <= surface.price(SPOTS) + 1e-9).all()
+    assert surface.price(100.0) == pytest.approx(price_american_fd_implicit(put, 200, 50), abs=1e-2)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from core.greeks import (compute_all_greeks, compute_all_greeks_batch, compute_gamma, compute_theta,
+                         compute_theta_batch, supports_native_greeks)
+from core.option import Option, OptionBatch
+from core.pricers.alo import price_american_alo
+from core.pricers.binomial import price_american_binomial, price_american_binomial_batch
+from core.pricers.fd_cn import price_american_fd_cn, price_american_fd_cn_batch
+from core.pricers.fd_explicit import price_american_fd_explicit
+from core.pricers.fd_implicit import price_american_fd_implicit
+from core.profiling import Profile
+
+@pytest.fixture
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+def bumped_only(pricer):
+    # Hides the greeks parameter, so compute_all_greeks falls back to bumping everything
+    return lambda option, steps: pricer(option, steps)
+
+@pytest.fixture(scope='module')
+def reference():
+    # High-resolution ALO Greeks are accurate well below the lattice and grid errors
+    put = Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+    result = price_american_alo(put, greeks=True, n_nodes=48, n_quadrature=96, n_iterations=24, n_pricing=128)
+    return [result.delta, result.gamma, result.theta, result.vega, result.rho]
+
+@pytest.mark.parametrize('pricer, steps', [
+    (price_american_binomial, 400),
+    (price_american_fd_implicit, 200),
+    (price_american_fd_cn, 200),
+    (lambda o, s, greeks=False: price_american_fd_explicit(o, s, 8 * s, greeks), 100),
+])
+def test_native_greeks_are_accurate(put, reference, pricer, steps):
+    assert supports_native_greeks(pricer) and not supports_native_greeks(bumped_only(pricer))
+    native = compute_all_greeks(pricer, put, steps)
+    for name, value, expected, rtol in zip(('delta', 'gamma', 'theta', 'vega', 'rho'), native, reference,
+                                           (5e-3, 5e-3, 1e-2, 2e-3, 2e-3)):
+        assert value == pytest.approx(expected, rel=rtol), name
+
+def test_native_gamma_avoids_the_bump_noise(put, reference):
+    # A small spot bump on a tree straddles the nodes: gamma is off by orders of magnitude
+    assert abs(compute_gamma(price_american_binomial, put, 400) / reference[1] - 1) > 1
+    assert abs(compute_all_greeks(price_american_binomial, put, 400)[1] / reference[1] - 1) < 5e-3
+
+def test_native_greeks_save_pricer_calls(put):
+    with Profile() as native:
+        compute_all_greeks(price_american_binomial, put, 100)
+    with Profile() as bumped:
+        compute_all_greeks(bumped_only(price_american_binomial), put, 100)
+    assert native.phases['price_american_binomial_batch'][0] == 5
+    assert bumped.phases['price_american_binomial_batch'][0] == 11
+
+@pytest.mark.parametrize('batch_pricer', [
+    price_american_binomial_batch,
+    lambda batch, steps, greeks=False: price_american_fd_cn_batch(batch, steps, steps, greeks, grid='sinh',
+                                                                  rannacher_steps=2),
+])
+def test_batch_greeks_match_the_single_contract_greeks(batch_pricer):
+    batch = OptionBatch(100.0, [90.0, 100.0, 110.0], [0.5, 1.0, 1.5], 0.05, [0.2, 0.25, 0.3], 'put', 'american')
+    result = compute_all_greeks_batch(batch_pricer, batch, 200)
+    single = lambda option, steps, greeks=False: batch_pricer(OptionBatch.from_options([option]), steps, greeks)[0]
+    for i, option in enumerate(batch):
+        expected = compute_all_greeks(single, option, 200)
+        np.testing.assert_allclose([result.delta[i], result.gamma[i], result.theta[i], result.vega[i], result.rho[i]],
+                                   expected, rtol=1e-6, atol=1e-8)
+
+def test_theta_batch_matches_compute_theta():
+    batch = OptionBatch(100.0, [90.0, 110.0], [1.0, 5e-5], 0.05, 0.25, 'put', 'american')
+    theta = compute_theta_batch(price_american_binomial_batch, batch, 100)
+    assert theta[0] == pytest.approx(compute_theta(price_american_binomial, batch[0], 100), rel=1e-10)
+    # Maturities inside the bump have no one-sided difference
+    assert np.isnan(theta[1])
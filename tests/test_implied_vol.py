@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from core.implied_vol import (ABOVE_MAX_VOL, BELOW_INTRINSIC, BELOW_MIN_VOL, CONVERGED, NO_TIME_VALUE,
+                              implied_vol)
+from core.option import OptionBatch
+from core.pricers.binomial import price_american_binomial_batch
+from core.pricers.fd_cn import price_american_fd_cn_batch
+
+@pytest.fixture
+def chain():
+    return OptionBatch(100.0, [80.0, 90.0, 100.0, 110.0, 120.0, 100.0], [0.25, 0.5, 1.0, 1.0, 2.0, 0.5], 0.05,
+                       [0.15, 0.3, 0.25, 0.2, 0.45, 0.6], ['put', 'put', 'put', 'call', 'put', 'call'], 'american')
+
+def test_recovers_binomial_volatilities(chain):
+    market = price_american_binomial_batch(chain, 200)
+    result = implied_vol(market, chain, steps=200)
+    assert list(result.status) == [CONVERGED] * len(chain)
+    np.testing.assert_allclose(result.sigma, chain.sigma, atol=1e-5)
+    assert np.all(np.abs(result.residual) <= 1e-6)
+
+def test_fd_batch_pricer(chain):
+    pricer = lambda batch, steps: price_american_fd_cn_batch(batch, steps, steps, grid='sinh', rannacher_steps=2)
+    market = pricer(chain, 100)
+    result = implied_vol(market, chain, batch_pricer=pricer, steps=100)
+    np.testing.assert_allclose(result.sigma, chain.sigma, atol=1e-5)
+    assert result[2].status == CONVERGED and result[2].sigma == pytest.approx(0.25, abs=1e-5)
+
+def test_quotes_without_a_solution_are_flagged():
+    batch = OptionBatch(100.0, [120.0, 150.0, 100.0, 100.0, 100.0], 1.0, 0.05, 0.2,
+                        ['put', 'put', 'put', 'call', 'put'], 'american')
+    # Below intrinsic, at intrinsic deep in the money, above the strike, above the spot, worthless
+    market = [15.0, 50.0, 101.0, 100.0, 0.0]
+    result = implied_vol(market, batch, steps=100)
+    assert list(result.status) == [BELOW_INTRINSIC, NO_TIME_VALUE, ABOVE_MAX_VOL, ABOVE_MAX_VOL, NO_TIME_VALUE]
+    assert np.all(np.isnan(result.sigma))
+
+def test_quotes_outside_sigma_bounds_are_flagged():
+    batch = OptionBatch(100.0, 100.0, 1.0, 0.05, [0.1, 0.9], 'put', 'american')
+    market = price_american_binomial_batch(batch, 100)
+    result = implied_vol(market, batch, steps=100, sigma_bounds=(0.2, 0.8))
+    assert list(result.status) == [BELOW_MIN_VOL, ABOVE_MAX_VOL]
+    assert np.all(np.isnan(result.sigma))
@@ -0,0 +1,62 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import core.pricers.lsm_engine as lsm_engine
+from core.option import Option, OptionBatch
+from core.pricers.alo import price_american_alo_batch
+from core.pricers.lsm_engine import price_american_mc_lsm_engine, price_american_mc_lsm_engine_batch
+
+SETTINGS = dict(n_paths=20000, n_steps=30, shard_size=4096, antithetic=True, control_variate=True)
+
+@pytest.fixture(scope='module')
+def puts():
+    return OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, 0.25, 'put', 'american')
+
+def test_price_is_within_a_few_standard_errors_of_alo(puts):
+    result = price_american_mc_lsm_engine_batch(puts, 100000, 50, std_error=True)
+    reference = price_american_alo_batch(puts)
+    # LSM on 50 exercise dates is a little below the continuously exercisable price
+    assert (np.abs(result.price - reference) < 4 * result.std_error.price + 0.05).all()
+
+def test_single_contract_matches_batch(puts):
+    prices = price_american_mc_lsm_engine_batch(puts, **SETTINGS)
+    assert price_american_mc_lsm_engine(puts[1], **SETTINGS) == prices[1]
+
+def test_worker_pool_is_bit_identical_and_started_once(puts, monkeypatch):
+    serial = price_american_mc_lsm_engine_batch(puts, chunk_size=1, **SETTINGS)
+    started = []
+    pool_type = lsm_engine._ShardPool
+
+    def counting_pool(*args):
+        started.append(args)
+        return pool_type(*args)
+
+    monkeypatch.setattr(lsm_engine, '_ShardPool', counting_pool)
+    pooled = price_american_mc_lsm_engine_batch(puts, chunk_size=1, n_workers=2, **SETTINGS)
+    np.testing.assert_array_equal(pooled, serial)
+    assert len(started) == 1
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_policy_paths_streams_the_remaining_shards(puts, n_workers):
+    full = price_american_mc_lsm_engine_batch(puts, **SETTINGS)
+    np.testing.assert_array_equal(price_american_mc_lsm_engine_batch(puts, policy_paths=10 ** 6, **SETTINGS), full)
+    streamed = price_american_mc_lsm_engine_batch(puts, policy_paths=8192, n_workers=n_workers, std_error=True,
+                                                  **SETTINGS)
+    np.testing.assert_allclose(streamed.price, full, atol=4 * streamed.std_error.price.max())
+    if n_workers > 1:
+        serial = price_american_mc_lsm_engine_batch(puts, policy_paths=8192, **SETTINGS)
+        np.testing.assert_array_equal(streamed.price, serial)
+
+def test_policy_paths_keep_memory_flat():
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25)
+
+    def peak(n_paths):
+        tracemalloc.start()
+        price_american_mc_lsm_engine(option, n_paths, 20, shard_size=4096, policy_paths=8192)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    assert peak(64 * 4096) < 1.5 * peak(8 * 4096)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from core.option import Option
+from core.pricers.alo import price_american_alo
+from core.pricers.monte_carlo_lsm import _brownian_paths, price_american_mc_lsm
+
+MODES = [dict(antithetic=True), dict(control_variate=True), dict(sobol=True),
+         dict(antithetic=True, control_variate=True, sobol=True)]
+
+@pytest.fixture(scope='module')
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+@pytest.fixture(scope='module')
+def reference(put):
+    return price_american_alo(put, greeks=True)
+
+def within(estimate, std_error, expected, bias):
+    # LSM on 50 exercise dates is biased a little low against continuous exercise
+    return abs(estimate - expected) < 4 * std_error + bias
+
+def test_greeks_on_the_pricing_paths(put, reference):
+    result = price_american_mc_lsm(put, 20000, 50, greeks=True)
+    assert result.price == price_american_mc_lsm(put, 20000, 50)
+    assert result.theta is None and result.std_error.theta is None
+    for name, bias in (('price', 0.1), ('delta', 0.005), ('gamma', 0.001), ('vega', 0.5), ('rho', 0.5)):
+        assert within(getattr(result, name), getattr(result.std_error, name), getattr(reference, name), bias), name
+
+@pytest.mark.parametrize('settings', MODES)
+def test_variance_reduction_shrinks_the_standard_error(put, reference, settings):
+    plain = price_american_mc_lsm(put, 20000, 50, std_error=True)
+    reduced = price_american_mc_lsm(put, 20000, 50, std_error=True, **settings)
+    assert reduced.std_error.price < 0.7 * plain.std_error.price
+    assert within(reduced.price, reduced.std_error.price, reference.price, 0.1)
+    assert price_american_mc_lsm(put, 20000, 50, **settings) == reduced.price
+
+def test_sobol_rounds_the_paths_up_to_power_of_two_blocks():
+    assert _brownian_paths(10000, 8, 0, sobol=True).shape == (16384, 8)
+    assert _brownian_paths(10000, 8, 0, antithetic=True, sobol=True).shape == (16384, 8)
+    assert _brownian_paths(16386, 8, 0, antithetic=True, sobol=True).shape == (32768, 8)
+    W = _brownian_paths(1000, 8, 0, antithetic=True)
+    np.testing.assert_array_equal(W[:500], -W[500:])
+    with pytest.raises(ValueError, match="even number of paths"):
+        _brownian_paths(1001, 8, 0, antithetic=True)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from core.option import Option, OptionBatch
+from core.pricers.alo import price_american_alo, price_american_alo_batch
+from core.pricers.binomial import price_american_binomial, price_american_binomial_batch
+from core.pricers.fd_cn import price_american_fd_cn, price_american_fd_cn_batch
+from core.pricers.fd_implicit import price_american_fd_implicit, price_american_fd_implicit_batch
+from core.pricers.monte_carlo_lsm import price_american_mc_lsm, price_american_mc_lsm_batch
+
+@pytest.fixture
+def chain():
+    return OptionBatch(100.0, [90.0, 100.0, 110.0], 1.0, 0.05, [0.2, 0.25, 0.3], ['put', 'Call', 'put'],
+                       ['american', 'american', 'EUROPEAN'])
+
+def test_scalars_broadcast_against_arrays(chain):
+    assert len(chain) == 3
+    np.testing.assert_array_equal(chain.S, [100.0] * 3)
+    np.testing.assert_array_equal(chain.is_call, [False, True, False])
+    np.testing.assert_array_equal(chain.is_american, [True, True, False])
+
+def test_indexing_and_round_trip(chain):
+    options = list(chain)
+    assert options[1] == Option(100.0, 100.0, 1.0, 0.05, 0.25, 'call', 'american')
+    assert chain[2].style == 'european'
+    sub = chain[[2, 0]]
+    assert isinstance(sub, OptionBatch) and list(sub) == [options[2], options[0]]
+    assert list(chain[1:]) == options[1:]
+    rebuilt = OptionBatch.from_options(options)
+    for name in ('S', 'K', 'T', 'r', 'sigma', 'is_call', 'is_american'):
+        np.testing.assert_array_equal(getattr(rebuilt, name), getattr(chain, name))
+
+@pytest.mark.parametrize('terms, message', [
+    (dict(option_type='straddle'), "option_type"),
+    (dict(style='bermudan'), "style"),
+    (dict(sigma=[0.2, -0.1]), "non-negative"),
+    (dict(T=[1.0, 0.0]), "greater than 0"),
+])
+def test_invalid_contracts_are_rejected(terms, message):
+    arguments = dict(S=100.0, K=[90.0, 110.0], T=1.0, r=0.05, sigma=0.2) | terms
+    with pytest.raises(ValueError, match=message):
+        OptionBatch(**arguments)
+
+@pytest.mark.parametrize('pricer, batch_pricer, args', [
+    (price_american_binomial, price_american_binomial_batch, (100,)),
+    (price_american_fd_implicit, price_american_fd_implicit_batch, (100, 100)),
+    (price_american_fd_cn, price_american_fd_cn_batch, (100, 100)),
+    (price_american_mc_lsm, price_american_mc_lsm_batch, (2000, 20)),
+    (price_american_alo, price_american_alo_batch, ()),
+])
+def test_batch_pricers_match_the_single_contract_pricers(chain, pricer, batch_pricer, args):
+    prices = batch_pricer(chain, *args)
+    assert prices.shape == (3,)
+    np.testing.assert_allclose(prices, [pricer(option, *args) for option in chain], rtol=1e-10)
+    results = batch_pricer(chain, *args, greeks=True)
+    single = pricer(chain[0], *args, greeks=True)
+    assert results[0].price == pytest.approx(single.price, rel=1e-10)
+    assert results[0].delta == pytest.approx(single.delta, rel=1e-8, abs=1e-10)
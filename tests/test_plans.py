@@ -0,0 +1,68 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from core.option import OptionBatch
+from core.pricers.binomial import price_american_binomial_batch
+from core.pricers.fd_cn import price_american_fd_cn_batch
+from core.pricers.fd_implicit import price_american_fd_implicit_batch
+from core.pricers.plans import (DEFAULT_WINDOW, PLAN_RANGE, PlanCache, plan_window, price_american_binomial_chain,
+                                price_american_fd_cn_chain, price_american_fd_implicit_chain)
+
+@pytest.fixture
+def chain():
+    strikes = np.linspace(80, 120, 9)
+    return OptionBatch(100.0, strikes, 1.0, 0.05, 0.25, 'put', 'american')
+
+def test_binomial_chain_matches_batch_and_reuses_its_plan(chain):
+    plans = PlanCache()
+    for _ in range(3):
+        result = price_american_binomial_chain(chain, 200, greeks=True, plans=plans)
+    expected = price_american_binomial_batch(chain, 200, greeks=True)
+    for name in ('price', 'delta', 'gamma', 'theta'):
+        np.testing.assert_allclose(getattr(result, name), getattr(expected, name), rtol=1e-10, atol=1e-12)
+    assert (plans.misses, plans.hits, len(plans)) == (1, 2, 1)
+
+@pytest.mark.parametrize('chain_pricer, pricer', [(price_american_fd_implicit_chain, price_american_fd_implicit_batch),
+                                                  (price_american_fd_cn_chain, price_american_fd_cn_batch)])
+def test_fd_chain_matches_direct_pricing(chain, chain_pricer, pricer):
+    prices = chain_pricer(chain, 800, 200, plans=PlanCache())
+    np.testing.assert_allclose(prices, pricer(chain, 400, 200, grid='sinh'), atol=2e-2)
+
+def test_outliers_get_their_own_plans(chain):
+    plans = PlanCache()
+    before = price_american_fd_cn_chain(chain, 400, 100, plans=plans)
+    outliers = OptionBatch(100.0, [20.0, 500.0], 1.0, 0.05, 0.25, 'put', 'american')
+    price_american_fd_cn_chain(outliers, 400, 100, plans=plans)
+    assert len(plans) == 3
+    assert np.array_equal(price_american_fd_cn_chain(chain, 400, 100, plans=plans), before)
+
+def test_plan_window_rounds_out_to_powers_of_two_and_stops_at_plan_range():
+    low, high = plan_window(np.array([1.0, 0.3, 5.0, 0.01, 1e6, 0.0, np.inf]))
+    np.testing.assert_array_equal(low[:3], [DEFAULT_WINDOW[0], 0.25, DEFAULT_WINDOW[0]])
+    np.testing.assert_array_equal(high[:3], [DEFAULT_WINDOW[1], DEFAULT_WINDOW[1], 8.0])
+    assert np.isnan(low[3:]).all() and np.isnan(high[3:]).all()
+
+def test_plan_windows_outside_plan_range_are_refused():
+    with pytest.raises(ValueError, match="PLAN_RANGE"):
+        PlanCache().fd(1.0, 0.05, 0.25, 'put', 'american', 0.5, 400, 100, 'brennan_schwartz', 'sinh', 2,
+                       (PLAN_RANGE[0], 2 * PLAN_RANGE[1]))
+
+@pytest.mark.parametrize('chain_pricer, pricer', [(price_american_fd_implicit_chain, price_american_fd_implicit_batch),
+                                                  (price_american_fd_cn_chain, price_american_fd_cn_batch)])
+def test_extreme_moneyness_is_priced_directly(chain_pricer, pricer):
+    batch = OptionBatch([100.0, 100.0, 0.0, 100.0, 100.0, 1e8], [100.0, 0.0, 100.0, 1e-4, 1e8, 100.0], 1.0, 0.05,
+                        0.25, 'put', 'american')
+    plans = PlanCache()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = chain_pricer(batch, 400, 100, greeks=True, plans=plans)
+    # Only the at-the-money contract gets a plan, on the default window with the default M
+    assert len(plans) == 1
+    assert all(plan.M == 400 for plan in plans._entries.values())
+    np.testing.assert_allclose(result.price[2:], [100.0, 0.0, 1e8 - 100.0, 0.0], atol=1e-6)
+    assert result.price[1] == 0.0
+    direct = pricer(batch[1:], 400, 100, True, grid='sinh')
+    np.testing.assert_array_equal(result.price[1:], direct.price)
+    assert np.isfinite(result.delta).all()
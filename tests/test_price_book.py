@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+import pipeline.price_book as price_book_module
+from pipeline.price_book import price_book
+
+SETTINGS = {'steps': 50}
+
+@pytest.fixture(params=['csv', 'jsonl'])
+def book(request, tmp_path):
+    rng = np.random.default_rng(7)
+    rows = [{'S': 100.0, 'K': float(K), 'T': float(T), 'r': 0.05, 'sigma': float(sigma), 'option_type': 'put',
+             'style': 'american'} for K, T, sigma in zip(rng.uniform(80, 120, 23), rng.uniform(0.1, 2, 23),
+                                                          rng.uniform(0.1, 0.5, 23))]
+    rows[5]['sigma'] = -0.2  # one invalid contract travels through as an error row
+    path = tmp_path / f"book.{request.param}"
+    if request.param == 'csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        path.write_text(''.join(json.dumps(row) + "\n" for row in rows))
+    return path
+
+def run(book, output, **kwargs):
+    return price_book(str(book), str(output), method='binomial', settings=SETTINGS, chunk_size=5, quiet=True,
+                      **kwargs)
+
+def clean_output(book, tmp_path):
+    output = tmp_path / f"clean{book.suffix}"
+    run(book, output)
+    return output.read_bytes()
+
+def kill_on_chunk(book, output, n, monkeypatch):
+    """Run the book and interrupt it when the n-th chunk is about to be priced."""
+    price_chunk = price_book_module.price_chunk
+    calls = []
+
+    def killed(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == n:
+            raise KeyboardInterrupt
+        return price_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(price_book_module, 'price_chunk', killed)
+    with pytest.raises(KeyboardInterrupt):
+        run(book, output)
+    monkeypatch.setattr(price_book_module, 'price_chunk', price_chunk)
+
+def test_resume_after_kill_matches_clean_run(book, tmp_path, monkeypatch):
+    expected = clean_output(book, tmp_path)
+    output = tmp_path / f"killed{book.suffix}"
+    kill_on_chunk(book, output, 3, monkeypatch)
+
+    checkpoint = output.with_name(output.name + ".checkpoint")
+    assert checkpoint.exists()
+    # A half-written chunk past the checkpoint must be cut off on resume
+    with open(output, 'ab') as f:
+        f.write(b"100.0,95.0,0.")
+
+    summary = run(book, output, resume=True)
+    assert summary['skipped_chunks'] == 2
+    assert output.read_bytes() == expected
+    assert not checkpoint.exists()
+
+def test_resume_refuses_checkpoint_of_another_run(book, tmp_path, monkeypatch):
+    output = tmp_path / f"out{book.suffix}"
+    kill_on_chunk(book, output, 2, monkeypatch)
+
+    with pytest.raises(ValueError, match="different run"):
+        price_book(str(book), str(output), method='binomial', settings={'steps': 60}, chunk_size=5, quiet=True,
+                   resume=True)
+
+def test_worker_pool_matches_serial(book, tmp_path):
+    expected = clean_output(book, tmp_path)
+    output = tmp_path / f"pooled{book.suffix}"
+    summary = run(book, output, workers=2, max_in_flight=3)
+    assert summary['contracts'] == 23 and summary['failed'] == 1
+    assert output.read_bytes() == expected
+    assert not os.path.exists(str(output) + ".checkpoint")
+
+def test_mc_lsm_greeks_fill_theta():
+    rows = [{'S': 100.0, 'K': K, 'T': T, 'r': 0.05, 'sigma': 0.25} for K, T in ((90.0, 1.0), (100.0, 1.0),
+                                                                                  (110.0, 1.0), (100.0, 0.01))]
+    output = price_book_module.price_chunk(rows, 'mc_lsm', {'steps': 50, 'paths': 10000, 'mc_steps': 50},
+                                           greeks=True)
+    for row in output:
+        assert row['error'] == ''
+        assert all(np.isfinite(row[name]) for name in price_book_module.GREEK_FIELDS)
+    # ALO theta of the one-year contracts: -2.77, -3.09, -2.68
+    np.testing.assert_allclose([row['theta'] for row in output[:3]], [-2.77, -3.09, -2.68], atol=1.5)
+
+def test_richardson_with_crr_is_a_usage_error(book, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        price_book_module.main([str(book), str(tmp_path / "out.csv"), '--richardson'])
+    assert exit_info.value.code == 2
+    assert "--richardson" in capsys.readouterr().err
+    assert not (tmp_path / "out.csv").exists()
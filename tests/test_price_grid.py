@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from core.option import OptionBatch
+from core.price_grid import build_price_grid, open_price_grid
+from core.pricers.alo import price_american_alo_batch
+
+MONEYNESS = np.linspace(0.7, 1.3, 25)
+T = np.linspace(0.25, 2.0, 8)
+SIGMA = np.linspace(0.1, 0.5, 9)
+R = [0.03, 0.05]
+
+@pytest.fixture(scope='module')
+def grid_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('grids') / 'put.grid')
+    build_price_grid(path, price_american_alo_batch, MONEYNESS, T, SIGMA, R, greeks=True, validate=256)
+    return path
+
+@pytest.fixture
+def quotes():
+    rng = np.random.default_rng(1)
+    K = rng.uniform(50, 150, 200)
+    return OptionBatch(K * rng.uniform(0.75, 1.25, 200), K, rng.uniform(0.3, 1.9, 200), rng.uniform(0.03, 0.05, 200),
+                       rng.uniform(0.12, 0.48, 200), 'put', 'american')
+
+def test_nodes_are_exact_for_any_strike(grid_path):
+    grid = open_price_grid(grid_path)
+    batch = OptionBatch([110.0, 700.0], [100.0, 1000.0], 1.0, 0.05, 0.3, 'put', 'american')
+    np.testing.assert_allclose(grid.price_batch(batch), price_american_alo_batch(batch), rtol=1e-12)
+
+@pytest.mark.parametrize('interpolation, tolerance', [('linear', 5e-2), ('cubic', 5e-3)])
+def test_interpolation_tracks_direct_pricing(grid_path, quotes, interpolation, tolerance):
+    grid = open_price_grid(grid_path, interpolation)
+    np.testing.assert_allclose(grid.price_batch(quotes) / quotes.K, price_american_alo_batch(quotes) / quotes.K,
+                               atol=tolerance)
+    assert grid.error_estimates['price']['max_abs_error'] < tolerance
+
+def test_greeks_scale_with_the_strike(grid_path):
+    grid = open_price_grid(grid_path)
+    unit = grid.price_batch(OptionBatch(1.1, 1.0, 1.0, 0.05, 0.3, 'put', 'american'), greeks=True)
+    scaled = grid.price_batch(OptionBatch(110.0, 100.0, 1.0, 0.05, 0.3, 'put', 'american'), greeks=True)
+    for name, scale in (('price', 100), ('delta', 1), ('gamma', 1 / 100), ('theta', 100), ('vega', 100),
+                        ('rho', 100)):
+        assert getattr(scaled, name)[0] == pytest.approx(getattr(unit, name)[0] * scale, rel=1e-12)
+    assert -1 < unit.delta[0] < 0 and unit.gamma[0] > 0 and unit.vega[0] > 0
+
+def test_contracts_outside_the_grid_get_nan(grid_path):
+    grid = open_price_grid(grid_path)
+    batch = OptionBatch([100.0, 200.0, 100.0, 100.0], 100.0, [1.0, 1.0, 3.0, 1.0], 0.05, [0.3, 0.3, 0.3, 0.05],
+                        'put', 'american')
+    np.testing.assert_array_equal(grid.covers(batch), [True, False, False, False])
+    prices = grid.price_batch(batch)
+    assert np.isfinite(prices[0]) and np.isnan(prices[1:]).all()
+
+def test_wrong_contracts_and_prices_only_grids_are_rejected(grid_path, tmp_path):
+    grid = open_price_grid(grid_path)
+    with pytest.raises(ValueError, match="american puts only"):
+        grid.price_batch(OptionBatch(100.0, 100.0, 1.0, 0.05, 0.3, 'call', 'american'))
+    small = build_price_grid(str(tmp_path / 'small.grid'), price_american_alo_batch, [0.9, 1.1], [1.0], [0.3], [0.05],
+                             validate=0, dtype='float32')
+    assert small.error_estimates is None and small.values.dtype == np.float32
+    with pytest.raises(ValueError, match="prices only"):
+        small.price_batch(OptionBatch(100.0, 100.0, 1.0, 0.05, 0.3, 'put', 'american'), greeks=True)
+    with pytest.raises(ValueError, match="increasing"):
+        build_price_grid(str(tmp_path / 'bad.grid'), price_american_alo_batch, [1.1, 0.9], [1.0], [0.3], [0.05])
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+import threading
+
+import numpy as np
+
+from core.greeks import compute_all_greeks
+from core.option import Option
+from core.pricers.binomial import price_american_binomial
+from core.profiling import Profile, active_profile, count, instrumented, phase
+from core.sweep import sweep
+
+@instrumented(name='test.outer')
+def outer():
+    with phase('test.inner'):
+        count('test.items', 3)
+    count('test.items')
+
+def test_phases_nest_and_counters_add():
+    with Profile() as profile:
+        assert active_profile() is profile
+        outer()
+        outer()
+    assert active_profile() is None
+    calls, total, own = profile.phases['test.outer']
+    inner_calls, inner_total, _ = profile.phases['test.inner']
+    assert calls == inner_calls == 2
+    assert total >= own and abs(total - own - inner_total) < 1e-9
+    assert profile.counters == {'test.items': 8}
+    assert profile.wall_time >= total
+
+def test_nothing_is_recorded_when_off():
+    outer()
+    profile = Profile()
+    outer()
+    assert profile.phases == {} and profile.counters == {}
+
+def test_profiles_do_not_mix_across_threads():
+    with Profile() as profile:
+        thread = threading.Thread(target=outer)
+        thread.start()
+        thread.join()
+        other = Profile()
+        with other:
+            outer()
+    assert 'test.outer' not in profile.phases
+    profile.merge(other)
+    profile.merge(other)
+    assert profile.phases['test.outer'][0] == 2 and profile.counters['test.items'] == 8
+
+def test_pricers_report_their_work():
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+    with Profile() as profile:
+        compute_all_greeks(price_american_binomial, option, 50)
+    assert profile.phases['price_american_binomial_batch'][0] >= 1 and profile.counters['binomial.nodes'] > 0
+
+    report = profile.report()
+    assert json.loads(profile.to_json()) == json.loads(json.dumps(report))
+    rows = list(csv.DictReader(io.StringIO(profile.to_csv())))
+    assert {row['phase'] for row in rows} >= {'price_american_binomial_batch', 'counter:binomial.nodes'}
+    assert 'price_american_binomial_batch' in profile.format()
+
+def test_pool_workers_are_merged_into_the_caller_profile():
+    option = Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+    profiles = {}
+    for executor in ('serial', 'thread', 'process'):
+        with Profile() as profiles[executor]:
+            sweep(price_american_binomial, option, {'S': np.linspace(90, 110, 8)}, 20, executor=executor, workers=2)
+    nodes = {executor: profile.counters['binomial.nodes'] for executor, profile in profiles.items()}
+    assert nodes['serial'] == nodes['thread'] == nodes['process'] > 0
@@ -0,0 +1,63 @@
+import pickle
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from core.greeks import compute_delta
+from core.option import Option
+from core.pricers.binomial import price_american_binomial, price_american_binomial_batch
+from core.pricers.fd_cn import price_american_fd_cn
+from core.sweep import sweep
+from webapp.pricers import pricer_for
+
+AXES = {'S': np.linspace(80, 120, 5), 'sigma': [0.2, 0.3, 0.4]}
+
+@pytest.fixture
+def put():
+    return Option(100.0, 100.0, 1.0, 0.05, 0.25, 'put', 'american')
+
+def test_values_follow_the_axes(put):
+    result = sweep(price_american_binomial, put, AXES, 50, executor='serial')
+    assert result.dims == ('S', 'sigma') and result.values.shape == (5, 3)
+    assert result.values[1, 2] == pytest.approx(price_american_binomial(put.replace(S=90.0, sigma=0.4), 50))
+    np.testing.assert_array_equal(result.sel(sigma=0.3).values, result.values[:, 1])
+    assert result.sel(S=101.0, sigma=0.21).values == result.values[2, 0]
+
+def test_executors_agree(put):
+    serial = sweep(price_american_binomial, put, AXES, 50, executor='serial').values
+    for executor in ('thread', 'process'):
+        np.testing.assert_array_equal(sweep(price_american_binomial, put, AXES, 50, executor=executor,
+                                            workers=2).values, serial)
+    batch = sweep(price_american_binomial, put, AXES, 50, executor='serial',
+                  batch_pricer=price_american_binomial_batch).values
+    np.testing.assert_allclose(batch, serial, rtol=1e-12)
+
+def test_greek_sweep(put):
+    result = sweep(price_american_binomial, put, {'S': [90.0, 110.0]}, 50, greek=compute_delta, executor='serial')
+    assert result.quantity == 'delta'
+    assert result.values[0] == pytest.approx(compute_delta(price_american_binomial, put.replace(S=90.0), 50))
+
+def test_fd_surface_sweep_matches_single_solves(put):
+    result = sweep(price_american_fd_cn, put, AXES, 200, executor='serial')
+    single = [price_american_fd_cn(put.replace(S=80.0, sigma=sigma), 200) for sigma in AXES['sigma']]
+    np.testing.assert_allclose(result.values[0], single, rtol=1e-2)
+
+def test_webapp_pricers_run_on_a_shared_process_pool(put):
+    config = (('grid', 'sinh'),)
+    pricer = pricer_for("FDM Crank-Nicolson", config)
+    binomial = pricer_for("Binomial", (('tree', 'crr'), ('richardson', False)))
+    pickle.dumps((pricer, binomial))
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        for p in (pricer, binomial):
+            np.testing.assert_array_equal(sweep(p, put, AXES, 50, executor=pool).values,
+                                          sweep(p, put, AXES, 50, executor='serial').values)
+
+def test_unknown_axis_and_cancel(put):
+    with pytest.raises(ValueError, match="Unknown sweep axes"):
+        sweep(price_american_binomial, put, {'spot': [100.0]})
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CancelledError):
+        sweep(price_american_binomial, put, AXES, 50, executor='serial', cancel=cancel)
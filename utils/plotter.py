@@ -1,14 +1,12 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from core.sweep import sweep
 
-def plot_price_vs_spot(pricer, base_option, S_range=(50, 150), steps=100, title="Price vs Spot", label=None):
+def plot_price_vs_spot(pricer, base_option, S_range=(50, 150), steps=100, title="Price vs Spot", label=None,
+                       executor='auto', workers=None):
     spot_prices = np.linspace(*S_range, 100)
-    prices = []
-
-    for S in spot_prices:
-        opt = base_option.__class__(S=S, K=base_option.K, T=base_option.T, r=base_option.r,
-                                    sigma=base_option.sigma, option_type=base_option.option_type, style=base_option.style)
-        prices.append(pricer(opt, steps))
+    # FD pricers price the whole spot window from one grid solve; others fan out over a pool
+    prices = sweep(pricer, base_option, {'S': spot_prices}, steps, executor=executor, workers=workers).values
 
     plt.figure(figsize=(8, 5))
     plt.plot(spot_prices, prices, label=label or pricer.__name__)
@@ -20,14 +18,11 @@ def plot_price_vs_spot(pricer, base_option, S_range=(50, 150), steps=100, title=
     plt.tight_layout()
     plt.show()
 
-def plot_greek_vs_spot(greek_func, pricer, base_option, S_range=(50, 150), steps=100, greek_name="Delta"):
+def plot_greek_vs_spot(greek_func, pricer, base_option, S_range=(50, 150), steps=100, greek_name="Delta",
+                       executor='auto', workers=None):
     spot_prices = np.linspace(*S_range, 100)
-    greek_vals = []
-
-    for S in spot_prices:
-        opt = base_option.__class__(S=S, K=base_option.K, T=base_option.T, r=base_option.r,
-                                    sigma=base_option.sigma, option_type=base_option.option_type, style=base_option.style)
-        greek_vals.append(greek_func(pricer, opt, steps))
+    greek_vals = sweep(pricer, base_option, {'S': spot_prices}, steps, greek=greek_func, executor=executor,
+                       workers=workers).values
 
     plt.figure(figsize=(8, 5))
     plt.plot(spot_prices, greek_vals, label=greek_name, color='darkgreen')
@@ -37,4 +32,22 @@ def plot_greek_vs_spot(greek_func, pricer, base_option, S_range=(50, 150), steps
     plt.grid(True)
     plt.tight_layout()
     plt.legend()
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def plot_sweep_heatmap(result, title=None, cmap='viridis'):
+    """
+    Plot a 2-D SweepResult (see core.sweep.sweep) as a heatmap, with the
+    first axis along x and the second along y.
+    """
+    if result.values.ndim != 2:
+        raise ValueError("A heatmap needs a sweep over exactly two axes")
+    (x_name, x), (y_name, y) = result.axes.items()
+
+    plt.figure(figsize=(8, 6))
+    mesh = plt.pcolormesh(x, y, result.values.T, shading='auto', cmap=cmap)
+    plt.colorbar(mesh, label=result.quantity.capitalize())
+    plt.xlabel(x_name)
+    plt.ylabel(y_name)
+    plt.title(title or f"{result.quantity.capitalize()} over {x_name} and {y_name}")
+    plt.tight_layout()
+    plt.show()
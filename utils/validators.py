@@ -1,6 +1,6 @@
 import numpy as np
 from scipy.stats import norm
-from core.option import Option
+from core.option import Option, OptionBatch
 
 def black_scholes_price(option: Option) -> float:
     """
@@ -17,3 +17,29 @@ def black_scholes_price(option: Option) -> float:
         return S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
     else:
         return K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+
+def black_scholes_price_batch(batch: OptionBatch) -> np.ndarray:
+    """
+    Computes European Black-Scholes prices for a whole OptionBatch at once.
+    """
+    S, K, T, r, sigma = batch.S, batch.K, batch.T, batch.r, batch.sigma
+    sign = np.where(batch.is_call, 1.0, -1.0)
+    intrinsic = np.maximum(sign * (S - K), 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol
+        d2 = d1 - vol
+        price = sign * (S * norm.cdf(sign * d1) - K * np.exp(-r * T) * norm.cdf(sign * d2))
+    return np.where(vol > 0, price, intrinsic)
+
+def black_scholes_vega_batch(batch: OptionBatch) -> np.ndarray:
+    """
+    Computes European Black-Scholes vegas (dV/dsigma) for a whole OptionBatch at once.
+    """
+    S, K, T, r, sigma = batch.S, batch.K, batch.T, batch.r, batch.sigma
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = sigma * np.sqrt(T)
+        d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol
+        vega = S * norm.pdf(d1) * np.sqrt(T)
+    return np.where(vol > 0, vega, 0.0)
@@ -0,0 +1,58 @@
+import functools
+
+from core.pricers.binomial import price_american_binomial
+from core.pricers.fd_explicit import price_american_fd_explicit
+from core.pricers.fd_implicit import price_american_fd_implicit
+from core.pricers.fd_cn import price_american_fd_cn
+from core.pricers.monte_carlo_lsm import price_american_mc_lsm
+from core.pricers.baw import price_american_baw
+from core.pricers.bjerksund_stensland import price_american_bjerksund_stensland
+from core.pricers.alo import price_american_alo
+
+# The app's pricers live in an importable module rather than the Streamlit
+# script (which runs as __main__), so they pickle into the sweep process pool.
+
+def pricer_for(method, config):
+    """
+    Build the pricer for an app method and its sidebar settings.
+
+    Parameters:
+        method (str): Method name as shown in the sidebar.
+        config (tuple): Settings as (name, value) pairs.
+
+    Returns:
+        callable: Picklable pricer(option, steps, greeks=False), or None for an unknown method
+    """
+    settings = dict(config)
+    if method == "Binomial":
+        return functools.partial(price_american_binomial, tree=settings['tree'], richardson=settings['richardson'])
+    if method == "FDM Explicit":
+        return _fd_explicit
+    if method == "FDM Implicit":
+        return functools.partial(_fd_implicit, grid=settings['grid'])
+    if method == "FDM Crank-Nicolson":
+        return functools.partial(_fd_cn, grid=settings['grid'])
+    if method == "Monte Carlo LSM":
+        return functools.partial(_mc_lsm, **settings)
+    if method == "Barone-Adesi-Whaley":
+        return price_american_baw
+    if method == "Bjerksund-Stensland":
+        return price_american_bjerksund_stensland
+    if method == "Andersen-Lake-Offengeld":
+        return price_american_alo
+    return None
+
+def _fd_explicit(option, steps, greeks=False):
+    return price_american_fd_explicit(option, M=steps, N=steps, greeks=greeks)
+
+def _fd_implicit(option, steps, greeks=False, surface=False, S_range=None, grid='uniform'):
+    return price_american_fd_implicit(option, M=steps, N=steps, greeks=greeks, grid=grid, surface=surface,
+                                      S_range=S_range)
+
+def _fd_cn(option, steps, greeks=False, surface=False, S_range=None, grid='uniform'):
+    return price_american_fd_cn(option, M=steps, N=steps, greeks=greeks, grid=grid, surface=surface,
+                                S_range=S_range, rannacher_steps=2)
+
+def _mc_lsm(option, steps, greeks=False, **settings):
+    # steps is ignored: the sidebar sets n_paths and n_steps
+    return price_american_mc_lsm(option, greeks=greeks, **settings)
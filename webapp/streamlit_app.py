@@ -1,5 +1,8 @@
 import sys
 import os
+import contextlib
+import threading
+from concurrent.futures import CancelledError, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 # Add the project root directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -10,14 +13,125 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from core.option import Option
-from core.pricers.binomial import price_american_binomial
-from core.pricers.fd_explicit import price_american_fd_explicit
-from core.pricers.fd_implicit import price_american_fd_implicit
-from core.pricers.fd_cn import price_american_fd_cn
-from core.pricers.monte_carlo_lsm import price_american_mc_lsm
-from core.greeks import compute_all_greeks
+from core.greeks import (compute_all_greeks, compute_delta, compute_gamma, compute_rho, compute_theta,
+                         compute_vega, supports_native_greeks)
+from core.cache import LRUCache, PricingCache
+from core.profiling import Profile
+from core.sweep import sweep
+from webapp.pricers import pricer_for
+
+GREEKS = {'Delta': compute_delta, 'Gamma': compute_gamma, 'Theta': compute_theta, 'Vega': compute_vega,
+          'Rho': compute_rho}
+SPOT_GRID = np.linspace(50, 150, 50)
+HEATMAP_AXES = {'S': np.linspace(50, 150, 25), 'sigma': np.linspace(0.05, 0.8, 10)}
 
 st.set_page_config(page_title="American Option Pricing", layout="wide")
+
+@st.cache_resource
+def pricing_cache():
+    # One cache shared across reruns and sessions, so widget changes that
+    # only touch the plot reuse the prices and Greeks already computed
+    return PricingCache(maxsize=20000)
+
+@st.cache_resource
+def job_board():
+    # One worker pool for all sessions keeps the total load bounded however
+    # many desks have the app open; numpy releases the GIL in the heavy loops
+    return JobBoard(ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 2), thread_name_prefix="pricing"))
+
+@st.cache_resource
+def sweep_pool():
+    # One process pool for the heatmap sweeps of all sessions: the sweep is
+    # pure Python per point, so it needs processes to use more than one core
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+class Job:
+    """
+    A background computation. fn receives a threading.Event that is set when
+    nobody waits for the result any more; long loops check it and stop early.
+    """
+
+    def __init__(self, pool, fn):
+        self.cancelled = threading.Event()
+        self.profile = Profile()
+        self.watchers = 0
+        self.future = pool.submit(self._run, fn)
+
+    def _run(self, fn):
+        if self.cancelled.is_set():
+            raise CancelledError()
+        with self.profile:
+            return fn(self.cancelled)
+
+    def failed(self):
+        return self.future.done() and (self.future.cancelled() or self.future.exception() is not None)
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()  # only succeeds while the job is still queued
+
+class JobBoard:
+    """
+    Background jobs shared by all sessions, keyed on their inputs.
+
+    Sessions asking for the same inputs share one job; finished jobs stay on
+    the board (least recently used first out) and serve as cached results.
+    A job nobody watches any more (every session that asked for it has
+    moved a slider since) is cancelled and dropped.
+    """
+
+    def __init__(self, pool, maxsize=2000):
+        self.pool = pool
+        self.jobs = LRUCache(maxsize)
+        self.lock = threading.Lock()
+
+    def submit(self, key, fn):
+        with self.lock:
+            job = self.jobs.get(key, lambda: Job(self.pool, fn))
+            if job.failed():
+                job = Job(self.pool, fn)
+                self.jobs.put(key, job)
+            job.watchers += 1
+            return job
+
+    def release(self, key, job):
+        with self.lock:
+            job.watchers -= 1
+            if job.watchers <= 0 and not job.future.done():
+                job.cancel()
+                current = self.jobs.pop(key)
+                if current is not None and current is not job:
+                    self.jobs.put(key, current)  # a newer job took the key over; keep it
+
+def make_pricer(method, config, cache):
+    """Build the cached pricer for a method and its sidebar settings (config is a tuple of (name, value) pairs)."""
+    pricer = pricer_for(method, config)
+    return None if pricer is None else cache.cached(pricer, key=(method, config))
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def cached_price(method, config, terms, steps, _cache):
+    # Keyed on the inputs only; the shared pricing cache is not part of the key
+    return float(make_pricer(method, config, _cache)(Option(*terms), steps))
+
+def greeks_job(pricer, opt, steps, names):
+    """Job computing the named Greeks; all five in one job when the pricer has native Greeks."""
+    def run(cancelled):
+        if len(names) > 1:
+            return dict(zip(GREEKS, compute_all_greeks(pricer, opt, steps)))
+        return {names[0]: GREEKS[names[0]](pricer, opt, steps)}
+    return run
+
+def sweep_job(pricer, opt, steps, axes, executor='serial'):
+    """
+    Job pricing the option over the sweep axes (see core.sweep), stopping
+    early once cancelled. FD pricers solve one grid per spot ladder. The
+    sweep runs on executor: 'serial' inside the job's board thread, or a
+    shared pool whose size bounds the load however many sessions sweep.
+    """
+    def run(cancelled):
+        return sweep(pricer, opt, axes, steps, executor=executor, cancel=cancelled)
+    return run
+
 st.title("📈 American Option Pricing & Greeks Explorer")
 
 # Sidebar inputs
@@ -28,102 +142,106 @@ T = st.sidebar.slider("Time to Maturity (T)", 0.01, 3.0, 1.0)
 r = st.sidebar.slider("Risk-Free Rate (r)", 0.0, 0.2, 0.05)
 sigma = st.sidebar.slider("Volatility (σ)", 0.05, 1.0, 0.2)
 option_type = st.sidebar.selectbox("Option Type", ["put", "call"])
-method = st.sidebar.selectbox("Pricing Method", ["Binomial", "FDM Explicit", "FDM Implicit", "FDM Crank-Nicolson", "Monte Carlo LSM"])
+method = st.sidebar.selectbox("Pricing Method", ["Binomial", "FDM Explicit", "FDM Implicit", "FDM Crank-Nicolson", "Monte Carlo LSM",
+                                                      "Barone-Adesi-Whaley", "Bjerksund-Stensland", "Andersen-Lake-Offengeld"])
 steps = st.sidebar.slider("Steps (Binomial or FDM)", 10, 500, 100)
 
+# Method settings the pricer closes over; part of every cache and job key
+config = ()
+
 # Monte Carlo parameters
 if method == "Monte Carlo LSM":
     n_paths = st.sidebar.number_input("MC Paths", min_value=1000, max_value=100000, value=10000, step=1000)
     n_mc_steps = st.sidebar.slider("MC Steps", 10, 200, 50)
     poly_degree = st.sidebar.slider("MC Poly Degree", 1, 5, 2)
     mc_seed = st.sidebar.number_input("MC Seed", min_value=0, max_value=99999, value=42, step=1)
+    mc_antithetic = st.sidebar.checkbox("Antithetic variates")
+    mc_control = st.sidebar.checkbox("European control variate")
+    mc_sobol = st.sidebar.checkbox("Sobol + Brownian bridge")
+    config = (('n_paths', int(n_paths)), ('n_steps', n_mc_steps), ('poly_degree', poly_degree), ('seed', int(mc_seed)),
+              ('antithetic', mc_antithetic), ('control_variate', mc_control), ('sobol', mc_sobol))
 
-# Create option object
-opt = Option(S=S, K=K, T=T, r=r, sigma=sigma, option_type=option_type, style="american")
-
-# Select pricer
+# Tree variant and extrapolation for the binomial pricer
 if method == "Binomial":
-    pricer = lambda o, s: price_american_binomial(o, s)
-elif method == "FDM Explicit":
-    pricer = lambda o, s: price_american_fd_explicit(o, M=s, N=s)
-elif method == "FDM Implicit":
-    pricer = lambda o, s: price_american_fd_implicit(o, M=s, N=s)
-elif method == "FDM Crank-Nicolson":
-    pricer = lambda o, s: price_american_fd_cn(o, M=s, N=s)
-elif method == "Monte Carlo LSM":
-    pricer = lambda o, s: price_american_mc_lsm(o, n_paths=n_paths, n_steps=n_mc_steps, poly_degree=poly_degree, seed=mc_seed)
-else:
-    pricer = None
+    tree = st.sidebar.selectbox("Binomial Tree", ["crr", "leisen_reimer", "bbs"],
+                                help="Cox-Ross-Rubinstein, Leisen-Reimer or binomial Black-Scholes")
+    richardson = st.sidebar.checkbox("Richardson extrapolation", disabled=tree == "crr",
+                                     help="Extrapolate from steps and steps / 2 (smooth trees only)")
+    config = (('tree', tree), ('richardson', richardson and tree != "crr"))
 
-# Compute price
-if pricer is not None:
-    price = pricer(opt, steps)
-else:
-    price = None
+# Grid parameters for the implicit FD schemes
+if method in ("FDM Implicit", "FDM Crank-Nicolson"):
+    fd_grid = st.sidebar.selectbox("FDM Grid", ["uniform", "sinh", "log"])
+    config = (('grid', fd_grid),)
 
-# Compute Greeks
+show_heatmap = st.sidebar.checkbox("Spot × volatility heatmap", help="Prices a 25 × 10 grid of spots and volatilities")
+profile_run = st.sidebar.checkbox("Profile this run", help="Per-phase timings and work counters of the pricers")
+# A profile only records while active; the background jobs each record their own and are merged below
+profiler = Profile() if profile_run else contextlib.nullcontext()
+
+# Create option object
+opt = Option(S=S, K=K, T=T, r=r, sigma=sigma, option_type=option_type, style="american")
+terms = (opt.S, opt.K, opt.T, opt.r, opt.sigma, opt.option_type, opt.style)
+pricer = make_pricer(method, config, pricing_cache())
+
+# Background jobs for the Greeks and the spot sweep. Jobs of the previous
+# run that no longer match the inputs are released, which cancels them
+# unless another session is waiting for the same result.
+board = job_board()
+jobs = {}
 if pricer is not None:
-    delta, gamma, theta, vega, rho = compute_all_greeks(pricer, opt, steps)
-else:
-    delta = gamma = theta = vega = rho = None
+    greek_groups = [tuple(GREEKS)] if supports_native_greeks(pricer) else [(name,) for name in GREEKS]
+    for names in greek_groups:
+        key = ('greeks', names, method, config, terms, steps)
+        jobs[key] = board.submit(key, greeks_job(pricer, opt, steps, names))
+    key = ('sweep', method, config, terms, steps)
+    jobs[key] = board.submit(key, sweep_job(pricer, opt, steps, {'S': SPOT_GRID}))
+    if show_heatmap:
+        # Fanned out over the shared process pool; the worker processes cannot
+        # see the pricing cache, so they get the plain (picklable) pricer
+        key = ('heatmap', method, config, terms, steps)
+        jobs[key] = board.submit(key, sweep_job(pricer_for(method, config), opt, steps, HEATMAP_AXES, sweep_pool()))
+for key, job in st.session_state.get('jobs', {}).items():
+    board.release(key, job)
+st.session_state['jobs'] = jobs
 
-# Display results
+# Display the price first; the Greeks and plots fill in as their jobs finish
 st.markdown("## 💰 Price")
+with profiler:
+    price = cached_price(method, config, terms, steps, pricing_cache()) if pricer is not None else None
 if price is not None:
     st.write(f"**{method} American {option_type.capitalize()} Price:** ${price:.4f}")
 else:
     st.warning("No pricer selected or price could not be computed.")
 
 st.markdown("## ⚖️ Greeks")
-if delta is not None:
-    st.write(f"**Delta:** {delta:.4f}")
-else:
-    st.warning("No pricer selected or delta could not be computed.")
-if gamma is not None:
-    st.write(f"**Gamma:** {gamma:.4f}")
-else:
-    st.warning("No pricer selected or gamma could not be computed.")
-if theta is not None:
-    st.write(f"**Theta:** {theta:.4f}")
-else:
-    st.warning("No pricer selected or theta could not be computed.")
-if vega is not None:
-    st.write(f"**Vega:** {vega:.4f}")
-else:
-    st.warning("No pricer selected or vega could not be computed.")
-if rho is not None:
-    st.write(f"**Rho:** {rho:.4f}")
-else:
-    st.warning("No pricer selected or rho could not be computed.")
+greek_slots = {name: st.empty() for name in GREEKS}
+for name, slot in greek_slots.items():
+    if pricer is not None:
+        slot.write(f"**{name}:** computing…")
+    else:
+        slot.warning(f"No pricer selected or {name.lower()} could not be computed.")
 
 # --- Price vs Spot Plot ---
 st.markdown("## 📊 Price vs Spot Plot")
-
+plot_slot = st.empty()
 if pricer is not None:
-    S_vals = np.linspace(50, 150, 50)
-    prices = [pricer(Option(S=s, K=K, T=T, r=r, sigma=sigma, option_type=option_type, style="american"), steps) for s in S_vals]
-    # Ensure prices is a flat list of floats for plotting
-    if isinstance(prices, np.ndarray):
-        prices = prices.tolist()
-    elif isinstance(prices, list):
-        prices = [float(p) if not isinstance(p, float) else p for p in prices]
-    fig1, ax1 = plt.subplots()
-    ax1.plot(S_vals, prices, label=f"{method}")
-    ax1.set_xlabel("Spot Price (S)")
-    ax1.set_ylabel("Option Price")
-    ax1.set_title("Price vs Spot")
-    ax1.legend()
-    st.pyplot(fig1)
+    plot_slot.info("Pricing the spot ladder…")
 else:
-    st.warning("No pricer selected.")
+    plot_slot.warning("No pricer selected.")
+
+if show_heatmap and pricer is not None:
+    st.markdown("## 🌡️ Price Heatmap (Spot × Volatility)")
+    heatmap_slot = st.empty()
+    heatmap_slot.info("Pricing the spot × volatility grid…")
 
 # --- Payoff Plot ---
 st.markdown("## 💵 Payoff Diagram at Expiry")
 
-payoff = np.maximum(K - S_vals, 0) if option_type == "put" else np.maximum(S_vals - K, 0)
+payoff = np.maximum(K - SPOT_GRID, 0) if option_type == "put" else np.maximum(SPOT_GRID - K, 0)
 
 fig2, ax2 = plt.subplots()
-ax2.plot(S_vals, payoff, color="purple", label="Payoff at Expiry")
+ax2.plot(SPOT_GRID, payoff, color="purple", label="Payoff at Expiry")
 ax2.set_xlabel("Spot Price (S)")
 ax2.set_ylabel("Payoff")
 ax2.set_title("Payoff Diagram")
@@ -132,6 +250,75 @@ st.pyplot(fig2)
 
 # Footer
 st.markdown("---")
+status = st.empty()
+footer = st.empty()
 st.write("✅ Adjust parameters from the sidebar to see how prices and Greeks change in real-time.")
 st.markdown("💬 _Built with ❤️ using Python, Streamlit, and your custom numerical pricers._")
 
+def show(key, job):
+    """Render a finished job into its placeholder."""
+    error = job.future.exception() if not job.future.cancelled() else CancelledError()
+    if key[0] == 'greeks':
+        for name in key[1]:
+            value = None if error is not None else job.future.result().get(name)
+            if value is None:
+                greek_slots[name].warning(f"{name} could not be computed.")
+            else:
+                greek_slots[name].write(f"**{name}:** {value:.4f}")
+    elif key[0] == 'heatmap':
+        if error is not None:
+            heatmap_slot.warning(f"Heatmap sweep failed: {error!r}")
+            return
+        result = job.future.result()
+        fig3, ax3 = plt.subplots()
+        mesh = ax3.pcolormesh(result.axes['S'], result.axes['sigma'], result.values.T, shading='auto')
+        fig3.colorbar(mesh, ax=ax3, label="Option Price")
+        ax3.set_xlabel("Spot Price (S)")
+        ax3.set_ylabel("Volatility (σ)")
+        ax3.set_title(f"{method} Price over Spot and Volatility")
+        heatmap_slot.pyplot(fig3)
+        plt.close(fig3)
+    elif error is not None:
+        plot_slot.warning(f"Spot sweep failed: {error!r}")
+    else:
+        fig1, ax1 = plt.subplots()
+        ax1.plot(SPOT_GRID, job.future.result().values, label=f"{method}")
+        ax1.set_xlabel("Spot Price (S)")
+        ax1.set_ylabel("Option Price")
+        ax1.set_title("Price vs Spot")
+        ax1.legend()
+        plot_slot.pyplot(fig1)
+        plt.close(fig1)
+
+# Wait for the jobs, rendering each as it finishes. Every status update is a
+# point where Streamlit can stop this run when a widget changes, so a stale
+# run never holds the session.
+pending = {job.future: key for key, job in jobs.items()}
+while pending:
+    status.caption(f"⏳ {len(jobs) - len(pending)} of {len(jobs)} results ready")
+    done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+    for future in done:
+        key = pending.pop(future)
+        show(key, jobs[key])
+status.empty()
+
+cache_stats = pricing_cache().stats()
+footer.caption(f"Pricing cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['size']}/{cache_stats['maxsize']} results cached; "
+               f"{len(board.jobs)} background results kept")
+
+# Profile panel
+if profile_run:
+    for job in jobs.values():
+        profiler.merge(job.profile)
+    report = profiler.report()
+    with st.sidebar.expander("⏱️ Profile", expanded=True):
+        st.caption(f"{report['wall_time_s'] * 1e3:.1f} ms profiled in this session, plus the background jobs; "
+                   f"results served by a cache do not run the pricers and are not timed.")
+        st.dataframe([{'phase': row['phase'], 'calls': row['calls'], 'total ms': round(row['total_s'] * 1e3, 2),
+                       'self ms': round(row['self_s'] * 1e3, 2)}
+                      for row in report['phases']], hide_index=True)
+        st.dataframe([{'counter': name, 'count': value} for name, value in report['counters'].items()],
+                     hide_index=True)
+        st.download_button("Download report (JSON)", profiler.to_json(), file_name="pricing_profile.json",
+                           mime="application/json")